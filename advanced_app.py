@@ -1,10 +1,15 @@
 # advanced_app.py
 
+import json
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import copy
-from db_manager import authenticate_user, register_user, save_user_data, load_user_data
+from db_manager import (
+    authenticate_user, register_user, save_user_data, load_user_data,
+    issue_session_token, verify_session_token, revoke_session_tokens, SESSION_TOKEN_TTL, KAYIT_CAKISMASI_ANAHTARI,
+)
+from sim_core import borc_kalemleri_olustur, gelir_kalemi_olustur
+from metrics import METRICS_ENABLED, Olcumler, sure, olcum_oturumu, json_olarak, prometheus_olarak
 
 # --- 0. Yapılandırma ---
 st.set_page_config(
@@ -16,25 +21,8 @@ st.set_page_config(
 # --- A. YARDIMCI VE SİMÜLASYON FONKSİYONLARI ---
 
 # --- 1. Sabitler ve Kurallar ---
-
-STRATEJILER = {
-    "Minimum Çaba (Minimum Ek Ödeme)": 0.0,
-    "Temkinli (Yüzde 50)": 0.5,
-    "Maksimum Çaba (Tüm Ek Ödeme)": 1.0, 
-    "Aşırı Çaba (x1.5 Ek Ödeme)": 1.5,   
-}
-
-ONCELIK_STRATEJILERI = {
-    "Borç Çığı (Avalanche - Önce Faiz)": "Avalanche",
-    "Borç Kartopu (Snowball - Önce Tutar)": "Snowball",
-    "Kullanıcı Tanımlı Sıra": "Kullanici"
-}
-
-POST_DEBT_STRATEJILERI = {
-    "Tamamı Birikime Yönlendir": 1.0,
-    "Yarı Yarıya (50% Birikim / 50% Harcama)": 0.5,
-    "Hepsini Harcama Bütçesine Ekle (0% Birikim)": 0.0,
-}
+# Motor, kalem üreticileri ve strateji tabloları arayüzden bağımsız sim_core.py'dedir; bu dosya yalnızca
+# Streamlit arayüzüdür.
 
 # Para formatlama fonksiyonu
 def format_tl(tutar):
@@ -44,73 +32,11 @@ def format_tl(tutar):
 
 # --- 2. Yardımcı Fonksiyonlar ---
 
-def hesapla_min_odeme(borc, faiz_carpani=1.0):
-    kural = borc.get('min_kural')
-    tutar = borc.get('tutar', 0)
-    
-    if kural in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER', 'SABIT_TAKSIT_ANAPARA']:
-        return borc.get('sabit_taksit', 0)
-    
-    elif kural == 'ASGARI_FAIZ': # Kredi Kartı
-        asgari_anapara_yuzdesi = borc.get('kk_asgari_yuzdesi', 0)
-        return tutar * asgari_anapara_yuzdesi
-    
-    elif kural in ['FAIZ_ART_ANAPARA', 'FAIZ']: # KMH ve Diğer Faizli
-        zorunlu_anapara_yuzdesi = borc.get('zorunlu_anapara_yuzdesi', 0)
-        return tutar * zorunlu_anapara_yuzdesi
-    
-    return 0
-
 def add_debt(isim, faizli_anapara, oncelik_str, borc_tipi, sabit_taksit, kalan_ay, faiz_aylik, kk_asgari_yuzdesi, zorunlu_anapara_yuzdesi, kk_limit=0.0, devam_etme_yuzdesi=0.0):
-    borc_listesi = []
-    final_priority = 1 
-
-    if oncelik_str:
-        priority_val = int(oncelik_str.split('.')[0])
-        final_priority = priority_val + 1000 
-
-    if borc_tipi in ["Sabit Gider (Harcama Sepeti)", "Sabit Kira Gideri", "Ev Kredisi Taksiti"]:
-        kural_type = "SABIT_GIDER"
-        borc_listesi.append({
-            "isim": isim, "tutar": 0, "min_kural": kural_type,
-            "oncelik": 1, "sabit_taksit": sabit_taksit,
-            "kalan_ay": kalan_ay if borc_tipi != "Sabit Kira Gideri" else 99999, 
-            "faiz_aylik": 0, "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": devam_etme_yuzdesi
-        })
-    
-    elif borc_tipi == "Kredi Kartı":
-        if sabit_taksit > 0 and kalan_ay > 0:
-            borc_listesi.append({
-                "isim": f"{isim} (Taksitler)", "tutar": sabit_taksit * kalan_ay, "min_kural": "SABIT_TAKSIT_GIDER",
-                "oncelik": 1, "sabit_taksit": sabit_taksit, "kalan_ay": kalan_ay, 
-                "faiz_aylik": 0, "kk_asgari_yuzdesi": 0, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
-            })
-        if faizli_anapara > 0:
-             borc_listesi.append({
-                "isim": f"{isim} (Dönem Borcu)", "tutar": faizli_anapara, "min_kural": "ASGARI_FAIZ", 
-                "oncelik": final_priority, "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": kk_asgari_yuzdesi,
-                "kalan_ay": 99999, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
-            })
-    
-    elif borc_tipi == "Ek Hesap (KMH)":
-        borc_listesi.append({
-            "isim": isim, "tutar": faizli_anapara, "min_kural": "FAIZ_ART_ANAPARA", "oncelik": final_priority,
-            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0.0, "zorunlu_anapara_yuzdesi": zorunlu_anapara_yuzdesi,
-            "kalan_ay": 99999, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
-        })
-
-    elif borc_tipi == "Kredi (Sabit Taksit)":
-        borc_listesi.append({
-            "isim": isim, "tutar": faizli_anapara, "min_kural": "SABIT_TAKSIT_ANAPARA", "oncelik": final_priority,
-            "sabit_taksit": sabit_taksit, "kalan_ay": kalan_ay,
-            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": 0.0
-        })
-        
-    elif borc_tipi == "Diğer Faizli Borç":
-        borc_listesi.append({
-            "isim": isim, "tutar": faizli_anapara, "min_kural": "FAIZ", "oncelik": final_priority,
-            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0, "kalan_ay": 99999, "limit": 0, "devam_etme_yuzdesi": 0.0
-        })
+    borc_listesi = borc_kalemleri_olustur(
+        isim, faizli_anapara, oncelik_str, borc_tipi, sabit_taksit, kalan_ay, faiz_aylik,
+        kk_asgari_yuzdesi, zorunlu_anapara_yuzdesi, kk_limit, devam_etme_yuzdesi,
+    )
 
     if borc_listesi:
         st.session_state.borclar.extend(borc_listesi)
@@ -118,10 +44,7 @@ def add_debt(isim, faizli_anapara, oncelik_str, borc_tipi, sabit_taksit, kalan_a
 
 
 def add_income(isim, tutar, baslangic_ay, artis_yuzdesi, tek_seferlik):
-    st.session_state.gelirler.append({
-        "isim": isim, "tutar": tutar, "baslangic_ay": baslangic_ay,
-        "artis_yuzdesi": artis_yuzdesi / 100.0, "tek_seferlik": tek_seferlik
-    })
+    st.session_state.gelirler.append(gelir_kalemi_olustur(isim, tutar, baslangic_ay, artis_yuzdesi, tek_seferlik))
     st.success(f"'{isim}' gelir kaynağı başarıyla eklendi.")
 
 # --- 3. Form Render Fonksiyonları ---
@@ -143,152 +66,57 @@ def display_and_manage_incomes():
     pass
 
 
-# --- 4. Simülasyon Motoru (simule_borc_planı) ---
-
-def simule_borc_planı(borclar_initial, gelirler_initial, **sim_params):
-    
-    if not borclar_initial or not gelirler_initial:
-        return None
-
-    mevcut_borclar = copy.deepcopy(borclar_initial)
-    mevcut_gelirler = copy.deepcopy(gelirler_initial)
-    
-    ay_sayisi = 0
-    mevcut_birikim = sim_params.get('baslangic_birikim', 0.0)
-    birikime_ayrilan = sim_params.get('aylik_zorunlu_birikim', 0.0)
-    faiz_carpani = sim_params.get('faiz_carpani', 1.0)
-    agresiflik_carpan = sim_params.get('agresiflik_carpan', 1.0)
-    birikim_artis_aylik = sim_params.get('birikim_artis_aylik', 0.0) / 12 / 100 
-    post_debt_birikim_oran = sim_params.get('post_debt_birikim_oran', 1.0) # YENİ PARAMETRE
-    
-    toplam_faiz_maliyeti = 0.0
-    baslangic_faizli_borc = sum(b['tutar'] for b in mevcut_borclar if b.get('min_kural') not in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER'])
-    
-    aylik_sonuclar = []
-    
-    while any(b['tutar'] > 1 for b in mevcut_borclar) or ay_sayisi < 1:
-        ay_sayisi += 1
-        ay_adi = f"Ay {ay_sayisi}"
-        
-        # 1. Gelir Hesaplama
-        toplam_gelir = 0.0
-        for gelir in mevcut_gelirler:
-            if ay_sayisi >= gelir['baslangic_ay']:
-                artis_carpan = (1 + gelir['artis_yuzdesi']) ** ((ay_sayisi - gelir['baslangic_ay']) / 12)
-                toplam_gelir += gelir['tutar'] * artis_carpan
-
-        # 2. Minimum Borç Ödemeleri ve Sabit Giderler
-        zorunlu_gider_toplam = birikime_ayrilan 
-        min_borc_odeme_toplam = 0.0
-        
-        for borc in mevcut_borclar:
-            if borc['tutar'] > 1 or borc['min_kural'] in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER']:
-                min_odeme = hesapla_min_odeme(borc, faiz_carpani)
-                
-                if borc['min_kural'] in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER']:
-                    zorunlu_gider_toplam += borc.get('sabit_taksit', 0)
-                else:
-                    min_borc_odeme_toplam += min_odeme
-
-        # 3. Ek Ödeme Gücü Hesaplama
-        kalan_nakit = toplam_gelir - zorunlu_gider_toplam - min_borc_odeme_toplam
-        saldırı_gucu = max(0, kalan_nakit * agresiflik_carpan)
-        
-        # --- BORÇ BİTİŞİ SONRASI YÖNETİMİ ---
-        faizli_borc_kaldi_mi = any(
-            b['tutar'] > 1 for b in mevcut_borclar 
-            if b.get('min_kural') not in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER']
-        )
-        
-        if not faizli_borc_kaldi_mi:
-            # Borçlar bittiğinde, Ek Ödeme Gücü'nü Post-Debt Stratejisine göre yönet
-            saldırı_gucu = max(0, kalan_nakit) # Agresiflik 1.0'a döner
-            
-            birikime_giden_pay = saldırı_gucu * post_debt_birikim_oran
-            harcamaya_giden_pay = saldırı_gucu * (1 - post_debt_birikim_oran)
-            
-            saldırı_gucu = birikime_giden_pay 
-            zorunlu_gider_toplam += harcamaya_giden_pay 
-            
-        # --- BORÇ BİTİŞİ SONRASI YÖNETİMİ BİTİŞİ ---
-
-        # 4. Borçlara Ödeme Uygulama (Faiz ve Min. Ödeme)
-        for borc in mevcut_borclar:
-            is_faizli_borc = borc.get('min_kural') not in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER']
-
-            if borc['tutar'] > 0 and is_faizli_borc:
-                etkilenen_faiz_orani = borc['faiz_aylik'] * faiz_carpani 
-                eklenen_faiz = borc['tutar'] * etkilenen_faiz_orani 
-                toplam_faiz_maliyeti += eklenen_faiz
-                
-                min_odeme = hesapla_min_odeme(borc, faiz_carpani)
-                
-                borc['tutar'] += eklenen_faiz 
-                borc['tutar'] -= min_odeme
-                
-                if borc['min_kural'] == 'SABIT_TAKSIT_ANAPARA' and borc['kalan_ay'] > 0:
-                     borc['kalan_ay'] -= 1
-        
-        # 5. Ek Ödeme Gücünü Uygulama (Önceliğe Göre Sıralama)
-        saldırı_kalan = saldırı_gucu
-
-        # Sıralama mantığı (Avalanche/Snowball/Kullanıcı Tanımlı)
-        if faizli_borc_kaldi_mi:
-             if sim_params['oncelik_stratejisi'] == 'Avalanche':
-                 mevcut_borclar.sort(key=lambda x: (x['faiz_aylik'], x['tutar']), reverse=True)
-             elif sim_params['oncelik_stratejisi'] == 'Snowball':
-                 mevcut_borclar.sort(key=lambda x: x['tutar'])
-             else:
-                 mevcut_borclar.sort(key=lambda x: x['oncelik'])
-
-        # Ek Ödemeyi Uygula
-        kapanan_borclar_listesi = []
-        for borc in mevcut_borclar:
-            is_ek_odemeye_acik = borc.get('min_kural') not in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER']
-            
-            if borc['tutar'] > 1 and saldırı_kalan > 0 and is_ek_odemeye_acik:
-                odecek_tutar = min(saldırı_kalan, borc['tutar'])
-                borc['tutar'] -= odecek_tutar
-                saldırı_kalan -= odecek_tutar
-                
-                if borc['tutar'] <= 1:
-                     kapanan_borclar_listesi.append(borc['isim'])
-                     borc['tutar'] = 0
-        
-        # 6. Kalan Ek Ödeme Gücünü Birikime Aktarma
-        mevcut_birikim += saldırı_kalan
-        mevcut_birikim *= (1 + birikim_artis_aylik)
-
-
-        # 7. Sonuçları Kaydetme
-        aylik_sonuclar.append({
-            'Ay': ay_adi, 'Toplam Gelir': round(toplam_gelir),
-            'Toplam Zorunlu Giderler': round(zorunlu_gider_toplam),
-            'Min. Borç Ödemeleri': round(min_borc_odeme_toplam),
-            'Ek Ödeme Gücü (Borca Giden)': round(saldırı_gucu),
-            'Aylık Birikim Katkısı': round(birikime_ayrilan + saldırı_kalan),
-            'Kapanan Borçlar': ", ".join(kapanan_borclar_listesi) if kapanan_borclar_listesi else '-',
-            'Kalan Faizli Borç Toplamı': round(sum(b['tutar'] for b in mevcut_borclar if b.get('min_kural') not in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER'])),
-            'Toplam Birikim': round(mevcut_birikim)
-        })
-
-        if ay_sayisi > 360: break
-            
-    return {
-        "df": pd.DataFrame(aylik_sonuclar), "ay_sayisi": ay_sayisi,
-        "toplam_faiz": round(toplam_faiz_maliyeti), "toplam_birikim": round(mevcut_birikim),
-        "baslangic_faizli_borc": round(baslangic_faizli_borc),
-    }
-
-
 # --- B. KULLANICI GİRİŞİ (AUTHENTICATION) MANTIĞI ---
 
+# İmzalı oturum anahtarının taşındığı çerez. Anahtar URL'de taşınmaz (tarayıcı geçmişi, vekil sunucu günlükleri,
+# Referer başlıkları ve paylaşılan bağlantılarla sızardı). Eski sürümlerin URL parametresi aynı adı kullanır.
+OTURUM_CEREZI = "oturum"
+# Bir sonraki çalıştırmada tarayıcıya yazılacak çerez değeri ('' = sil); '_' ile başladığı için kaydedilmez
+BEKLEYEN_CEREZ_ANAHTARI = '_bekleyen_oturum_cerezi'
+# Çıkışta sunucu tarafı geri alma başarısız olduysa giriş ekranında gösterilecek uyarı
+CIKIS_UYARISI_ANAHTARI = '_cikis_uyarisi'
+
+def write_session_cookie(token):
+    """Oturum çerezini tarayıcıya yazar (token boşsa siler).
+
+    Streamlit çerezleri yalnızca okuyabildiğinden (st.context.cookies) çerez, uygulamayla aynı kökenli görünmez
+    bir iframe içinden ana sayfaya yazılır; bu yüzden HttpOnly olamaz, SameSite=Strict ve HTTPS'te Secure'dur.
+    """
+    max_age = SESSION_TOKEN_TTL if token else 0
+    st.iframe(
+        f"""<script>
+        const d = window.parent.document, secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';
+        d.cookie = '{OTURUM_CEREZI}=' + encodeURIComponent({json.dumps(token or '')}) + '; Max-Age={max_age}; Path=/; SameSite=Strict' + secure;
+        </script>"""
+    ) # Yükseklik içeriğe göre: görünür bir şey çizilmez
+
+def flush_session_cookie():
+    """Giriş/çıkışta bırakılan çerez değişikliğini uygular (st.rerun öncesi çizilen bileşenler gönderilmez)."""
+    token = st.session_state.pop(BEKLEYEN_CEREZ_ANAHTARI, None)
+    if token is not None:
+        write_session_cookie(token)
+
+def restore_session_from_token():
+    """Çerezdeki imzalı oturum anahtarı geçerliyse girişi bcrypt'e gitmeden geri yükler."""
+    if OTURUM_CEREZI in st.query_params:
+        del st.query_params[OTURUM_CEREZI] # Eski sürümlerin URL'de bıraktığı anahtar adres çubuğundan kaldırılır
+    token = st.context.cookies.get(OTURUM_CEREZI)
+    if not token: return
+    user = verify_session_token(token)
+    if user:
+        st.session_state.logged_in = True
+        st.session_state.user_id = user
+    else:
+        write_session_cookie(None) # Süresi dolmuş, geri alınmış ya da geçersiz
+
 def render_login_screen():
     # ... (Login formunun kodu buraya taşınacak)
     st.title("💰 Finans Simülasyonu - Giriş")
     st.info("Lütfen giriş yapın veya yeni bir hesap oluşturun. Verileriniz size özel olarak saklanacaktır.")
     
     if 'register_mode' not in st.session_state: st.session_state.register_mode = False
+    cikis_uyarisi = st.session_state.pop(CIKIS_UYARISI_ANAHTARI, None)
+    if cikis_uyarisi: st.warning(cikis_uyarisi)
 
     if st.session_state.register_mode:
         st.subheader("Yeni Hesap Oluştur")
@@ -322,6 +150,9 @@ def render_login_screen():
                 if success:
                     st.session_state.logged_in = True
                     st.session_state.user_id = user
+                    # Sayfa yenilendiğinde şifre tekrar sorulmasın (bkz. restore_session_from_token)
+                    token = issue_session_token(user)
+                    if token: st.session_state[BEKLEYEN_CEREZ_ANAHTARI] = token
                     st.success(f"Hoş geldiniz, {user}!")
                     st.rerun()
                 else:
@@ -367,6 +198,51 @@ def initialize_session_state(username):
 
 # --- D. ANA UYGULAMA (MAİN SİMÜLASYON) ---
 
+def render_metrics_panel():
+    """METRICS_ENABLED açıkken oturumun performans ölçümlerini kenar çubuğunda gösterir."""
+    olcumler = st.session_state.get('_olcumler')
+    if olcumler is None: return
+
+    with st.sidebar.expander("🛠️ Performans Ölçümleri"):
+        satirlar = []
+        for s in olcumler.satirlar():
+            etiketler = ", ".join(f"{k}={v}" for k, v in s['etiketler'].items())
+            if s['tur'] == 'sayac':
+                satirlar.append({'Ölçüm': s['isim'], 'Etiketler': etiketler, 'Sayı': s['deger']})
+                continue
+            birim, carpan = ('ms', 1000) if s['tur'] == 'sure' else ('KB', 1 / 1024)
+            satirlar.append({
+                'Ölçüm': s['isim'], 'Etiketler': etiketler, 'Sayı': s['sayi'],
+                'Ortalama': f"{s['ortalama'] * carpan:,.2f} {birim}", 'En Büyük': f"{s['maks'] * carpan:,.2f} {birim}",
+            })
+        if satirlar:
+            st.dataframe(pd.DataFrame(satirlar), hide_index=True)
+        else:
+            st.caption("Henüz ölçüm yok.")
+
+        st.download_button("JSON İndir", json_olarak(olcumler), file_name="olcumler.json", mime="application/json")
+        st.download_button("Prometheus İndir", prometheus_olarak(olcumler), file_name="olcumler.prom", mime="text/plain")
+        if st.button("Ölçümleri Sıfırla", key='olcumleri_sifirla'):
+            olcumler.sifirla()
+            st.rerun()
+
+def render_save_conflict():
+    """Kayıtlı veri başka bir sekmede/oturumda değiştiyse kullanıcıya hangi halin kalacağını sordurur."""
+    if KAYIT_CAKISMASI_ANAHTARI not in st.session_state: return
+
+    st.sidebar.warning("Verileriniz başka bir sekmede ya da oturumda değiştirilmiş; değişiklikleriniz kaydedilmedi.")
+    if st.sidebar.button("Kayıtlı Veriyi Yükle"):
+        # Oturum girişteki gibi sıfırlanır; initialize_session_state kayıtlı hali yeniden yükler
+        korunan = {k: st.session_state[k] for k in ('logged_in', 'user_id', '_olcumler') if k in st.session_state}
+        st.session_state.clear()
+        st.session_state.update(korunan)
+        st.rerun()
+    if st.sidebar.button("Benim Değişikliklerimle Üzerine Yaz"):
+        if save_user_data(st.session_state.user_id, st.session_state, force=True):
+            st.rerun()
+        else:
+            st.sidebar.error("Veri kaydetme hatası.")
+
 def main_simulation_app():
     
     st.title(f"Merhaba, {st.session_state.user_id}! Kişisel Finans Planlama Aracınız")
@@ -377,31 +253,52 @@ def main_simulation_app():
     if st.sidebar.button("💾 Simülasyon Verilerini Kaydet", type='primary'):
         if save_user_data(st.session_state.user_id, st.session_state):
             st.sidebar.success("Verileriniz başarıyla kaydedildi!")
-        else:
+        elif KAYIT_CAKISMASI_ANAHTARI not in st.session_state:
             st.sidebar.error("Veri kaydetme hatası.")
 
+    render_save_conflict()
+
     if st.sidebar.button("🚪 Çıkış Yap"):
+        # Çerez silinse de kopyalanmış anahtarlar sunucu tarafında geçersiz kılınır
+        geri_alindi = revoke_session_tokens(st.session_state.user_id)
         st.session_state.clear()
         st.session_state.logged_in = False
         st.session_state.user_id = None
+        st.session_state[BEKLEYEN_CEREZ_ANAHTARI] = '' # Geri alma başarısız olsa da bu tarayıcıdaki çerez silinir
+        if not geri_alindi:
+            st.session_state[CIKIS_UYARISI_ANAHTARI] = (
+                "Çıkış yapıldı ancak oturum anahtarlarınız sunucuda geçersiz kılınamadı; başka cihazlarda "
+                "açık kalan oturumlar anahtarın süresi dolana kadar geçerli olabilir. Lütfen daha sonra tekrar "
+                "giriş yapıp çıkış yapın."
+            )
         st.rerun()
     
     st.markdown("---")
     
     # Eski App.py'deki tüm TAB'lar, Formlar ve Sonuçlar burada yer almalı
     # Bu kısım, önceki tam kodun içeriğidir. (Yer tutucu bırakıyorum)
+    # Sonuç sekmeleri motoru doğrudan değil sim_cache.onbellekli_simule üzerinden çağırmalıdır: girdiler
+    # değişmediyse sonuç süreç genelindeki önbellekten gelir.
     st.info("Eski kodun kalan kısmı (Tablar, Formlar ve Simülasyon Sonuçları) buraya yerleştirilmelidir.")
     # Örn: 
     # tab_basic, tab_advanced, tab_rules = st.tabs(["✨ Basit Planlama...", "🚀 Gelişmiş Planlama...", "⚙️ Yönetici Kuralları"])
     # ...
 
+    render_metrics_panel()
+
 # --- E. PROGRAM ANA AKIŞI ---
 
 if 'logged_in' not in st.session_state: st.session_state.logged_in = False
 if 'user_id' not in st.session_state: st.session_state.user_id = None
-
-if not st.session_state.logged_in:
-    render_login_screen()
-else:
-    initialize_session_state(st.session_state.user_id)
-    main_simulation_app()
+# Ölçümler oturuma özeldir; '_' ile başladığı için kaydedilmez
+if METRICS_ENABLED and '_olcumler' not in st.session_state: st.session_state._olcumler = Olcumler()
+
+with olcum_oturumu(st.session_state.get('_olcumler')), sure('uygulama.calistirma'):
+    flush_session_cookie()
+    if not st.session_state.logged_in:
+        restore_session_from_token()
+    if not st.session_state.logged_in:
+        render_login_screen()
+    else:
+        initialize_session_state(st.session_state.user_id)
+        main_simulation_app()
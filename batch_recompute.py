@@ -0,0 +1,179 @@
+# batch_recompute.py
+"""Tüm kullanıcıların simülasyon özetlerini arayüz olmadan yeniden hesaplayan toplu iş.
+
+Depo kökünden çalıştırılır:
+    python -m batch_recompute                          # tüm kullanıcılar, varsayılan parametreler
+    python -m batch_recompute --devam                  # kontrol noktasından kaldığı yerden sürdürür
+    python -m batch_recompute --parametreler '{"agresiflik_carpan": 0.5}'
+
+user_data satırları sunucu tarafı imleçle kullanıcı adı sırasıyla okunur, load_user_data ile aynı çözme
+mantığıyla işçi süreçlerde çözülüp simüle edilir ve özetler user_summary tablosuna parça parça toplu yazılır;
+borç ya da gelir kalmamış kullanıcıların eski özetleri silinir.
+Her yazılan parçadan sonra son kullanıcı adı kontrol noktası dosyasına kaydedilir (iş tamamlanınca silinir);
+bellek kullanımı kullanıcı sayısından bağımsızdır (imleç tamponu + işçi başına en fazla iki bekleyen parça).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import db_manager
+from sim_cache import girdi_ozeti
+
+# Kayıt sırasında yenilenen özetlerle aynı parametreler (bkz. db_manager.SUMMARY_SIM_PARAMS)
+VARSAYILAN_PARAMETRELER = db_manager.SUMMARY_SIM_PARAMS
+VARSAYILAN_KONTROL_NOKTASI = 'batch_recompute.checkpoint.json'
+# Simülasyon için çözülen oturum anahtarları; harcama tabloları gibi diğerleri hiç çözülmez
+SIMULASYON_ANAHTARLARI = ('borclar', 'gelirler')
+
+# --- 1. İşçi Tarafı ---
+
+def _parca_hesapla(satirlar, sim_params):
+    """Bir parça user_data satırını çözer ve simüle eder; satır başına (username, özet satırı ya da None, hata) döner."""
+    sonuclar = []
+    for username, data, snapshot in satirlar:
+        try:
+            cozulen = db_manager.decode_user_row(data, snapshot, SIMULASYON_ANAHTARLARI)
+            durum = cozulen[0] if cozulen else {}
+            borclar, gelirler = durum.get('borclar') or [], durum.get('gelirler') or []
+            # Borç ya da gelir girilmemişse satır None döner: varsa eski özet silinir
+            sonuclar.append((username, db_manager.summary_row(username, borclar, gelirler, sim_params), None))
+        except Exception as e:
+            sonuclar.append((username, None, f"{type(e).__name__}: {e}"))
+    return sonuclar
+
+# --- 2. Kontrol Noktası ---
+
+def kontrol_noktasi_oku(dosya):
+    if not os.path.exists(dosya):
+        return None
+    with open(dosya, encoding='utf-8') as f:
+        return json.load(f)
+
+def kontrol_noktasi_yaz(dosya, durum):
+    """Yarım yazılmış dosya kalmasın diye önce geçici dosyaya yazılıp yerine taşınır."""
+    gecici = dosya + '.tmp'
+    with open(gecici, 'w', encoding='utf-8') as f:
+        json.dump(durum, f, ensure_ascii=False, indent=2)
+    os.replace(gecici, dosya)
+
+# --- 3. Toplu Hesaplama ---
+
+def _rapor(durum, baslangic, cikti, son=False):
+    gecen = max(time.perf_counter() - baslangic, 1e-9)
+    print(
+        f"{'Bitti' if son else 'İlerleme'}: {durum['islenen']} satır ({durum['islenen'] / gecen:.1f}/sn), "
+        f"{durum['yazilan']} özet yazıldı, {durum['atlanan']} boş, {durum['hatali']} hatalı, "
+        f"son kullanıcı '{durum['son_kullanici']}', {gecen:.1f} sn",
+        file=cikti
+    )
+
+def toplu_hesapla(sim_params=None, isci_sayisi=None, parca_boyutu=200, itersize=1000,
+                  kontrol_noktasi=VARSAYILAN_KONTROL_NOKTASI, devam=False, rapor_araligi=10.0, cikti=sys.stderr):
+    """Tüm kullanıcıların özetlerini yeniden hesaplar ve user_summary'ye yazar; son durum sözlüğünü döndürür.
+
+    devam=True ise kontrol noktasındaki son kullanıcıdan sonrası işlenir (parametreler farklıysa baştan
+    başlanır). Satırlar parca_boyutu'luk parçalar halinde işçilere dağıtılır; parçalar okunma sırasıyla
+    tamamlanıp yazıldığından kontrol noktasından önceki her kullanıcı yazılmış demektir.
+    """
+    sim_params = {**VARSAYILAN_PARAMETRELER, **(sim_params or {})}
+    isci_sayisi = isci_sayisi or os.cpu_count() or 1
+    parametre_ozeti = girdi_ozeti([], [], sim_params)
+
+    durum = {'son_kullanici': '', 'islenen': 0, 'yazilan': 0, 'atlanan': 0, 'hatali': 0, 'parametre_ozeti': parametre_ozeti}
+    onceki = kontrol_noktasi_oku(kontrol_noktasi) if devam and kontrol_noktasi else None
+    if onceki and onceki.get('parametre_ozeti') == parametre_ozeti:
+        durum.update(onceki)
+        print(f"Kontrol noktasından devam: '{durum['son_kullanici']}' sonrası", file=cikti)
+    elif onceki:
+        print("Kontrol noktası farklı parametrelerle yazılmış; baştan başlanıyor.", file=cikti)
+
+    okuma = db_manager.get_db_connection()
+    yazma = db_manager.get_db_connection()
+    if okuma is None or yazma is None:
+        db_manager.release_db_connection(okuma)
+        db_manager.release_db_connection(yazma)
+        raise RuntimeError("Veritabanı bağlantısı kurulamadı.")
+
+    baslangic = son_rapor = time.perf_counter()
+    islenen_baslangic = durum['islenen']
+
+    def tamamla(gelecek):
+        nonlocal son_rapor
+        sonuclar = gelecek.result()
+        satirlar = [satir for _, satir, _ in sonuclar if satir is not None]
+        # Girdileri boşalan kullanıcıların eski özetleri silinir; hatalı satırların özetine dokunulmaz
+        bos = [username for username, satir, hata in sonuclar if satir is None and hata is None]
+        db_manager.upsert_user_summaries(yazma, satirlar, deleted=bos)
+        for username, satir, hata in sonuclar:
+            if hata is not None:
+                durum['hatali'] += 1
+                print(f"  {username}: {hata}", file=cikti)
+            elif satir is None:
+                durum['atlanan'] += 1
+        durum['islenen'] += len(sonuclar)
+        durum['yazilan'] += len(satirlar)
+        durum['son_kullanici'] = sonuclar[-1][0]
+        if kontrol_noktasi:
+            kontrol_noktasi_yaz(kontrol_noktasi, durum)
+        if time.perf_counter() - son_rapor >= rapor_araligi:
+            _rapor(durum, baslangic, cikti)
+            son_rapor = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=isci_sayisi) as havuz:
+            bekleyen = deque()
+            parca = []
+            for satir in db_manager.iter_user_data_rows(okuma, durum['son_kullanici'], itersize):
+                parca.append(satir)
+                if len(parca) < parca_boyutu:
+                    continue
+                bekleyen.append(havuz.submit(_parca_hesapla, parca, sim_params))
+                parca = []
+                while len(bekleyen) >= 2 * isci_sayisi:
+                    tamamla(bekleyen.popleft())
+            if parca:
+                bekleyen.append(havuz.submit(_parca_hesapla, parca, sim_params))
+            while bekleyen:
+                tamamla(bekleyen.popleft())
+    finally:
+        db_manager.release_db_connection(okuma)
+        db_manager.release_db_connection(yazma)
+
+    if kontrol_noktasi and os.path.exists(kontrol_noktasi):
+        os.remove(kontrol_noktasi) # Tamamlanan iş: sonraki --devam baştan başlar
+    gecen = time.perf_counter() - baslangic
+    durum['sure_sn'] = round(gecen, 3)
+    durum['satir_sn'] = round((durum['islenen'] - islenen_baslangic) / max(gecen, 1e-9), 1)
+    _rapor(durum, baslangic, cikti, son=True)
+    return durum
+
+# --- 4. Komut Satırı ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tüm kullanıcıların simülasyon özetlerini yeniden hesaplar")
+    parser.add_argument('--parametreler', default='{}', help="Varsayılanların üzerine yazılacak sim_params (JSON)")
+    parser.add_argument('--isci', type=int, default=None, help="İşçi süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--parca', type=int, default=200, help="İşçiye bir seferde gönderilen satır sayısı")
+    parser.add_argument('--itersize', type=int, default=1000, help="Sunucu tarafı imleçten bir seferde çekilen satır")
+    parser.add_argument('--kontrol-noktasi', default=VARSAYILAN_KONTROL_NOKTASI)
+    parser.add_argument('--devam', action='store_true', help="Kontrol noktasından sürdür")
+    parser.add_argument('--rapor-araligi', type=float, default=10.0, help="İlerleme raporu aralığı (sn)")
+    args = parser.parse_args(argv)
+
+    try:
+        durum = toplu_hesapla(
+            json.loads(args.parametreler), args.isci, args.parca, args.itersize,
+            args.kontrol_noktasi, args.devam, args.rapor_araligi,
+        )
+    finally:
+        db_manager.close_db_pool()
+    print(json.dumps(durum, ensure_ascii=False))
+    return 1 if durum['hatali'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
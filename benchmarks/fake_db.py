@@ -0,0 +1,161 @@
+# benchmarks/fake_db.py
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import db_manager
+
+# --- SAHTE VERİTABANI BAĞLANTISI ---
+# save_user_data / load_user_data'nın çalıştırdığı user_data sorgularını bellekte karşılar; ölçülen süre
+# yalnızca serileştirme ve sorgu hazırlığıdır. Sürüm denetimleri (okuma önbelleği, iyimser eşzamanlılık) gerçek
+# tablodaki gibi uygulanır; BYTEA psycopg2 gibi memoryview olarak döner. Kayıtla yenilenen user_summary satırları
+# ve giriş sorguları için users tablosu da ayrı sözlüklerde tutulur. Yük testinde sorgu başına gecikme ve havuz
+# boyutu verilerek ağ/sunucu süresi ve bağlantı beklemesi yaklaşık olarak canlandırılabilir.
+
+class SahteImlec:
+    def __init__(self, baglanti):
+        self.baglanti = baglanti
+        self.rowcount = -1
+        self._sonuc = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sorgu, parametreler=()):
+        self.baglanti.sorgu_sayisi += 1
+        if self.baglanti.gecikme:
+            time.sleep(self.baglanti.gecikme) # Gerçek sorgu gibi GIL'i bırakarak bekler
+        tablo = self.baglanti.user_data
+        sorgu = " ".join(sorgu.split())
+        parametreler = [getattr(p, 'adapted', p) for p in parametreler] # psycopg2.Binary -> bayt
+
+        if sorgu.startswith("SELECT version, CASE WHEN version = %s THEN NULL ELSE data::text END"):
+            onbellekteki, _, kullanici = parametreler
+            satir = tablo.get(kullanici)
+            if satir is None:
+                self._sonuc = []
+            elif satir['version'] == onbellekteki: # Önbellek geçerli: yalnızca sürüm döner
+                self._sonuc = [(satir['version'], None, None)]
+            else:
+                self._sonuc = [(
+                    satir['version'], satir['data'],
+                    memoryview(satir['snapshot'] + (satir['snapshot_patch'] or b'')) if satir['snapshot'] is not None else None,
+                )]
+        elif sorgu.startswith("SELECT version, content_hash FROM user_data"):
+            satir = tablo.get(parametreler[0])
+            self._sonuc = [] if satir is None else [(satir['version'], satir['content_hash'])]
+        elif sorgu.startswith("INSERT INTO user_data (username, data, snapshot, version, content_hash, updated_at)"):
+            kullanici, data, snapshot, ozet, zorla, surum = parametreler
+            satir = tablo.get(kullanici)
+            if satir is None:
+                satir = tablo[kullanici] = {'version': 0}
+            elif not zorla and satir['version'] != surum:
+                self._sonuc = []
+                return
+            satir.update(
+                data=data,
+                snapshot=bytes(snapshot) if snapshot is not None else None, snapshot_patch=None,
+                version=satir['version'] + 1, content_hash=ozet,
+            )
+            self._sonuc = [(satir['version'],)]
+        elif sorgu.startswith("UPDATE user_data SET snapshot_patch ="):
+            yama, ozet, kullanici, surum, yama_boyutu, oran = parametreler
+            satir = tablo.get(kullanici)
+            if satir is None or satir['version'] != surum or satir['snapshot'] is None:
+                self._sonuc = []
+                return
+            yamalar = satir['snapshot_patch'] or b''
+            if len(yamalar) + yama_boyutu > len(satir['snapshot']) * oran:
+                self._sonuc = []
+                return
+            satir.update(snapshot_patch=yamalar + bytes(yama), version=satir['version'] + 1, content_hash=ozet)
+            self._sonuc = [(satir['version'],)]
+        elif sorgu.startswith("UPDATE user_data SET data ="):
+            silinen, degisen, ozet, kullanici, surum = parametreler
+            satir = tablo.get(kullanici)
+            if satir is None or satir['version'] != surum or satir['data'] is None:
+                self._sonuc = []
+                return
+            belge = {k: v for k, v in json.loads(satir['data'] or '{}').items() if k not in silinen}
+            belge.update(json.loads(degisen))
+            satir.update(data=json.dumps(belge), snapshot=None, snapshot_patch=None, version=satir['version'] + 1, content_hash=ozet)
+            self._sonuc = [(satir['version'],)]
+        elif sorgu.startswith("SELECT hashed_password FROM users"):
+            sifre = self.baglanti.users.get(parametreler[0])
+            self._sonuc = [] if sifre is None else [(sifre,)]
+        elif sorgu.startswith("SELECT token_version FROM users"):
+            kullanici = parametreler[0]
+            self._sonuc = [(self.baglanti.token_surumleri.get(kullanici, 0),)] if kullanici in self.baglanti.users else []
+        elif sorgu.startswith("UPDATE users SET token_version"):
+            kullanici = parametreler[0]
+            if kullanici in self.baglanti.users:
+                self.baglanti.token_surumleri[kullanici] = self.baglanti.token_surumleri.get(kullanici, 0) + 1
+            self._sonuc = []
+        elif sorgu.startswith("INSERT INTO users (username, hashed_password)"):
+            self.baglanti.users[parametreler[0]] = parametreler[1]
+            self._sonuc = []
+        elif sorgu.startswith("UPDATE users SET hashed_password"):
+            yeni, kullanici, eski = parametreler
+            if self.baglanti.users.get(kullanici) == eski:
+                self.baglanti.users[kullanici] = yeni
+            self._sonuc = []
+        elif sorgu.startswith("INSERT INTO user_summary"):
+            self.baglanti.user_summary[parametreler[0]] = tuple(parametreler)
+            self._sonuc = []
+        elif sorgu.startswith("DELETE FROM user_summary"):
+            self.baglanti.user_summary.pop(parametreler[0], None)
+            self._sonuc = []
+        else:
+            raise NotImplementedError(f"Sahte bağlantı bu sorguyu desteklemiyor: {sorgu[:60]}")
+
+    def fetchone(self):
+        return self._sonuc[0] if self._sonuc else None
+
+    def fetchall(self):
+        return list(self._sonuc)
+
+class SahteBaglanti:
+    """user_data tablosunu sözlükte tutan, psycopg2 bağlantısı yerine geçen nesne; gecikme_ms her sorguya eklenir."""
+
+    def __init__(self, gecikme_ms=0.0):
+        self.user_data = {} # username -> {'data': JSON metni, 'snapshot': bayt, 'snapshot_patch': bayt, 'version': ..., 'content_hash': ...}
+        self.user_summary = {} # username -> user_summary satırı
+        self.users = {} # username -> hashed_password
+        self.token_surumleri = {} # username -> token_version (yoksa 0)
+        self.gecikme = gecikme_ms / 1000
+        self.sorgu_sayisi = 0
+
+    def cursor(self):
+        return SahteImlec(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+@contextmanager
+def sahte_veritabani(baglanti=None, havuz_boyutu=None):
+    """db_manager'ın bağlantı havuzunu geçici olarak sahte bağlantıyla değiştirir.
+
+    havuz_boyutu verilirse aynı anda en fazla o kadar bağlantı verilir; gerçek havuz gibi DB_POOL_TIMEOUT
+    boyunca boş bağlantı beklenir, sonra None döner.
+    """
+    baglanti = baglanti or SahteBaglanti()
+    eski = db_manager.get_db_connection, db_manager.release_db_connection
+    if havuz_boyutu is None:
+        db_manager.get_db_connection = lambda: baglanti
+        db_manager.release_db_connection = lambda conn: None
+    else:
+        yuvalar = threading.BoundedSemaphore(havuz_boyutu)
+        db_manager.get_db_connection = lambda: baglanti if yuvalar.acquire(timeout=db_manager.DB_POOL_TIMEOUT) else None
+        db_manager.release_db_connection = lambda conn: yuvalar.release() if conn is not None else None
+    try:
+        yield baglanti
+    finally:
+        db_manager.get_db_connection, db_manager.release_db_connection = eski
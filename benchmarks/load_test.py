@@ -0,0 +1,256 @@
+# benchmarks/load_test.py
+"""Giriş → yükleme → simülasyon → kayıt yolu için eşzamanlı kullanıcı yük testi.
+
+Depo kökünden çalıştırılır:
+    python -m benchmarks.load_test                                   # bellek içi sahte veritabanı
+    python -m benchmarks.load_test --kullanicilar 1,10,50 --sure 30 --dusunme 1.0
+    python -m benchmarks.load_test --hedef postgres                  # DB_* ortam değişkenlerindeki sunucu
+
+Her eşzamanlılık düzeyinde N sanal kullanıcı kendi iş parçacığında döngüyle authenticate_user,
+load_user_data, simule_borc_planı ve save_user_data çağırır; adımlar arasında ortalaması --dusunme olan
+üstel dağılımlı düşünme süresi beklenir. Kullanıcı kaydetmeden önce bir gelirini değiştirir, böylece her kayıt
+gerçekten yazılır (özet yenilemesi dahil). Düzey başına her adımın p50/p95/p99 gecikmesi, saniyedeki başarılı
+işlem sayısı ve hata oranı raporlanır; 'oturum' satırı düşünme süreleri hariç uçtan uca süredir. Bir adım hata
+verirse oturumun kalan adımları atlanır; hata varsa çıkış kodu 1'dir.
+
+'bellek' hedefi benchmarks.fake_db'yi kullanır: --sorgu-gecikmesi ile sorgu başına ağ/sunucu süresi eklenir ve
+bağlantılar DB_POOL_MAX ile sınırlanır. 'postgres' hedefinde tablolar gerekirse oluşturulur ve yük_ önekli
+kullanıcılar eklenir; Postgres'i yerelde bir konteynerde çalıştırmak yeterlidir, örn.:
+    docker run --rm -e POSTGRES_PASSWORD=pw -p 5432:5432 postgres:16
+    DB_HOST=localhost DB_NAME=postgres DB_USER=postgres DB_PASS=pw python -m benchmarks.load_test --hedef postgres
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+import db_manager
+from sim_core import simule_borc_planı
+from sim_engine import simule_borc_planı_np
+from benchmarks.fake_db import SahteBaglanti, sahte_veritabani
+from benchmarks.portfolios import OTURUM_BOYUTLARI, VARSAYILAN_PARAMETRELER, oturum_durumu
+
+ASAMALAR = ['giris', 'yukle', 'simule', 'kaydet']
+MOTORLAR = {'dict': simule_borc_planı, 'np': simule_borc_planı_np}
+KULLANICI_ONEKI = 'yuk_'
+SIFRE = 'yuk-testi-sifre'
+ISINMA_SURESI = 0.5 # sn
+
+# --- 1. Hazırlık ---
+
+def kullanici_adi(i):
+    return f"{KULLANICI_ONEKI}{i:05d}"
+
+def kullanicilari_hazirla(sayi, boyut, baglanti=None):
+    """sayi kadar yük testi kullanıcısını (aynı şifre hash'iyle) ekler ve her birine boyut'ta bir oturum kaydeder.
+
+    baglanti verilirse kullanıcılar sahte veritabanına, verilmezse gerçek users tablosuna yazılır.
+    """
+    hashed_password = db_manager.hash_password(SIFRE) # bcrypt maliyeti kullanıcı başına değil bir kez ödenir
+    adlar = [kullanici_adi(i) for i in range(sayi)]
+    if baglanti is not None:
+        baglanti.users.update(dict.fromkeys(adlar, hashed_password))
+    else:
+        conn = db_manager.get_db_connection()
+        if conn is None:
+            raise RuntimeError("Veritabanı bağlantısı kurulamadı.")
+        try:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO users (username, hashed_password) VALUES (%s, %s) "
+                    "ON CONFLICT (username) DO UPDATE SET hashed_password = EXCLUDED.hashed_password",
+                    [(ad, hashed_password) for ad in adlar]
+                )
+            conn.commit()
+        finally:
+            db_manager.release_db_connection(conn)
+    for i, ad in enumerate(adlar):
+        if not db_manager.save_user_data(ad, oturum_durumu(boyut, tohum=i), force=True):
+            raise RuntimeError(f"Başlangıç verisi kaydedilemedi: {ad}")
+    return adlar
+
+# --- 2. Sanal Kullanıcı ---
+
+class Kayitci:
+    """Adım gecikmelerini ve hatalarını iş parçacıkları arasında toplar."""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self.gecikmeler = {asama: [] for asama in ASAMALAR + ['oturum']}
+        self.hatalar = {asama: Counter() for asama in ASAMALAR}
+
+    def ekle(self, asama, saniye, hata=None):
+        with self._kilit:
+            if hata is None:
+                self.gecikmeler[asama].append(saniye)
+            else:
+                self.hatalar[asama][hata] += 1
+
+def _adim(kayitci, asama, fonk):
+    """fonk'u ölçer; (başarılı mı, dönüş) döner. Yanlış değerli dönüş ya da istisna hata sayılır."""
+    t0 = time.perf_counter()
+    try:
+        sonuc = fonk()
+    except Exception as e:
+        kayitci.ekle(asama, None, type(e).__name__)
+        return False, None
+    gecen = time.perf_counter() - t0
+    hata = _hata_metni(asama, sonuc)
+    kayitci.ekle(asama, gecen, hata)
+    return hata is None, sonuc
+
+def _hata_metni(asama, sonuc):
+    if asama == 'giris':
+        return None if sonuc[0] else sonuc[1]
+    if sonuc is None or sonuc is False:
+        return 'kayıt çakışması ya da veritabanı hatası' if asama == 'kaydet' else 'sonuç yok'
+    return None
+
+def sanal_kullanici(username, kayitci, bitis, dusunme, motor, tohum):
+    """bitis zamanına kadar giriş → yükleme → simülasyon → kayıt oturumlarını tekrarlar."""
+    rng = random.Random(tohum)
+
+    def bekle():
+        if dusunme > 0:
+            time.sleep(min(rng.expovariate(1 / dusunme), max(0.0, bitis - time.perf_counter())))
+
+    bekle() # Kullanıcılar aynı anda başlamasın
+    while time.perf_counter() < bitis:
+        oturum_suresi = 0.0
+        t0 = time.perf_counter()
+        tamam, _ = _adim(kayitci, 'giris', lambda: db_manager.authenticate_user(username, SIFRE))
+        oturum_suresi += time.perf_counter() - t0
+        if tamam:
+            bekle()
+            t0 = time.perf_counter()
+            tamam, durum = _adim(kayitci, 'yukle', lambda: db_manager.load_user_data(username))
+            oturum_suresi += time.perf_counter() - t0
+        if tamam:
+            bekle()
+            # Kullanıcı bir gelirini düzenleyip planı yeniden hesaplatır
+            gelir = durum['gelirler'][0]
+            gelir['tutar'] = round(gelir['tutar'] * rng.uniform(0.95, 1.05), 2)
+            t0 = time.perf_counter()
+            tamam, _ = _adim(kayitci, 'simule', lambda: motor(durum['borclar'], durum['gelirler'], **VARSAYILAN_PARAMETRELER))
+            oturum_suresi += time.perf_counter() - t0
+        if tamam:
+            bekle()
+            t0 = time.perf_counter()
+            tamam, _ = _adim(kayitci, 'kaydet', lambda: db_manager.save_user_data(username, durum))
+            oturum_suresi += time.perf_counter() - t0
+        if tamam:
+            kayitci.ekle('oturum', oturum_suresi)
+        bekle()
+
+# --- 3. Yük Düzeyleri ---
+
+def duzey_calistir(kullanicilar, sure, dusunme, motor, tohum=0):
+    """Verilen kullanıcılarla sure saniyelik bir düzey çalıştırır; adım başına sonuç sözlüğü döndürür."""
+    kayitci = Kayitci()
+    bitis = time.perf_counter() + sure
+    baslangic = time.perf_counter()
+    is_parcaciklari = [
+        threading.Thread(target=sanal_kullanici, args=(ad, kayitci, bitis, dusunme, motor, f"{tohum}-{ad}"), daemon=True)
+        for ad in kullanicilar
+    ]
+    for t in is_parcaciklari:
+        t.start()
+    for t in is_parcaciklari:
+        t.join()
+    gecen = time.perf_counter() - baslangic # Süre dolduktan sonra biten oturumlar da dahil
+    return {asama: _ozetle(kayitci.gecikmeler[asama], kayitci.hatalar.get(asama, Counter()), gecen)
+            for asama in ASAMALAR + ['oturum']}
+
+def _ozetle(gecikmeler, hatalar, gecen):
+    hata = sum(hatalar.values())
+    toplam = len(gecikmeler) + hata
+    sonuc = {
+        'islem': toplam, 'hata': hata, 'hata_orani': round(hata / toplam, 4) if toplam else 0.0,
+        'islem_sn': round(len(gecikmeler) / gecen, 2), 'p50_ms': None, 'p95_ms': None, 'p99_ms': None,
+        'hata_turleri': dict(hatalar.most_common(3)),
+    }
+    if gecikmeler:
+        p50, p95, p99 = np.percentile(np.array(gecikmeler) * 1000, [50, 95, 99])
+        sonuc.update(p50_ms=round(float(p50), 3), p95_ms=round(float(p95), 3), p99_ms=round(float(p99), 3))
+    return sonuc
+
+def yuk_testi(duzeyler, sure, dusunme, boyut='orta', motor=simule_borc_planı, hedef='bellek', sorgu_gecikmesi=1.0,
+              cikti=sys.stderr):
+    """Her eşzamanlılık düzeyini sırayla çalıştırır; {düzey: {adım: sonuç}} döndürür.
+
+    Tüm düzeyler aynı kullanıcıları kullanır (en büyük düzey kadar kullanıcı hazırlanır); ilk düzeyden önce
+    içe aktarmalar ve önbellekler tek kullanıcılık, düşünme süresiz kısa bir turla ısıtılır.
+    """
+    baglanti = SahteBaglanti(sorgu_gecikmesi) if hedef == 'bellek' else None
+    baglam = sahte_veritabani(baglanti, havuz_boyutu=db_manager.DB_POOL_MAX) if baglanti is not None else nullcontext()
+    sonuclar = {}
+    with baglam:
+        if baglanti is None:
+            ok, mesaj = db_manager.create_tables()
+            if not ok:
+                raise RuntimeError(mesaj)
+        print(f"{max(duzeyler)} kullanıcı hazırlanıyor ({boyut})...", file=cikti)
+        adlar = kullanicilari_hazirla(max(duzeyler), boyut, baglanti)
+        duzey_calistir(adlar[:1], ISINMA_SURESI, 0.0, motor)
+        for n in duzeyler:
+            print(f"  {n} kullanıcı, {sure:g} sn...", file=cikti)
+            sonuclar[n] = duzey_calistir(adlar[:n], sure, dusunme, motor, tohum=n)
+    return sonuclar
+
+# --- 4. Komut Satırı ---
+
+def _tablo_yazdir(sonuclar):
+    satirlar = []
+    for n, asamalar in sonuclar.items():
+        for asama, s in asamalar.items():
+            satirlar.append({
+                'Kullanıcı': n, 'Adım': asama, 'İşlem': s['islem'], 'İşlem/sn': s['islem_sn'],
+                'p50 (ms)': s['p50_ms'], 'p95 (ms)': s['p95_ms'], 'p99 (ms)': s['p99_ms'],
+                'Hata %': round(s['hata_orani'] * 100, 2),
+                'Hatalar': "; ".join(f"{k} ({v})" for k, v in s['hata_turleri'].items()),
+            })
+    print(pd.DataFrame(satirlar).to_string(index=False))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eşzamanlı kullanıcı yük testi (giriş → yükleme → simülasyon → kayıt)")
+    parser.add_argument('--kullanicilar', default='1,5,10,25,50', help="Virgülle ayrılmış eşzamanlılık düzeyleri")
+    parser.add_argument('--sure', type=float, default=10.0, help="Düzey başına süre (sn)")
+    parser.add_argument('--dusunme', type=float, default=0.5, help="Adımlar arası ortalama düşünme süresi (sn)")
+    parser.add_argument('--boyut', choices=list(OTURUM_BOYUTLARI), default='orta', help="Kullanıcı başına oturum boyutu")
+    parser.add_argument('--motor', choices=list(MOTORLAR), default='dict', help="Simülasyon motoru")
+    parser.add_argument('--hedef', choices=['bellek', 'postgres'], default='bellek')
+    parser.add_argument('--sorgu-gecikmesi', type=float, default=1.0, help="'bellek' hedefinde sorgu başına gecikme (ms)")
+    parser.add_argument('--json', dest='json_cikti', help="Sonuçları ayrıca bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    duzeyler = sorted({int(n) for n in args.kullanicilar.split(',')})
+    print(
+        f"Havuz: DB_POOL_MAX={db_manager.DB_POOL_MAX}, BCRYPT_WORKERS={db_manager.BCRYPT_WORKERS}, "
+        f"BCRYPT_ROUNDS={db_manager.BCRYPT_ROUNDS}", file=sys.stderr
+    )
+    try:
+        sonuclar = yuk_testi(
+            duzeyler, args.sure, args.dusunme, args.boyut, MOTORLAR[args.motor], args.hedef, args.sorgu_gecikmesi,
+        )
+    finally:
+        if args.hedef == 'postgres':
+            db_manager.close_db_pool()
+    _tablo_yazdir(sonuclar)
+
+    if args.json_cikti:
+        ayarlar = {k: v for k, v in vars(args).items() if k != 'json_cikti'}
+        with open(args.json_cikti, 'w', encoding='utf-8') as f:
+            json.dump({'ayarlar': ayarlar, 'sonuclar': sonuclar}, f, ensure_ascii=False, indent=2)
+    hatali = any(s['hata'] for asamalar in sonuclar.values() for s in asamalar.values())
+    return 1 if hatali else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# benchmarks/portfolios.py
+
+import random
+import pandas as pd
+
+# --- SENTETİK PORTFÖYLER ---
+# Borçlar add_debt'in ürettiği sözlüklerle aynı biçimdedir. Kurallar sırayla dağıtılır; 6 ve üzeri borçlu
+# portföylerde her min_kural türü bulunur. Aynı tohum her zaman aynı portföyü üretir.
+
+KURAL_SIRASI = ['ASGARI_FAIZ', 'SABIT_TAKSIT_ANAPARA', 'FAIZ_ART_ANAPARA', 'SABIT_GIDER', 'FAIZ', 'SABIT_TAKSIT_GIDER']
+
+# (borç sayısı, gelir sayısı)
+PORTFOY_BOYUTLARI = [(1, 1), (10, 5), (50, 10), (200, 20)]
+
+VARSAYILAN_PARAMETRELER = {
+    'baslangic_birikim': 10000.0, 'aylik_zorunlu_birikim': 2000.0, 'faiz_carpani': 1.0,
+    'agresiflik_carpan': 1.0, 'birikim_artis_aylik': 30.0, 'post_debt_birikim_oran': 1.0,
+    'oncelik_stratejisi': 'Avalanche',
+}
+
+def _borc(rng, sira_no, kural):
+    isim = f"Borç {sira_no}"
+    oncelik = 1000 + sira_no
+    if kural == 'SABIT_GIDER':
+        return {
+            "isim": isim, "tutar": 0, "min_kural": kural, "oncelik": 1,
+            "sabit_taksit": rng.choice([2000, 5000, 8000]), "kalan_ay": rng.choice([12, 99999]),
+            "faiz_aylik": 0, "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": 0.0,
+        }
+    if kural == 'SABIT_TAKSIT_GIDER':
+        taksit, kalan_ay = rng.choice([500, 1500, 3000]), rng.choice([3, 6, 12])
+        return {
+            "isim": f"{isim} (Taksitler)", "tutar": taksit * kalan_ay, "min_kural": kural, "oncelik": 1,
+            "sabit_taksit": taksit, "kalan_ay": kalan_ay, "faiz_aylik": 0, "kk_asgari_yuzdesi": 0,
+            "limit": 50000, "devam_etme_yuzdesi": 0.0,
+        }
+    if kural == 'ASGARI_FAIZ':
+        return {
+            "isim": f"{isim} (Dönem Borcu)", "tutar": rng.choice([5000, 20000, 45000]), "min_kural": kural,
+            "oncelik": oncelik, "faiz_aylik": rng.choice([0.0366, 0.0396]), "kk_asgari_yuzdesi": rng.choice([0.2, 0.4]),
+            "kalan_ay": 99999, "limit": 50000, "devam_etme_yuzdesi": 0.0,
+        }
+    if kural == 'FAIZ_ART_ANAPARA':
+        return {
+            "isim": isim, "tutar": rng.choice([3000, 15000]), "min_kural": kural, "oncelik": oncelik,
+            "faiz_aylik": 0.05, "kk_asgari_yuzdesi": 0.0, "zorunlu_anapara_yuzdesi": rng.choice([0.0, 0.05, 0.1]),
+            "kalan_ay": 99999, "limit": 20000, "devam_etme_yuzdesi": 0.0,
+        }
+    if kural == 'SABIT_TAKSIT_ANAPARA':
+        return {
+            "isim": isim, "tutar": rng.choice([50000, 120000]), "min_kural": kural, "oncelik": oncelik,
+            "sabit_taksit": rng.choice([3000, 6000]), "kalan_ay": 36, "faiz_aylik": rng.choice([0.0, 0.02, 0.035]),
+            "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": 0.0,
+        }
+    return {
+        "isim": isim, "tutar": rng.choice([8000, 30000]), "min_kural": 'FAIZ', "oncelik": oncelik,
+        "faiz_aylik": rng.choice([0.02, 0.04]), "kk_asgari_yuzdesi": 0, "kalan_ay": 99999, "limit": 0,
+        "devam_etme_yuzdesi": 0.0,
+    }
+
+def borc_portfoyu(borc_sayisi, tohum=0):
+    """borc_sayisi kadar borç/gider üretir; kurallar KURAL_SIRASI ile dönüşümlü atanır."""
+    rng = random.Random(f"borc-{borc_sayisi}-{tohum}")
+    return [_borc(rng, i + 1, KURAL_SIRASI[i % len(KURAL_SIRASI)]) for i in range(borc_sayisi)]
+
+def gelir_portfoyu(gelir_sayisi, tohum=0):
+    """Toplamı borç sayısından bağımsız olarak makul bir hane gelirine denk gelen gelir listesi üretir."""
+    rng = random.Random(f"gelir-{gelir_sayisi}-{tohum}")
+    gelirler = []
+    for i in range(gelir_sayisi):
+        gelirler.append({
+            "isim": f"Gelir {i + 1}", "tutar": round(rng.uniform(60000, 120000) / gelir_sayisi, 2),
+            "baslangic_ay": 1 if i == 0 else rng.choice([1, 1, 3, 12, 24]),
+            "artis_yuzdesi": rng.choice([0.0, 0.3, 0.5]), "tek_seferlik": False,
+        })
+    return gelirler
+
+def portfoy(borc_sayisi, gelir_sayisi, tohum=0):
+    """(borclar, gelirler) çifti; borç sayısı arttıkça gelir de ölçeklenir ki borçlar ufuk içinde kapanabilsin."""
+    borclar = borc_portfoyu(borc_sayisi, tohum)
+    gelirler = gelir_portfoyu(gelir_sayisi, tohum)
+    olcek = max(1.0, borc_sayisi / 10)
+    for gelir in gelirler:
+        gelir['tutar'] = round(gelir['tutar'] * olcek, 2)
+    return borclar, gelirler
+
+# --- OTURUM DURUMLARI ---
+
+# (borç sayısı, gelir sayısı, harcama kalemi sayısı)
+OTURUM_BOYUTLARI = {'kucuk': (5, 2, 3), 'orta': (30, 5, 25), 'buyuk': (200, 20, 300)}
+
+def oturum_durumu(boyut, tohum=0):
+    """initialize_session_state'in kurduğu anahtarlarla, verilen boyutta bir session state sözlüğü üretir."""
+    borc_sayisi, gelir_sayisi, kalem_sayisi = OTURUM_BOYUTLARI[boyut]
+    borclar, gelirler = portfoy(borc_sayisi, gelir_sayisi, tohum)
+    rng = random.Random(f"oturum-{boyut}-{tohum}")
+    return {
+        'borclar': borclar, 'gelirler': gelirler,
+        'tek_seferlik_gelir_isaretleyicisi': {g['isim'] for g in gelirler[::3]},
+        'harcama_kalemleri_df': pd.DataFrame({
+            'Kalem Adı': [f"Kalem {i + 1}" for i in range(kalem_sayisi)],
+            'Aylık Bütçe (TL)': [rng.choice([500, 1500, 3000, 15000]) for _ in range(kalem_sayisi)],
+        }),
+        'manuel_oncelik_listesi': {b['isim']: i for i, b in enumerate(borclar) if b['min_kural'] != 'SABIT_GIDER'},
+        'tr_params': {
+            'kk_taksit_max_ay': 12, 'kk_asgari_odeme_yuzdesi_default': 20.0,
+            'kk_aylik_akdi_faiz': 3.66, 'kk_aylik_gecikme_faiz': 3.96,
+            'kmh_aylik_faiz': 5.0, 'kredi_taksit_max_ay': 36,
+        },
+        'data_loaded': True,
+        # Kaydedilmeyen anahtarlar da gerçek oturumda bulunur
+        'logged_in': True, 'user_id': 'bench@example.com',
+    }
@@ -0,0 +1,264 @@
+# benchmarks/run.py
+"""Simülasyon motorları ve kalıcılık katmanı için tekrarlanabilir kıyaslama takımı.
+
+Depo kökünden çalıştırılır:
+    python -m benchmarks.run                   # tüm ölçümler
+    python -m benchmarks.run --filtre sim/     # adında 'sim/' geçenler
+    python -m benchmarks.run --karsilastir     # baseline.json ile karşılaştırır; gerileme varsa çıkış kodu 1
+    python -m benchmarks.run --kaydet          # sonuçları yeni temel olarak baseline.json'a yazar
+
+Her ölçüm için p50/p90/p99 gecikme, saniyedeki işlem sayısı ve tek çalıştırmanın tepe bellek kullanımı
+(tracemalloc) raporlanır. Temel değerler makineye bağlıdır; karşılaştırma aynı makinede anlamlıdır.
+"""
+
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import db_manager
+from sim_core import simule_borc_planı, hesapla_min_odeme
+from sim_engine import simule_borc_planı_np
+from sim_events import simule_olay_tabanli
+from benchmarks.fake_db import sahte_veritabani
+from benchmarks.portfolios import (
+    KURAL_SIRASI, PORTFOY_BOYUTLARI, OTURUM_BOYUTLARI, VARSAYILAN_PARAMETRELER,
+    borc_portfoyu, portfoy, oturum_durumu,
+)
+
+BASELINE_DOSYASI = os.path.join(os.path.dirname(__file__), 'baseline.json')
+VARSAYILAN_TOLERANS = 0.5  # p50 ya da tepe bellek temelden %50'den fazla kötüleşirse gerileme sayılır
+SURE_BUTCESI = 2.0         # Ölçüm başına en fazla süre (sn); en az MIN_ORNEK örnek her durumda alınır
+MIN_ORNEK = 5
+
+# --- 1. Ölçüm ---
+
+def olc(calistir, tekrar, ic_dongu=1, hazirla=None):
+    """calistir'ı tekrar kez (ya da süre bütçesi dolana kadar) ölçer.
+
+    ic_dongu, çok kısa işlemlerde zamanlayıcı payını azaltmak için bir örnekteki çağrı sayısıdır; gecikmeler
+    çağrı başına raporlanır. hazirla verilirse her örnekten önce ölçüm dışında çağrılır ve dönüşü calistir'a geçer.
+    """
+    hazirla = hazirla or (lambda: None)
+    calistir(hazirla()) # Isınma (önbellekler, içe aktarmalar)
+
+    gecikmeler = []
+    gc.collect()
+    gc_acikti = gc.isenabled()
+    gc.disable()
+    try:
+        baslangic = time.perf_counter()
+        while len(gecikmeler) < tekrar:
+            girdi = hazirla()
+            t0 = time.perf_counter_ns()
+            for _ in range(ic_dongu):
+                calistir(girdi)
+            gecikmeler.append((time.perf_counter_ns() - t0) / ic_dongu / 1e6)
+            if len(gecikmeler) >= MIN_ORNEK and time.perf_counter() - baslangic > SURE_BUTCESI:
+                break
+    finally:
+        if gc_acikti:
+            gc.enable()
+
+    girdi = hazirla()
+    tracemalloc.start()
+    try:
+        calistir(girdi)
+        tepe = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    gecikmeler = np.array(gecikmeler)
+    p50, p90, p99 = np.percentile(gecikmeler, [50, 90, 99])
+    return {
+        'ornek': len(gecikmeler), 'ic_dongu': ic_dongu,
+        'p50_ms': round(float(p50), 6), 'p90_ms': round(float(p90), 6), 'p99_ms': round(float(p99), 6),
+        'islem_sn': round(1000 / float(gecikmeler.mean()), 1),
+        'tepe_bellek_kb': round(tepe / 1024, 1),
+    }
+
+# --- 2. Ölçüm Tanımları ---
+# Her tanım (isim, kurulum) çiftidir; kurulum olc'a geçecek argümanları döndürür ve yalnızca isim
+# filtreyle eşleşirse çağrılır.
+
+def _simulasyon(motor, borc_sayisi, gelir_sayisi):
+    borclar, gelirler = portfoy(borc_sayisi, gelir_sayisi)
+    tekrar = 50 if borc_sayisi <= 10 else 20
+    return dict(calistir=lambda _: motor(borclar, gelirler, **VARSAYILAN_PARAMETRELER), tekrar=tekrar)
+
+def _min_odeme(kural):
+    borc = next(b for b in borc_portfoyu(len(KURAL_SIRASI)) if b['min_kural'] == kural)
+    return dict(calistir=lambda _: hesapla_min_odeme(borc), tekrar=200, ic_dongu=1000)
+
+def _kaydet(boyut, format_):
+    durum = oturum_durumu(boyut)
+    def hazirla():
+        oturum = copy.deepcopy(durum) # Her örnekte ilk kayıt: önceki kaydın özetleri yok
+        return oturum
+    def calistir(oturum):
+        db_manager.DB_STATE_FORMAT = format_
+        with sahte_veritabani():
+            assert db_manager.save_user_data('bench@example.com', oturum)
+    return dict(calistir=calistir, hazirla=hazirla, tekrar=100)
+
+def _degismeyen_kayit(boyut):
+    oturum = oturum_durumu(boyut) # Isınma turundaki ilk kayıttan sonra özetler oturumda kalır
+    def calistir(_):
+        db_manager.DB_STATE_FORMAT = 'binary'
+        with sahte_veritabani():
+            assert db_manager.save_user_data('bench@example.com', oturum)
+    return dict(calistir=calistir, tekrar=100)
+
+def _degisen_kayit(boyut, format_):
+    durum = oturum_durumu(boyut)
+    db_manager.DB_STATE_FORMAT = format_
+    with sahte_veritabani() as baglanti:
+        assert db_manager.save_user_data('bench@example.com', durum)
+    satirlar = copy.deepcopy(baglanti.user_data)
+    def hazirla():
+        # Kaydedilmiş oturumda harcama tablosunun bir hücresi değişir; satır her örnekte aynı sürüme döner
+        oturum = copy.deepcopy(durum)
+        oturum['harcama_kalemleri_df'].iloc[0, 1] += 1
+        baglanti.user_data = copy.deepcopy(satirlar)
+        return oturum
+    def calistir(oturum):
+        db_manager.DB_STATE_FORMAT = format_
+        with sahte_veritabani(baglanti):
+            assert db_manager.save_user_data('bench@example.com', oturum)
+    return dict(calistir=calistir, hazirla=hazirla, tekrar=100)
+
+def _yukle(boyut, format_, onbellek=False):
+    db_manager.DB_STATE_FORMAT = format_
+    with sahte_veritabani() as baglanti:
+        db_manager.save_user_data('bench@example.com', oturum_durumu(boyut))
+    def calistir(_):
+        with sahte_veritabani(baglanti):
+            assert db_manager.load_user_data('bench@example.com') is not None
+    # Önbelleksiz ölçümde her örnek belgeyi baştan okur; önbellekli ölçümde yalnızca sürüm doğrulanır
+    hazirla = None if onbellek else db_manager.clear_read_cache
+    return dict(calistir=calistir, hazirla=hazirla, tekrar=100)
+
+def olcum_tanimlari():
+    tanimlar = []
+    motorlar = [('dict', simule_borc_planı), ('np', simule_borc_planı_np), ('olay', simule_olay_tabanli)]
+    for motor_adi, motor in motorlar:
+        for borc_sayisi, gelir_sayisi in PORTFOY_BOYUTLARI:
+            tanimlar.append((
+                f"sim/{motor_adi}/b{borc_sayisi}-g{gelir_sayisi}",
+                lambda m=motor, b=borc_sayisi, g=gelir_sayisi: _simulasyon(m, b, g),
+            ))
+    for kural in KURAL_SIRASI:
+        tanimlar.append((f"min_odeme/{kural}", lambda k=kural: _min_odeme(k)))
+    for boyut in OTURUM_BOYUTLARI:
+        for format_ in ('binary', 'json'):
+            tanimlar.append((f"db/kaydet-{format_}/{boyut}", lambda b=boyut, f=format_: _kaydet(b, f)))
+            tanimlar.append((f"db/kaydet-degisen-{format_}/{boyut}", lambda b=boyut, f=format_: _degisen_kayit(b, f)))
+            tanimlar.append((f"db/yukle-{format_}/{boyut}", lambda b=boyut, f=format_: _yukle(b, f)))
+        tanimlar.append((f"db/yukle-onbellek/{boyut}", lambda b=boyut: _yukle(b, 'binary', onbellek=True)))
+        tanimlar.append((f"db/kaydet-degismeyen/{boyut}", lambda b=boyut: _degismeyen_kayit(b)))
+    return tanimlar
+
+# --- 3. Temel ve Karşılaştırma ---
+
+def ortam_bilgisi():
+    return {
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'platform': platform.platform(), 'islemci': platform.processor() or platform.machine(),
+        'cekirdek': os.cpu_count(),
+    }
+
+def temeli_oku(dosya=BASELINE_DOSYASI):
+    if not os.path.exists(dosya):
+        return None
+    with open(dosya, encoding='utf-8') as f:
+        return json.load(f)
+
+def temeli_yaz(sonuclar, dosya=BASELINE_DOSYASI):
+    """Mevcut temeli, bu çalıştırmada ölçülenlerle günceller (filtre dışı kalanlar korunur)."""
+    temel = temeli_oku(dosya) or {'ortam': {}, 'sonuclar': {}}
+    temel['ortam'] = ortam_bilgisi()
+    temel['sonuclar'].update(sonuclar)
+    temel['sonuclar'] = dict(sorted(temel['sonuclar'].items()))
+    with open(dosya, 'w', encoding='utf-8') as f:
+        json.dump(temel, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+def karsilastir(sonuclar, temel, tolerans=VARSAYILAN_TOLERANS):
+    """Temele göre p50 gecikmesi ya da tepe belleği tolerans'tan fazla artan ölçümleri döndürür."""
+    gerilemeler = []
+    for isim, sonuc in sonuclar.items():
+        eski = temel['sonuclar'].get(isim)
+        if eski is None:
+            continue
+        for metrik in ('p50_ms', 'tepe_bellek_kb'):
+            if eski[metrik] > 0 and sonuc[metrik] > eski[metrik] * (1 + tolerans):
+                gerilemeler.append((isim, metrik, eski[metrik], sonuc[metrik]))
+    return gerilemeler
+
+# --- 4. Komut Satırı ---
+
+def _tablo_yazdir(sonuclar, temel):
+    satirlar = []
+    for isim, s in sonuclar.items():
+        eski = (temel or {}).get('sonuclar', {}).get(isim)
+        oran = f"{s['p50_ms'] / eski['p50_ms']:.2f}x" if eski and eski['p50_ms'] else '-'
+        satirlar.append({
+            'Ölçüm': isim, 'p50 (ms)': s['p50_ms'], 'p90 (ms)': s['p90_ms'], 'p99 (ms)': s['p99_ms'],
+            'İşlem/sn': s['islem_sn'], 'Tepe Bellek (KB)': s['tepe_bellek_kb'], 'Örnek': s['ornek'], 'Temele Göre': oran,
+        })
+    print(pd.DataFrame(satirlar).to_string(index=False))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simülasyon ve kalıcılık kıyaslamaları")
+    parser.add_argument('--filtre', default='', help="Yalnızca adında bu metin geçen ölçümleri çalıştır")
+    parser.add_argument('--kaydet', action='store_true', help="Sonuçları temel olarak kaydet")
+    parser.add_argument('--karsilastir', action='store_true', help="Temele göre gerileme varsa 1 ile çık")
+    parser.add_argument('--tolerans', type=float, default=VARSAYILAN_TOLERANS)
+    parser.add_argument('--json', dest='json_cikti', help="Sonuçları ayrıca bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    eski_format = db_manager.DB_STATE_FORMAT
+    sonuclar = {}
+    try:
+        for isim, kurulum in olcum_tanimlari():
+            if args.filtre not in isim:
+                continue
+            sonuclar[isim] = olc(**kurulum())
+            print(f"  {isim}: p50 {sonuclar[isim]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        db_manager.DB_STATE_FORMAT = eski_format
+
+    temel = temeli_oku()
+    _tablo_yazdir(sonuclar, temel)
+
+    if args.json_cikti:
+        with open(args.json_cikti, 'w', encoding='utf-8') as f:
+            json.dump({'ortam': ortam_bilgisi(), 'sonuclar': sonuclar}, f, ensure_ascii=False, indent=2)
+    if args.kaydet:
+        temeli_yaz(sonuclar)
+        print(f"\nTemel güncellendi: {BASELINE_DOSYASI}")
+    if args.karsilastir:
+        if temel is None:
+            print("\nKarşılaştırılacak temel bulunamadı (önce --kaydet ile oluşturun).")
+            return 1
+        if temel.get('ortam', {}).get('python') != ortam_bilgisi()['python']:
+            print("\nUyarı: temel farklı bir Python sürümünde ölçülmüş.")
+        gerilemeler = karsilastir(sonuclar, temel, args.tolerans)
+        if gerilemeler:
+            print(f"\n{len(gerilemeler)} gerileme (tolerans %{args.tolerans * 100:.0f}):")
+            for isim, metrik, eski, yeni in gerilemeler:
+                print(f"  {isim} {metrik}: {eski} -> {yeni}")
+            return 1
+        print("\nGerileme yok.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,402 @@
+# db_async.py
+"""db_manager'ın asyncio karşılığı: asyncpg bağlantı havuzu, sorgu başına zaman aşımı ve eşzamanlı toplu okuma.
+
+Birden fazla veritabanı turu gerektiren işler (giriş + yükleme, çok kullanıcılı panolar, toplu işler) sorguları
+sırayla değil aynı anda gönderir; toplam süre kabaca tek bir tur kadardır. Bağlantı ayarları, kayıt formatı,
+serileştirme ve çözme db_manager ile ortaktır; dönüş değerleri ve hata bildirimi de aynıdır (False/None,
+(başarı, mesaj)), ayrıntılar 'db_async' günlüğüne yazılır.
+
+Senkron kod (Streamlit betiği, toplu işler) *_sync sarmalayıcılarını kullanır; bunlar eşzamansız fonksiyonları
+süreç genelindeki arka plan olay döngüsünde çalıştırır, böylece tüm çağrılar tek havuzu paylaşır.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+import asyncpg
+
+import db_manager
+from state_codec import encode_patch, encode_snapshot
+from metrics import aktif_olcumler, fazlar, olcum_oturumu, sayac
+
+logger = logging.getLogger(__name__)
+
+# --- EŞZAMANSIZ HAVUZ AYARLARI ---
+# Havuz boyutu ve bağlantı bekleme süresi db_manager ile aynı ortam değişkenlerinden okunur.
+DB_QUERY_TIMEOUT = float(os.environ.get("DB_QUERY_TIMEOUT", "10")) # Tek sorgu için üst sınır (sn)
+DB_FANOUT_CHUNK = int(os.environ.get("DB_FANOUT_CHUNK", "200")) # Toplu okumada bir sorgudaki kullanıcı sayısı
+
+# asyncpg havuzu kurulduğu olay döngüsüne bağlıdır; her döngünün kendi havuzu olur. Havuz döngüye referans
+# tuttuğundan kayıt zayıf referansla düşmez: havuzu kuran görev havuzu döngü boyunca tutar ve döngü kapanırken
+# (asyncio.run kapanışta bekleyen görevleri iptal eder) havuzu kapatıp kaydı siler. Görevleri iptal edilmeden
+# kapatılan döngülerin kayıtları sonraki get_async_pool çağrısında silinir.
+_pools = {} # döngü -> (havuzu tutan görev, havuz future'ı)
+_loop = None
+_loop_lock = threading.Lock()
+
+# --- 1. Bağlantı Havuzu ---
+async def _hold_pool(pool_future):
+    """Havuzu kurup pool_future'a bildirir ve iptal edilene kadar (döngü kapanışı, close_async_pool) tutar."""
+    loop = asyncio.get_running_loop()
+    try:
+        pool = await asyncpg.create_pool(
+            host=db_manager.DB_HOST,
+            database=db_manager.DB_NAME,
+            user=db_manager.DB_USER,
+            password=db_manager.DB_PASS,
+            ssl='require',
+            min_size=db_manager.DB_POOL_MIN,
+            max_size=db_manager.DB_POOL_MAX,
+            command_timeout=DB_QUERY_TIMEOUT,
+            max_inactive_connection_lifetime=300,
+        )
+    except asyncio.CancelledError:
+        pool_future.cancel()
+        raise
+    except Exception as e:
+        pool_future.set_exception(e)
+        return
+    pool_future.set_result(pool)
+    owner = asyncio.current_task()
+    try:
+        await loop.create_future() # Yalnızca iptalle biter
+    except asyncio.CancelledError:
+        if _pools.get(loop, (None,))[0] is owner:
+            del _pools[loop]
+        pool.terminate() # Kapanışta bağlantılar beklenmez; close_async_pool önce düzgün kapatır
+        raise
+
+async def get_async_pool():
+    """Çalışan olay döngüsünün bağlantı havuzunu (gerekirse) kurar. Supabase için SSL zorunludur."""
+    loop = asyncio.get_running_loop()
+    for closed in [l for l in _pools if l.is_closed()]:
+        del _pools[closed]
+    entry = _pools.get(loop)
+    if entry is None:
+        pool_future = loop.create_future()
+        entry = _pools[loop] = (loop.create_task(_hold_pool(pool_future)), pool_future)
+    try:
+        return await asyncio.shield(entry[1])
+    except Exception:
+        if _pools.get(loop) is entry:
+            del _pools[loop] # Sonraki çağrı yeniden dener
+        raise
+
+def _acquire(pool):
+    """Havuzdan bağlantı; DB_POOL_TIMEOUT içinde boş bağlantı yoksa asyncio.TimeoutError."""
+    return pool.acquire(timeout=db_manager.DB_POOL_TIMEOUT)
+
+async def close_async_pool():
+    """Çalışan döngünün havuzundaki tüm bağlantıları kapatır (testler ve kapanış için)."""
+    entry = _pools.pop(asyncio.get_running_loop(), None)
+    if entry is None: return
+    owner, pool_future = entry
+    if pool_future.done() and not pool_future.cancelled() and pool_future.exception() is None:
+        await pool_future.result().close()
+    owner.cancel()
+
+async def _bcrypt(func, *args):
+    """bcrypt işini db_manager'ın işçi havuzunda çalıştırır; olay döngüsü kuyrukta yer beklerken bloklanmaz."""
+    future = db_manager._bcrypt_submit(func, *args, wait=False)
+    if future is None:
+        raise TimeoutError("Şifre işlemleri kuyruğu dolu, lütfen tekrar deneyin.")
+    return await asyncio.wrap_future(future)
+
+# --- 2. Kullanıcı Kayıt ve Giriş ---
+async def register_user(username, password):
+    """Yeni kullanıcıyı kaydeder ve şifresini hashler."""
+    sayac('db.cagri', islem='register_user', surucu='async')
+    try:
+        hashed_password = await _bcrypt(db_manager._hashpw, password, db_manager.BCRYPT_ROUNDS)
+        pool = await get_async_pool()
+        async with _acquire(pool) as conn:
+            await conn.execute(
+                "INSERT INTO users (username, hashed_password) VALUES ($1, $2)",
+                username, hashed_password
+            )
+        return True, "Kayıt başarılı. Şimdi giriş yapabilirsiniz."
+    except asyncpg.UniqueViolationError:
+        return False, "Bu kullanıcı adı zaten kayıtlı."
+    except Exception as e:
+        sayac('db.hata', islem='register_user', surucu='async')
+        return False, f"Kayıt sırasında bir hata oluştu: {e}"
+
+async def _fetch_hash(username):
+    pool = await get_async_pool()
+    async with _acquire(pool) as conn:
+        return await conn.fetchval("SELECT hashed_password FROM users WHERE username = $1", username)
+
+async def _check_login(username, password, hashed_password):
+    """Kayıtlı hash'e göre girişi doğrular; gerekirse hash'i arka planda günceller (bkz. db_manager.authenticate_user)."""
+    if hashed_password is None:
+        return False, "Kullanıcı bulunamadı."
+    if not await _bcrypt(db_manager._checkpw, password, hashed_password):
+        return False, "Hatalı şifre."
+    if db_manager._hash_rounds(hashed_password) != db_manager.BCRYPT_ROUNDS:
+        # Kuyruk doluysa yenileme atlanır, bir sonraki girişte tekrar denenir
+        if db_manager._bcrypt_submit(db_manager._rehash_password, username, password, hashed_password, wait=False) is not None:
+            sayac('db.yeniden_hash', islem='authenticate_user', surucu='async')
+    return True, "Giriş başarılı."
+
+async def authenticate_user(username, password):
+    """Kullanıcı adını ve şifreyi kontrol eder."""
+    sayac('db.cagri', islem='authenticate_user', surucu='async')
+    try:
+        return await _check_login(username, password, await _fetch_hash(username))
+    except Exception as e:
+        sayac('db.hata', islem='authenticate_user', surucu='async')
+        return False, f"Giriş sırasında bir hata oluştu: {e}"
+
+async def login_and_load(username, password):
+    """Girişi doğrular ve kayıtlı veriyi yükler: (başarı, mesaj, veri ya da None).
+
+    Hash ve user_data satırı iki bağlantıdan aynı anda okunur (tek tur); veri yalnızca şifre doğruysa döner.
+    """
+    sayac('db.cagri', islem='login_and_load', surucu='async')
+    faz = fazlar('db.sure', islem='login_and_load', surucu='async')
+    try:
+        hashed_password, row = await asyncio.gather(_fetch_hash(username), _fetch_row(username))
+        if faz: faz.isaretle('sorgu')
+        success, message = await _check_login(username, password, hashed_password)
+        if faz: faz.isaretle('bcrypt')
+        if not success:
+            return False, message, None
+        data = _session(username, row)
+        if faz: faz.isaretle('cozme')
+        return True, message, data
+    except Exception as e:
+        sayac('db.hata', islem='login_and_load', surucu='async')
+        logger.exception("Giriş/yükleme hatası (%s)", username)
+        return False, f"Giriş sırasında bir hata oluştu: {e}", None
+
+# --- 3. Veri Yükleme ---
+# Okuma önbelleği db_manager ile ortaktır; sorgular önbellekteki sürümü gönderir ve belge yalnızca sürüm
+# değişmişse döner (bkz. db_manager.load_user_data).
+async def _fetch_row(username):
+    """Kullanıcının satırını önbellekle birleştirip döndürür: (version, data, snapshot) ya da satır yoksa None."""
+    cached = db_manager._cache_get(username)
+    pool = await get_async_pool()
+    async with _acquire(pool) as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT version,
+                   CASE WHEN version = $1 THEN NULL ELSE data::text END,
+                   CASE WHEN version = $1 THEN NULL ELSE snapshot || COALESCE(snapshot_patch, ''::bytea) END
+            FROM user_data WHERE username = $2
+            """,
+            cached[0] if cached is not None else None, username
+        )
+    if row is None:
+        db_manager._cache_drop(username)
+        return None
+    return db_manager._merge_cached_row(username, cached, *row)[:3]
+
+def _session(username, row):
+    return db_manager._session_from_row(username, row[1], row[2], row[0]) if row is not None else None
+
+async def load_user_data(username):
+    """Kayıtlı simülasyon verilerini DB'den yükler (ikili anlık görüntü ya da eski JSONB)."""
+    sayac('db.cagri', islem='load_user_data', surucu='async')
+    try:
+        return _session(username, await _fetch_row(username))
+    except Exception:
+        sayac('db.hata', islem='load_user_data', surucu='async')
+        logger.exception("Veri yükleme hatası (%s)", username)
+        return None
+
+async def _load_chunk(pool, usernames):
+    cached = {username: db_manager._cache_get(username) for username in usernames}
+    async with _acquire(pool) as conn:
+        rows = await conn.fetch(
+            """
+            SELECT d.username, d.version,
+                   CASE WHEN d.version = c.version THEN NULL ELSE d.data::text END,
+                   CASE WHEN d.version = c.version THEN NULL ELSE d.snapshot || COALESCE(d.snapshot_patch, ''::bytea) END
+            FROM unnest($1::varchar[], $2::bigint[]) AS c(username, version)
+            JOIN user_data d ON d.username = c.username
+            """,
+            usernames, [entry[0] if entry is not None else None for entry in cached.values()]
+        )
+    result = {}
+    for username, *row in rows:
+        try:
+            result[username] = _session(username, db_manager._merge_cached_row(username, cached[username], *row)[:3])
+        except Exception:
+            sayac('db.hata', islem='load_users_data', surucu='async')
+            logger.exception("Veri çözme hatası (%s)", username)
+    return result
+
+async def load_users_data(usernames, timeout=None, chunk_size=None):
+    """Birden çok kullanıcının verisini eşzamanlı yükler: {username: veri ya da None}.
+
+    Kullanıcılar chunk_size'lık gruplara ayrılır; her grup tek sorgudur ve gruplar ayrı bağlantılardan aynı anda
+    çalışır. timeout tüm işin üst sınırıdır (sn); süresi dolan ya da hata veren grupların kullanıcıları None döner.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    sayac('db.cagri', islem='load_users_data', surucu='async')
+    result = dict.fromkeys(usernames)
+    if not usernames: return result
+    chunk_size = chunk_size or DB_FANOUT_CHUNK
+    chunks = [usernames[i:i + chunk_size] for i in range(0, len(usernames), chunk_size)]
+    try:
+        pool = await get_async_pool()
+    except Exception:
+        sayac('db.hata', islem='load_users_data', surucu='async')
+        logger.exception("Toplu veri yükleme hatası (%d kullanıcı)", len(usernames))
+        return result
+    tasks = {asyncio.ensure_future(_load_chunk(pool, chunk)): chunk for chunk in chunks}
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    for task, chunk in tasks.items():
+        error = 'zaman aşımı' if task in pending else task.exception()
+        if error is None:
+            result.update(task.result())
+            continue
+        sayac('db.hata', islem='load_users_data', surucu='async')
+        logger.error("Toplu veri yükleme hatası (%s..., %d kullanıcı): %s", chunk[0], len(chunk), error)
+    if pending:
+        await asyncio.wait(pending) # İptal edilen sorguların bağlantıları havuza dönsün
+    return result
+
+# --- 4. Veri Kaydetme ---
+async def save_user_data(username, session_data, force=False):
+    """Oturum verisini kaydeder; format, değişmeyen kaydın atlanması, JSONB birleştirme ve anlık görüntü yamaları,
+    iyimser eşzamanlılık denetimi ve user_summary yenilemesi db_manager.save_user_data ile aynıdır."""
+    sayac('db.cagri', islem='save_user_data', surucu='async')
+    plan = db_manager._save_plan(username, session_data, force)
+    if plan is None:
+        sayac('db.degismeyen_kayit', islem='save_user_data', surucu='async')
+        return True
+    state_format = plan['format']
+    olcumler = aktif_olcumler()
+    data = snapshot = patch = None
+    try:
+        # Özet bağlantı alınmadan hesaplanır; simülasyon olay döngüsünü bloklamasın diye iş parçacığında
+        summary = await asyncio.to_thread(db_manager._summary_refresh, username, session_data, plan)
+        pool = await get_async_pool()
+        async with _acquire(pool) as conn, conn.transaction():
+            version = None
+            if plan['delta'] and state_format == 'binary':
+                # Yalnızca değişen anahtarlar: anlık görüntüye yama eklenir; yamalar sınırı aşacaksa tutmaz
+                patch = encode_patch(plan['changed'], plan['removed'])
+                if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(patch), islem='save_user_data', format='binary_delta')
+                version = await conn.fetchval(
+                    """
+                    UPDATE user_data SET snapshot_patch = COALESCE(snapshot_patch, ''::bytea) || $1,
+                        version = version + 1, content_hash = $2, updated_at = now()
+                    WHERE username = $3 AND version = $4 AND snapshot IS NOT NULL
+                        AND COALESCE(octet_length(snapshot_patch), 0) + $5 <= octet_length(snapshot) * $6::float8
+                    RETURNING version;
+                    """,
+                    patch, plan['content_hash'], username, plan['version'], len(patch), db_manager.DB_SNAPSHOT_PATCH_RATIO
+                )
+            elif plan['delta']:
+                # Yalnızca değişen anahtarlar: silinenler çıkarılır, değişenler birleştirilir
+                version = await conn.fetchval(
+                    """
+                    UPDATE user_data SET data = (COALESCE(data, '{}'::jsonb) - $1::text[]) || $2::jsonb, snapshot = NULL,
+                        version = version + 1, content_hash = $3, updated_at = now()
+                    WHERE username = $4 AND version = $5 AND data IS NOT NULL
+                    RETURNING version;
+                    """,
+                    plan['removed'], db_manager._json_object(plan['changed']), plan['content_hash'],
+                    username, plan['version']
+                )
+            if version is None:
+                # İlk kayıt, "üzerine yaz" ya da birleştirme/yama tutmadı: belgenin tamamı yazılır
+                if state_format == 'binary':
+                    snapshot = encode_snapshot(plan['encoded'])
+                    if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(snapshot), islem='save_user_data', format='binary')
+                else:
+                    data = db_manager._json_object(plan['encoded'])
+                    if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(data), islem='save_user_data', format='json')
+                # İlk kayıt eklenir; var olan satır yalnızca oturumun bildiği sürümdeyse güncellenir
+                version = await conn.fetchval(
+                    """
+                    INSERT INTO user_data (username, data, snapshot, version, content_hash, updated_at)
+                    VALUES ($1, $2::jsonb, $3, 1, $4, now())
+                    ON CONFLICT (username) DO UPDATE SET
+                        data = EXCLUDED.data, snapshot = EXCLUDED.snapshot, snapshot_patch = NULL,
+                        content_hash = EXCLUDED.content_hash, version = user_data.version + 1, updated_at = now()
+                    WHERE $5 OR user_data.version = $6
+                    RETURNING version;
+                    """,
+                    username, data, snapshot, plan['content_hash'], plan['force'], plan['version']
+                )
+            if version is None:
+                current = await conn.fetchrow("SELECT version, content_hash FROM user_data WHERE username = $1", username)
+                current_version, current_hash = current if current is not None else (None, None)
+            elif summary is not None:
+                await _write_summary(conn, username, summary['row'])
+        if version is None:
+            # Satır başka bir oturumca değiştirilmiş: aynı içerik yazılmışsa kayıt gereksizdir, değilse çakışma.
+            # Satır bu arada silinmişse de çakışmadır (sürüm None); "üzerine yaz" satırı yeniden ekler.
+            if current_hash != plan['content_hash']:
+                sayac('db.kayit_cakismasi', islem='save_user_data', surucu='async')
+                logger.warning("Kayıt çakışması (%s): oturum sürümü %s, kayıtlı sürüm %s", username, plan['version'], current_version)
+                session_data[db_manager.KAYIT_CAKISMASI_ANAHTARI] = current_version
+                return False
+            sayac('db.degismeyen_kayit', islem='save_user_data', surucu='async')
+            db_manager._saved(username, session_data, plan, current_version, state_format)
+            return True
+        if patch is not None and snapshot is None:
+            snapshot = db_manager._patched_cache(username, plan['version'], patch)
+        db_manager._saved(username, session_data, plan, version, state_format, data, snapshot)
+        return True
+    except Exception:
+        sayac('db.hata', islem='save_user_data', surucu='async')
+        logger.exception("Veri kaydetme hatası (%s)", username)
+        return False
+
+async def _write_summary(conn, username, row):
+    """Kaydın işlemi içinde özet satırını yazar; row None ise özet silinir (bkz. db_manager._write_summary)."""
+    if row is None:
+        await conn.execute("DELETE FROM user_summary WHERE username = $1;", username)
+    else:
+        await conn.execute(db_manager._summary_upsert_sql("(" + ", ".join(f"${i}" for i in range(1, len(row) + 1)) + ")"), *row)
+
+# --- 5. Senkron Sarmalayıcılar ---
+def _background_loop():
+    """Senkron çağrıların paylaştığı, süreç ömrü boyunca çalışan olay döngüsü (daemon iş parçacığında)."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="db_async", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run_sync(coro, timeout=None):
+    """Eşzamansız çağrıyı arka plan döngüsünde çalıştırıp sonucunu bekler; etkin ölçüm nesnesi de taşınır."""
+    olcumler = aktif_olcumler()
+    async def _run():
+        with olcum_oturumu(olcumler):
+            return await coro
+    return asyncio.run_coroutine_threadsafe(_run(), _background_loop()).result(timeout)
+
+def register_user_sync(username, password):
+    return run_sync(register_user(username, password))
+
+def authenticate_user_sync(username, password):
+    return run_sync(authenticate_user(username, password))
+
+def login_and_load_sync(username, password):
+    return run_sync(login_and_load(username, password))
+
+def load_user_data_sync(username):
+    return run_sync(load_user_data(username))
+
+def load_users_data_sync(usernames, timeout=None, chunk_size=None):
+    return run_sync(load_users_data(usernames, timeout, chunk_size))
+
+def save_user_data_sync(username, session_data, force=False):
+    return run_sync(save_user_data(username, session_data, force))
+
+def close_async_pool_sync():
+    """Arka plan döngüsünün havuzunu kapatır."""
+    if _loop is not None:
+        run_sync(close_async_pool())
@@ -1,12 +1,27 @@
 # db_manager.py
 
 import psycopg2
-from psycopg2 import sql
+from psycopg2 import sql, pool, extensions, extras
 import bcrypt
+import base64
+import hashlib
+import hmac
+import io
 import json
+import logging
 import os
-import streamlit as st 
-import pandas as pd # load_user_data için gerekli
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from state_codec import SnapshotError, encode_value, encode_snapshot, encode_patch, encode_state, split_snapshot, decode_value
+from metrics import aktif_olcumler, fazlar, sayac
+
+# Arayüzden bağımsızdır: hatalar dönüş değerleriyle (False/None, (başarı, mesaj)) bildirilir ve ayrıntıları
+# 'db_manager' günlüğüne yazılır. pandas yalnızca eski JSONB belgelerdeki tablolar çözülürken içe aktarılır.
+logger = logging.getLogger(__name__)
 
 # --- PostgreSQL BAĞLANTI BİLGİLERİ ---
 # Bu değerler, Streamlit Cloud'un 'Secrets' (Sırlar) bölümünden okunur.
@@ -17,24 +32,140 @@ DB_NAME = os.environ.get("DB_NAME", "finans_db") # Supabase'de genelde 'postgres
 DB_USER = os.environ.get("DB_USER", "postgres")
 DB_PASS = os.environ.get("DB_PASS", "sifreniz") # Şifre yerine, secrets'ı kontrol edin!
 
+# --- BAĞLANTI HAVUZU AYARLARI ---
+# Havuz süreç genelinde tektir; tüm Streamlit oturumları aynı bağlantıları paylaşır.
+# psycopg2 havuzu en fazla DB_POOL_MIN boş bağlantıyı açık tutar, fazlasını iadede kapatır.
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10")) # Boş bağlantı bekleme süresi (sn)
+DB_POOL_CHECK_IDLE = float(os.environ.get("DB_POOL_CHECK_IDLE", "30")) # Bu kadar boşta kalan bağlantı 'SELECT 1' ile denetlenir
+
+# --- OTURUM VERİSİ FORMATI ---
+# 'binary': sürümlü ikili anlık görüntü (user_data.snapshot, BYTEA). 'json': eski JSONB belge (user_data.data).
+# Okuma her iki formatı da destekler; eski JSONB satırlar ilk kayıtta ya da migrate_user_data_to_snapshot ile taşınır.
+DB_STATE_FORMAT = os.environ.get("DB_STATE_FORMAT", "binary")
+# İkili formatta değişen anahtarlar anlık görüntüye yama olarak eklenir (user_data.snapshot_patch). Yamaların toplamı
+# anlık görüntünün DB_SNAPSHOT_PATCH_RATIO katını aşacaksa kayıt anlık görüntüyü baştan yazar ve yamaları siler.
+DB_SNAPSHOT_PATCH_RATIO = float(os.environ.get("DB_SNAPSHOT_PATCH_RATIO", "1.0"))
+
+# --- ŞİFRE HASHLEME AYARLARI ---
+# bcrypt Streamlit betik iş parçacığında değil, sınırlı bir işçi havuzunda çalışır (bcrypt hesap sırasında GIL'i bırakır).
+# Aynı anda en fazla BCRYPT_WORKERS hash hesaplanır; kuyrukta BCRYPT_QUEUE_MAX'tan fazla iş beklemez.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12")) # Değişirse eski maliyetli hash'ler girişte yenilenir
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+BCRYPT_QUEUE_MAX = int(os.environ.get("BCRYPT_QUEUE_MAX", str(BCRYPT_WORKERS * 8)))
+BCRYPT_TIMEOUT = float(os.environ.get("BCRYPT_TIMEOUT", "10")) # Kuyrukta yer bekleme süresi (sn)
+
+# --- OTURUM ANAHTARI AYARLARI ---
+# Başarılı girişten sonra imzalı ve süreli bir anahtar verilir (arayüz çerezde taşır); sayfa yenilendiğinde bcrypt
+# yerine imza ve users.token_version denetlenir. Çıkışta token_version artırılır, verilmiş anahtarlar geçersizleşir.
+# SESSION_SECRET verilmezse süreç başına rastgele üretilir: yeniden başlatmada verilmiş anahtarlar geçersiz olur.
+SESSION_SECRET = os.environ.get("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TOKEN_TTL = int(os.environ.get("SESSION_TOKEN_TTL", str(8 * 3600))) # sn
+
+# --- OKUMA ÖNBELLEĞİ AYARLARI ---
+# Yüklenen satırlar (sürüm, kodlanmış veri) süreç genelinde tutulur. Her yükleme tek sorguda satırın sürümünü
+# doğrular; sürüm değişmediyse belge yeniden aktarılmaz. DB_READ_CACHE_SIZE=0 önbelleği kapatır.
+DB_READ_CACHE_SIZE = int(os.environ.get("DB_READ_CACHE_SIZE", "512"))
+DB_READ_CACHE_BYTES = int(os.environ.get("DB_READ_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_last_used = {} # id(conn) -> son kullanım zamanı
+
+_bcrypt_executor = None
+_bcrypt_lock = threading.Lock()
+_bcrypt_slots = threading.BoundedSemaphore(BCRYPT_QUEUE_MAX)
+
+_read_cache = OrderedDict() # username -> (version, data, snapshot, boyut)
+_read_cache_bytes = 0
+_read_cache_lock = threading.Lock()
+
 # --- 1. Veritabanı Bağlantısı ---
+def get_db_pool():
+    """Süreç genelindeki bağlantı havuzunu (gerekirse) kurar. Supabase için SSL zorunludur."""
+    global _pool
+    if _pool is None or _pool.closed:
+        with _pool_lock:
+            if _pool is None or _pool.closed:
+                # Supabase gibi bulut sağlayıcılar için SSLmode zorunlu olmalıdır.
+                _pool = pool.ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX,
+                    host=DB_HOST,
+                    database=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASS,
+                    sslmode='require',  # KRİTİK GÜNCELLEME: Güvenli bulut bağlantısı için!
+                    keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+                )
+    return _pool
+
+def _is_healthy(conn):
+    """Havuzdan alınan bağlantının hâlâ kullanılabilir olduğunu denetler."""
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < DB_POOL_CHECK_IDLE:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
 def get_db_connection():
-    """PostgreSQL veritabanı bağlantısını kurar. Supabase için SSL zorunludur."""
-    try:
-        # Supabase gibi bulut sağlayıcılar için SSLmode zorunlu olmalıdır.
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASS,
-            sslmode='require'  # KRİTİK GÜNCELLEME: Güvenli bulut bağlantısı için!
-        )
-        return conn
+    """Havuzdan sağlıklı bir bağlantı alır; bozuk bağlantıları atıp yenisini kurar."""
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        logger.error("Veritabanı bağlantı hatası: havuzda boş bağlantı yok.")
+        return None
+    try:
+        db_pool = get_db_pool()
+        for _ in range(DB_POOL_MIN + 1): # Boştaki bağlantıların hepsi kopmuş olabilir
+            conn = db_pool.getconn()
+            if _is_healthy(conn):
+                return conn
+            # Kopmuş bağlantı: havuzdan çıkarılır, bir sonraki getconn yenisini açar
+            _last_used.pop(id(conn), None)
+            db_pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Havuzdan sağlıklı bağlantı alınamadı.")
     except Exception as e:
+        _pool_slots.release()
         # Hatanın nerede olduğunu net görebilmek için DB_HOST değerini gösterelim
-        st.error(f"⚠️ Veritabanı Bağlantı Hatası: Host: {DB_HOST}. Detay: {e}")
+        logger.error("Veritabanı bağlantı hatası: Host: %s. Detay: %s", DB_HOST, e)
         return None
 
+def release_db_connection(conn):
+    """Bağlantıyı havuza iade eder; yarım kalan işlem geri alınır, kopmuş bağlantı kapatılır."""
+    if conn is None: return
+    broken = bool(conn.closed)
+    if not broken and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+    try:
+        if broken:
+            _last_used.pop(id(conn), None)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+        get_db_pool().putconn(conn, close=broken)
+    except pool.PoolError:
+        # Havuz bu arada kapatılıp yeniden kurulduysa bağlantı artık ona ait değildir
+        conn.close()
+    finally:
+        _pool_slots.release()
+
+def close_db_pool():
+    """Havuzdaki tüm bağlantıları kapatır (testler ve kapanış için)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+        _last_used.clear()
+
 # --- 2. Tablo Oluşturma (Genellikle manuel yapılır) ---
 def create_tables():
     """Gerekli 'users' ve 'user_data' tablolarını oluşturur."""
@@ -48,33 +179,150 @@ def create_tables():
                 CREATE TABLE IF NOT EXISTS users (
                     id SERIAL PRIMARY KEY,
                     username VARCHAR(100) UNIQUE NOT NULL,
-                    hashed_password VARCHAR(255) NOT NULL
+                    hashed_password VARCHAR(255) NOT NULL,
+                    token_version INTEGER NOT NULL DEFAULT 0
                 );
             """)
+            # Eski kurulumlar için: oturum anahtarlarını geçersiz kılmak için artırılan sayaç
+            cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;")
             # user_data tablosu: Simülasyon verileri
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS user_data (
                     username VARCHAR(100) REFERENCES users(username) ON DELETE CASCADE,
                     data JSONB,
+                    snapshot BYTEA,
+                    snapshot_patch BYTEA,
+                    version BIGINT NOT NULL DEFAULT 0,
+                    content_hash CHAR(40),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
                     PRIMARY KEY (username)
                 );
             """)
+            # Eski kurulumlar için: ikili anlık görüntü ve ona eklenen yamalar
+            cur.execute("ALTER TABLE user_data ADD COLUMN IF NOT EXISTS snapshot BYTEA, ADD COLUMN IF NOT EXISTS snapshot_patch BYTEA;")
+            # Eski kurulumlar için: her yazımda artan sürüm, içerik özeti ve son yazım zamanı
+            cur.execute("""
+                ALTER TABLE user_data
+                    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS content_hash CHAR(40),
+                    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+            """)
+            # user_summary tablosu: Kullanıcı başına son simülasyon özeti (toplu yeniden hesaplama yazar)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS user_summary (
+                    username VARCHAR(100) PRIMARY KEY REFERENCES users(username) ON DELETE CASCADE,
+                    ay_sayisi INTEGER NOT NULL,
+                    borcsuz_ay INTEGER,
+                    toplam_faiz DOUBLE PRECISION NOT NULL,
+                    toplam_birikim DOUBLE PRECISION NOT NULL,
+                    baslangic_faizli_borc DOUBLE PRECISION NOT NULL,
+                    inputs_hash CHAR(64) NOT NULL,
+                    computed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+            """)
+            # Panolar ve kohort sorguları için aralık indeksleri (ör. ay_sayisi > 360, en yüksek faizli kullanıcılar)
+            for column in SUMMARY_INDEXED_COLUMNS:
+                cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON user_summary ({});").format(
+                    sql.Identifier(f"user_summary_{column}_idx"), sql.Identifier(column)
+                ))
         conn.commit()
         return True, "Tablolar başarıyla oluşturuldu."
     except Exception as e:
         return False, f"Tablo oluşturma hatası: {e}"
     finally:
-        if conn: conn.close()
+        release_db_connection(conn)
+
+# --- 3. Şifre Hashleme (İşçi Havuzu) ---
+def _get_bcrypt_executor():
+    global _bcrypt_executor
+    if _bcrypt_executor is None:
+        with _bcrypt_lock:
+            if _bcrypt_executor is None:
+                _bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+    return _bcrypt_executor
+
+def _bcrypt_submit(func, *args, wait=True):
+    """İşi bcrypt havuzuna gönderir; kuyrukta yer yoksa (wait=False ise hemen, değilse BCRYPT_TIMEOUT sonunda) None döner."""
+    if not (_bcrypt_slots.acquire(timeout=BCRYPT_TIMEOUT) if wait else _bcrypt_slots.acquire(blocking=False)):
+        return None
+    try:
+        future = _get_bcrypt_executor().submit(func, *args)
+    except Exception:
+        _bcrypt_slots.release()
+        raise
+    future.add_done_callback(lambda _: _bcrypt_slots.release())
+    return future
+
+def _bcrypt_run(func, *args):
+    future = _bcrypt_submit(func, *args)
+    if future is None:
+        raise TimeoutError("Şifre işlemleri kuyruğu dolu, lütfen tekrar deneyin.")
+    return future.result()
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _checkpw(password, hashed_password):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def hash_password(password):
+    """Şifreyi BCRYPT_ROUNDS maliyetiyle, işçi havuzunda hashler."""
+    return _bcrypt_run(_hashpw, password, BCRYPT_ROUNDS)
+
+def check_password(password, hashed_password):
+    """Şifreyi kayıtlı hash ile işçi havuzunda karşılaştırır."""
+    return _bcrypt_run(_checkpw, password, hashed_password)
+
+def _hash_rounds(hashed_password):
+    """'$2b$12$...' biçimindeki hash'in maliyet çarpanı."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def _rehash_password(username, password, old_hash):
+    """Hash'i güncel BCRYPT_ROUNDS ile yeniler; bu arada şifre değiştiyse (hash farklıysa) dokunmaz.
+
+    Arka planda çalışır ve sonucu beklenmez; hatalar kaydedilir ve bir sonraki girişte yeniden denenir.
+    """
+    try:
+        new_hash = _hashpw(password, BCRYPT_ROUNDS)
+    except Exception:
+        sayac('db.hata', islem='rehash_password')
+        logger.exception("Şifre yeniden hashleme hatası (%s)", username)
+        return
+    conn = get_db_connection()
+    if conn is None: return
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE users SET hashed_password = %s WHERE username = %s AND hashed_password = %s",
+                (new_hash, username, old_hash)
+            )
+        conn.commit()
+    except Exception:
+        sayac('db.hata', islem='rehash_password')
+        logger.exception("Şifre yeniden hashleme hatası (%s)", username)
+    finally:
+        release_db_connection(conn)
 
-# --- 3. Kullanıcı Kayıt İşlemi ---
+# --- 4. Kullanıcı Kayıt İşlemi ---
 def register_user(username, password):
     """Yeni kullanıcıyı kaydeder ve şifresini hashler."""
+    sayac('db.cagri', islem='register_user')
+    faz = fazlar('db.sure', islem='register_user')
+    # Şifre hashleme (havuzdaki bağlantıyı meşgul etmemek için bağlantı alınmadan önce)
+    try:
+        hashed_password = hash_password(password)
+    except Exception as e:
+        sayac('db.hata', islem='register_user')
+        return False, f"Kayıt sırasında bir hata oluştu: {e}"
+    if faz: faz.isaretle('bcrypt')
+
     conn = get_db_connection()
+    if faz: faz.isaretle('baglanti')
     if conn is None: return False, "Veritabanı bağlantısı yok."
     
-    # Şifre hashleme
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
     try:
         with conn.cursor() as cur:
             cur.execute(
@@ -82,18 +330,27 @@ def register_user(username, password):
                 (username, hashed_password)
             )
         conn.commit()
+        if faz: faz.isaretle('sorgu')
         return True, "Kayıt başarılı. Şimdi giriş yapabilirsiniz."
     except psycopg2.IntegrityError:
         return False, "Bu kullanıcı adı zaten kayıtlı."
     except Exception as e:
+        sayac('db.hata', islem='register_user')
         return False, f"Kayıt sırasında bir hata oluştu: {e}"
     finally:
-        if conn: conn.close()
+        release_db_connection(conn)
 
-# --- 4. Kullanıcı Giriş İşlemi ---
+# --- 5. Kullanıcı Giriş İşlemi ---
 def authenticate_user(username, password):
-    """Kullanıcı adını ve şifreyi kontrol eder."""
+    """Kullanıcı adını ve şifreyi kontrol eder.
+
+    Hash karşılaştırması bağlantı havuza iade edildikten sonra işçi havuzunda yapılır. Kayıtlı hash'in maliyeti
+    BCRYPT_ROUNDS'tan farklıysa, giriş beklemeden hash arka planda güncel maliyetle yenilenir.
+    """
+    sayac('db.cagri', islem='authenticate_user')
+    faz = fazlar('db.sure', islem='authenticate_user')
     conn = get_db_connection()
+    if faz: faz.isaretle('baglanti')
     if conn is None: return False, "Veritabanı bağlantısı yok."
 
     try:
@@ -103,83 +360,664 @@ def authenticate_user(username, password):
                 (username,)
             )
             result = cur.fetchone()
-            
-            if result:
-                hashed_password = result[0].encode('utf-8')
-                if bcrypt.checkpw(password.encode('utf-8'), hashed_password):
-                    return True, "Giriş başarılı."
-                else:
-                    return False, "Hatalı şifre."
-            else:
-                return False, "Kullanıcı bulunamadı."
+            if faz: faz.isaretle('sorgu')
     except Exception as e:
+        sayac('db.hata', islem='authenticate_user')
         return False, f"Giriş sırasında bir hata oluştu: {e}"
     finally:
-        if conn: conn.close()
+        release_db_connection(conn)
+
+    if not result:
+        return False, "Kullanıcı bulunamadı."
+
+    hashed_password = result[0]
+    try:
+        dogru = check_password(password, hashed_password)
+    except Exception as e:
+        sayac('db.hata', islem='authenticate_user')
+        return False, f"Giriş sırasında bir hata oluştu: {e}"
+    if faz: faz.isaretle('bcrypt')
+    if not dogru:
+        return False, "Hatalı şifre."
+
+    if _hash_rounds(hashed_password) != BCRYPT_ROUNDS:
+        # Kuyruk doluysa yenileme atlanır, bir sonraki girişte tekrar denenir
+        if _bcrypt_submit(_rehash_password, username, password, hashed_password, wait=False) is not None:
+            sayac('db.yeniden_hash', islem='authenticate_user')
+    return True, "Giriş başarılı."
+
+# --- 6. Oturum Anahtarları ---
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=')
+
+def _token_signature(body):
+    return _b64encode(hmac.new(SESSION_SECRET.encode('utf-8'), body, hashlib.sha256).digest())
+
+def _token_version(username):
+    """users.token_version; kullanıcı yoksa ya da veritabanına ulaşılamazsa None."""
+    conn = get_db_connection()
+    if conn is None: return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT token_version FROM users WHERE username = %s", (username,))
+            row = cur.fetchone()
+        return row[0] if row else None
+    except Exception:
+        sayac('db.hata', islem='token_version')
+        logger.exception("Oturum anahtarı sürümü okunamadı (%s)", username)
+        return None
+    finally:
+        release_db_connection(conn)
+
+def issue_session_token(username, ttl=None):
+    """Kullanıcı için imzalı, süreli oturum anahtarı üretir: base64(yük).base64(HMAC-SHA256).
+
+    Yük kullanıcının güncel token_version değerini taşır; okunamazsa anahtar verilmez (None).
+    """
+    version = _token_version(username)
+    if version is None: return None
+    payload = {'u': username, 'v': version, 'exp': int(time.time()) + (SESSION_TOKEN_TTL if ttl is None else ttl)}
+    body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return (body + b'.' + _token_signature(body)).decode('ascii')
+
+def verify_session_token(token):
+    """Anahtar geçerli, süresi dolmamış ve geri alınmamışsa kullanıcı adını, değilse None döndürür.
+
+    İmza ve süre veritabanına gitmeden denetlenir; yalnızca bunları geçen anahtarlar için token_version okunur.
+    """
+    try:
+        body, signature = token.encode('ascii').split(b'.')
+        if not hmac.compare_digest(signature, _token_signature(body)):
+            return None
+        payload = json.loads(base64.urlsafe_b64decode(body + b'=' * (-len(body) % 4)))
+        if payload['exp'] < time.time():
+            return None
+        username, version = payload['u'], payload['v']
+    except (AttributeError, ValueError, KeyError, TypeError):
+        return None
+    if _token_version(username) != version:
+        sayac('db.gecersiz_anahtar', islem='verify_session_token')
+        return None
+    return username
 
-# --- 5. Veri Kaydetme ---
-def save_user_data(username, session_data):
-    """Streamlit session state verilerini JSONB olarak kaydeder."""
+def revoke_session_tokens(username):
+    """Kullanıcıya verilmiş tüm oturum anahtarlarını geçersiz kılar (çıkış); başarılıysa True."""
     conn = get_db_connection()
     if conn is None: return False
-    
-    # Kaydedilecek veriyi temizleme (hassas ve geçici verileri çıkarırız)
-    data_to_save = {k: v for k, v in session_data.items() if not k.startswith("st.") and k not in ['password', 'username', 'logged_in', 'user_id']}
-    
-    # Pandas DataFrame'leri JSON'a dönüştürme
-    for key, value in data_to_save.items():
-        if isinstance(value, pd.DataFrame):
-            data_to_save[key] = value.to_json(orient='split')
-        elif isinstance(value, set):
-            data_to_save[key] = list(value)
-    
-    data_json = json.dumps(data_to_save)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE users SET token_version = token_version + 1 WHERE username = %s", (username,))
+        conn.commit()
+        return True
+    except Exception:
+        sayac('db.hata', islem='revoke_session_tokens')
+        logger.exception("Oturum anahtarları geri alınamadı (%s)", username)
+        return False
+    finally:
+        release_db_connection(conn)
+
+# --- 7. Veri Kaydetme ---
+# Kaydedilmeyen (hassas/geçici) anahtarlar; '_' ile başlayan anahtarlar da iç kullanım içindir.
+KAYIT_DISI_ANAHTARLAR = ['password', 'username', 'logged_in', 'user_id']
+# Son kaydedilen/yüklenen halin anahtar bazlı özetleri ve satır sürümü:
+# {'username': ..., 'format': ..., 'ozetler': {anahtar: özet}, 'version': ...}
+KAYIT_OZETI_ANAHTARI = '_kayit_ozetleri'
+# Kayıt, satır başka bir oturumca değiştirildiği için yapılamadıysa kayıtlı sürüm (bkz. save_user_data)
+KAYIT_CAKISMASI_ANAHTARI = '_kayit_cakismasi'
+# JSON belgede liste olarak saklanan ama oturumda set olan anahtarlar
+SET_ANAHTARLARI = ['tek_seferlik_gelir_isaretleyicisi']
+
+def _session_items(session_data):
+    return (
+        (k, v) for k, v in session_data.items()
+        if not k.startswith("st.") and not k.startswith("_") and k not in KAYIT_DISI_ANAHTARLAR
+    )
+
+def _serialize_value(value):
+    """Session değerini JSON uyumlu hale getirir (DataFrame -> split JSON metni, set -> liste)."""
+    pd = sys.modules.get('pandas') # pandas hiç yüklenmediyse değer DataFrame olamaz
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return value.to_json(orient='split')
+    elif isinstance(value, set):
+        return sorted(value, key=str) # Sıra sabit olsun ki özet değişmesin
+    return value
+
+def _serialize_session(session_data, state_format):
+    """Kaydedilecek her anahtarı, verilen formata göre JSON metni ya da ikili değer olarak kodlar."""
+    if state_format == 'binary':
+        return {k: encode_value(v) for k, v in _session_items(session_data)}
+    return {k: json.dumps(_serialize_value(v), sort_keys=True) for k, v in _session_items(session_data)}
+
+def _hash(encoded):
+    return hashlib.sha1(encoded if isinstance(encoded, bytes) else encoded.encode('utf-8')).hexdigest()
+
+def _json_object(json_texts):
+    """Anahtar -> JSON metni sözlüğünü tek bir JSON nesnesi metnine birleştirir (değerler yeniden kodlanmaz)."""
+    return "{" + ",".join(f"{json.dumps(k)}:{v}" for k, v in json_texts.items()) + "}"
+
+def _content_hash(hashes, state_format):
+    """Kaydın tamamının özeti: anahtar özetlerinden ve formattan türetilir (user_data.content_hash)."""
+    return _hash(state_format + json.dumps(hashes, sort_keys=True))
+
+def _save_plan(username, session_data, force=False):
+    """Oturumu kodlar ve son kayıt/yüklemeyle karşılaştırır; değişiklik yoksa None.
+
+    Plan sözlüğü: encoded, hashes, changed, removed, delta (yalnızca değişen anahtarlar yazılabilir mi),
+    version (oturumun bildiği satır sürümü; bilinmiyorsa None), content_hash, force ve format. İkili anlık
+    görüntünün kayıpsız temsil edemediği bir değer (ör. MultiIndex'li DataFrame) varsa kayıt JSONB'ye düşer.
+    """
+    state_format = DB_STATE_FORMAT
+    try:
+        encoded = _serialize_session(session_data, state_format)
+    except SnapshotError as e:
+        if state_format != 'binary': raise
+        sayac('db.json_geri_donus', islem='save_user_data')
+        logger.warning("İkili anlık görüntü kodlanamadı, JSONB kullanılıyor (%s): %s", username, e)
+        state_format = 'json'
+        encoded = _serialize_session(session_data, state_format)
+    hashes = {k: _hash(v) for k, v in encoded.items()}
+    previous = session_data.get(KAYIT_OZETI_ANAHTARI)
+    same_user = previous is not None and previous.get('username') == username
+    same_layout = same_user and previous.get('format') == state_format
+    changed, removed = encoded, []
+    if same_layout:
+        changed = {k: v for k, v in encoded.items() if previous['ozetler'].get(k) != hashes[k]}
+        removed = [k for k in previous['ozetler'] if k not in encoded]
+        if not changed and not removed and not force:
+            return None
+    return {
+        'encoded': encoded, 'hashes': hashes, 'changed': changed, 'removed': removed,
+        # Yalnızca değişenler, oturumun bildiği sürümdeki belgeye eklenebilir; "üzerine yaz" belgenin tamamını yazar
+        'delta': same_layout and previous.get('version') is not None and not force,
+        'version': previous.get('version') if same_user else None,
+        'content_hash': _content_hash(hashes, state_format), 'force': force, 'format': state_format,
+    }
+
+def _saved(username, session_data, plan, version, state_format, data=None, snapshot=None):
+    """Başarılı kayıttan sonra oturum özetlerini ve okuma önbelleğini günceller."""
+    session_data[KAYIT_OZETI_ANAHTARI] = {
+        'username': username, 'format': state_format, 'ozetler': plan['hashes'], 'version': version,
+    }
+    session_data.pop(KAYIT_CAKISMASI_ANAHTARI, None)
+    if data is None and snapshot is None:
+        _cache_drop(username) # Yazılan belge elde yok (birleştirme/yama): sonraki yükleme satırı yeniden okur
+    else:
+        _cache_put(username, version, data, snapshot)
+
+def save_user_data(username, session_data, force=False):
+    """Streamlit session state verilerini kaydeder (varsayılan: ikili anlık görüntü, DB_STATE_FORMAT='json' ise JSONB).
+
+    Oturumda önceki kaydın/yüklemenin özetleri varsa ve hiçbir anahtar değişmediyse veritabanına gidilmez.
+    Yalnızca değişen anahtarlar yazılır: JSON formatında JSONB birleştirme ile, ikili formatta anlık görüntüye
+    eklenen bir yama ile (yamalar büyüdüğünde anlık görüntü baştan yazılır, bkz. DB_SNAPSHOT_PATCH_RATIO).
+    İlk kayıtta ve "üzerine yaz"da belgenin tamamı yazılır.
+
+    Yazım iyimser eşzamanlılıkla yapılır: satır, oturumun son yüklediği/kaydettiği sürümde değilse (başka bir
+    sekme kaydetmişse) ve içerik farklıysa yazılmaz, False döner ve oturuma KAYIT_CAKISMASI_ANAHTARI altında
+    güncel sürüm yazılır. force=True sürüm denetimini atlar (kayıtlı verinin üzerine yazar).
+
+    Borçlar ya da gelirler değiştiyse user_summary satırı aynı işlemde yenilenir (bkz. _summary_refresh). Özet
+    simülasyonu bağlantı alınmadan önce kaydedilecek içerikten hesaplanır; işlem içinde yalnızca yazılır, böylece
+    bağlantı ve satır kilidi simülasyon boyunca tutulmaz. Yazım tutmazsa hesaplanan özet atılır.
+    """
+    sayac('db.cagri', islem='save_user_data')
+    faz = fazlar('db.sure', islem='save_user_data')
+    plan = _save_plan(username, session_data, force)
+    if faz: faz.isaretle('serilestirme')
+    if plan is None:
+        sayac('db.degismeyen_kayit', islem='save_user_data')
+        return True
+    summary = _summary_refresh(username, session_data, plan)
+    if faz and summary is not None: faz.isaretle('ozet')
+
+    conn = get_db_connection()
+    if faz: faz.isaretle('baglanti')
+    if conn is None: return False
 
+    state_format = plan['format']
+    olcumler = aktif_olcumler()
+    data = snapshot = patch = None
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO user_data (username, data) 
-                VALUES (%s, %s)
-                ON CONFLICT (username) DO UPDATE SET data = EXCLUDED.data;
-                """,
-                (username, data_json)
-            )
+            row = None
+            if plan['delta'] and state_format == 'binary':
+                # Yalnızca değişen anahtarlar: anlık görüntüye yama eklenir; yamalar sınırı aşacaksa tutmaz
+                patch = encode_patch(plan['changed'], plan['removed'])
+                if faz: faz.isaretle('sikistirma')
+                if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(patch), islem='save_user_data', format='binary_delta')
+                cur.execute(
+                    """
+                    UPDATE user_data SET snapshot_patch = COALESCE(snapshot_patch, ''::bytea) || %s,
+                        version = version + 1, content_hash = %s, updated_at = now()
+                    WHERE username = %s AND version = %s AND snapshot IS NOT NULL
+                        AND COALESCE(octet_length(snapshot_patch), 0) + %s <= octet_length(snapshot) * %s
+                    RETURNING version;
+                    """,
+                    (psycopg2.Binary(patch), plan['content_hash'], username, plan['version'], len(patch), DB_SNAPSHOT_PATCH_RATIO)
+                )
+                row = cur.fetchone()
+            elif plan['delta']:
+                # Yalnızca değişen anahtarlar: silinenler çıkarılır, değişenler birleştirilir
+                document = _json_object(plan['changed'])
+                if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(document), islem='save_user_data', format='json_delta')
+                cur.execute(
+                    """
+                    UPDATE user_data SET data = (COALESCE(data, '{}'::jsonb) - %s::text[]) || %s::jsonb, snapshot = NULL,
+                        version = version + 1, content_hash = %s, updated_at = now()
+                    WHERE username = %s AND version = %s AND data IS NOT NULL
+                    RETURNING version;
+                    """,
+                    (plan['removed'], document, plan['content_hash'], username, plan['version'])
+                )
+                row = cur.fetchone()
+
+            if row is None:
+                # İlk kayıt, "üzerine yaz" ya da birleştirme/yama tutmadı: belgenin tamamı yazılır
+                if state_format == 'binary':
+                    snapshot = encode_snapshot(plan['encoded'])
+                    if faz: faz.isaretle('sikistirma')
+                    if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(snapshot), islem='save_user_data', format='binary')
+                else:
+                    data = _json_object(plan['encoded'])
+                    if olcumler: olcumler.boyut_ekle('db.yuk_bayt', len(data), islem='save_user_data', format='json')
+                # İlk kayıt eklenir; var olan satır yalnızca oturumun bildiği sürümdeyse güncellenir
+                cur.execute(
+                    """
+                    INSERT INTO user_data (username, data, snapshot, version, content_hash, updated_at)
+                    VALUES (%s, %s, %s, 1, %s, now())
+                    ON CONFLICT (username) DO UPDATE SET
+                        data = EXCLUDED.data, snapshot = EXCLUDED.snapshot, snapshot_patch = NULL,
+                        content_hash = EXCLUDED.content_hash, version = user_data.version + 1, updated_at = now()
+                    WHERE %s OR user_data.version = %s
+                    RETURNING version;
+                    """,
+                    (username, data, psycopg2.Binary(snapshot) if snapshot is not None else None,
+                     plan['content_hash'], plan['force'], plan['version'])
+                )
+                row = cur.fetchone()
+
+            if row is None:
+                # Satır başka bir oturumca değiştirilmiş: aynı içerik yazılmışsa kayıt gereksizdir, değilse çakışma.
+                # Satır bu arada silinmişse de çakışmadır (sürüm None); "üzerine yaz" satırı yeniden ekler.
+                cur.execute("SELECT version, content_hash FROM user_data WHERE username = %s", (username,))
+                current_version, current_hash = cur.fetchone() or (None, None)
+                conn.rollback()
+                if current_hash != plan['content_hash']:
+                    sayac('db.kayit_cakismasi', islem='save_user_data')
+                    logger.warning("Kayıt çakışması (%s): oturum sürümü %s, kayıtlı sürüm %s", username, plan['version'], current_version)
+                    session_data[KAYIT_CAKISMASI_ANAHTARI] = current_version
+                    return False
+                sayac('db.degismeyen_kayit', islem='save_user_data')
+                _saved(username, session_data, plan, current_version, state_format)
+                return True
+            if summary is not None:
+                _write_summary(cur, username, summary['row'])
         conn.commit()
+        if faz: faz.isaretle('sorgu')
+        if patch is not None and snapshot is None:
+            snapshot = _patched_cache(username, plan['version'], patch)
+        _saved(username, session_data, plan, row[0], state_format, data, snapshot)
         return True
     except Exception as e:
-        st.error(f"Veri kaydetme hatası: {e}")
+        sayac('db.hata', islem='save_user_data')
+        logger.exception("Veri kaydetme hatası (%s)", username)
         return False
     finally:
-        if conn: conn.close()
+        release_db_connection(conn)
+
+# --- 8. Veri Yükleme ---
+def _is_frame_json(value):
+    """to_json(orient='split') ile üretilmiş bir DataFrame metni mi?"""
+    return isinstance(value, str) and value.startswith('{"columns":') and '"data":' in value
+
+def _decode_json_document(document, keys=None):
+    """Eski JSONB belgeyi oturum değerlerine çevirir; özetler ham JSON değerlerinden hesaplanır."""
+    loaded_data = document if isinstance(document, dict) else json.loads(document)
+    if keys is not None:
+        loaded_data = {k: v for k, v in loaded_data.items() if k in keys}
+    hashes = {k: _hash(json.dumps(v, sort_keys=True)) for k, v in loaded_data.items()}
+
+    # JSON'dan yüklenen veriyi tekrar DataFrame ve Set'e dönüştürme
+    for key, value in loaded_data.items():
+        if _is_frame_json(value):
+            import pandas as pd
+            loaded_data[key] = pd.read_json(io.StringIO(value), orient='split')
+        elif key in SET_ANAHTARLARI and isinstance(value, list):
+            loaded_data[key] = set(value)
+    return loaded_data, hashes
+
+def _decode_snapshot_document(snapshot, keys=None):
+    """İkili anlık görüntüyü oturum değerlerine çevirir; özetler kodlanmış değer baytlarından hesaplanır."""
+    items = split_snapshot(snapshot)
+    if keys is not None:
+        items = {k: raw for k, raw in items.items() if k in keys}
+    return {k: decode_value(raw) for k, raw in items.items()}, {k: _hash(raw) for k, raw in items.items()}
+
+def decode_user_row(data, snapshot, keys=None):
+    """user_data satırını (data, snapshot) oturum değerlerine çevirir: (değerler, özetler, format) ya da boş satırda None.
+
+    keys verilirse yalnızca bu anahtarlar çözülür (ör. toplu işlerde 'borclar' ve 'gelirler'; tablolar çözülmez).
+    """
+    if snapshot is not None:
+        return (*_decode_snapshot_document(snapshot, keys), 'binary')
+    if data is not None:
+        return (*_decode_json_document(data, keys), 'json')
+    return None
+
+def _session_from_row(username, data, snapshot, version=None):
+    """Satırı oturum değerlerine çevirir ve yüklenen halin özetlerini ve sürümünü ekler (boş satırda None)."""
+    decoded = decode_user_row(data, snapshot)
+    if decoded is None: return None
+    loaded_data, hashes, stored_format = decoded
+    # Sonraki kayıtların değişmeyen veriyi yeniden yazmaması ve başka sekmenin kaydını ezmemesi için
+    loaded_data[KAYIT_OZETI_ANAHTARI] = {'username': username, 'format': stored_format, 'ozetler': hashes, 'version': version}
+    return loaded_data
+
+# Okuma önbelleği: satırlar kodlanmış halleriyle (JSON metni ya da anlık görüntü baytları) tutulur, her yüklemede
+# yeniden çözülür; böylece oturumlar önbellekteki nesneleri paylaşmaz.
+def _cache_get(username):
+    with _read_cache_lock:
+        entry = _read_cache.get(username)
+        if entry is not None:
+            _read_cache.move_to_end(username)
+        return entry
+
+def _cache_drop(username):
+    global _read_cache_bytes
+    with _read_cache_lock:
+        entry = _read_cache.pop(username, None)
+        if entry is not None:
+            _read_cache_bytes -= entry[3]
+
+def _cache_put(username, version, data, snapshot):
+    global _read_cache_bytes
+    size = len(data) if data is not None else len(snapshot) if snapshot is not None else 0
+    _cache_drop(username)
+    if DB_READ_CACHE_SIZE <= 0 or size > DB_READ_CACHE_BYTES:
+        return
+    with _read_cache_lock:
+        _read_cache[username] = (version, data, snapshot, size)
+        _read_cache_bytes += size
+        while len(_read_cache) > DB_READ_CACHE_SIZE or _read_cache_bytes > DB_READ_CACHE_BYTES:
+            _, old = _read_cache.popitem(last=False)
+            _read_cache_bytes -= old[3]
+
+def _patched_cache(username, version, patch):
+    """Önbellekteki satır version sürümündeyse yama eklenmiş anlık görüntüsü, değilse None."""
+    cached = _cache_get(username)
+    if cached is None or cached[0] != version or cached[2] is None:
+        return None
+    return cached[2] + patch
+
+def _merge_cached_row(username, cached, version, data, snapshot):
+    """Sürüm doğrulayan sorgunun sonucunu önbellekle birleştirir: (version, data, snapshot, önbellekten mi).
+
+    Sürüm önbellektekiyle aynıysa sorgu belgeyi döndürmemiştir, önbellekteki kullanılır; değilse gelen satır
+    önbelleğe yazılır.
+    """
+    if cached is not None and version == cached[0]:
+        return version, cached[1], cached[2], True
+    snapshot = bytes(snapshot) if snapshot is not None else None
+    _cache_put(username, version, data, snapshot)
+    return version, data, snapshot, False
+
+def clear_read_cache():
+    """Okuma önbelleğini boşaltır (testler ve kıyaslamalar için)."""
+    global _read_cache_bytes
+    with _read_cache_lock:
+        _read_cache.clear()
+        _read_cache_bytes = 0
 
-# --- 6. Veri Yükleme ---
 def load_user_data(username):
-    """Kayıtlı simülasyon verilerini DB'den yükler."""
+    """Kayıtlı simülasyon verilerini DB'den yükler (ikili anlık görüntü ya da eski JSONB).
+
+    Satır önbellekteyse sorgu yalnızca sürümü döndürür; sürüm değişmişse belge aynı sorguda gelir.
+    """
+    sayac('db.cagri', islem='load_user_data')
+    faz = fazlar('db.sure', islem='load_user_data')
+    cached = _cache_get(username)
+    cached_version = cached[0] if cached is not None else None
     conn = get_db_connection()
+    if faz: faz.isaretle('baglanti')
     if conn is None: return None
     
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT data FROM user_data WHERE username = %s",
-                (username,)
+                """
+                SELECT version,
+                       CASE WHEN version = %s THEN NULL ELSE data::text END,
+                       CASE WHEN version = %s THEN NULL ELSE snapshot || COALESCE(snapshot_patch, ''::bytea) END
+                FROM user_data WHERE username = %s
+                """,
+                (cached_version, cached_version, username)
             )
             result = cur.fetchone()
-            if result:
-                loaded_data = json.loads(result[0])
-                
-                # JSON'dan yüklenen veriyi tekrar DataFrame ve Set'e dönüştürme
-                # (Sadece ilgili anahtarları kontrol ediyoruz)
-                if 'harcama_kalemleri_df' in loaded_data and isinstance(loaded_data['harcama_kalemleri_df'], str):
-                    loaded_data['harcama_kalemleri_df'] = pd.read_json(loaded_data['harcama_kalemleri_df'], orient='split')
-                if 'tek_seferlik_gelir_isaretleyicisi' in loaded_data and isinstance(loaded_data['tek_seferlik_gelir_isaretleyicisi'], list):
-                    loaded_data['tek_seferlik_gelir_isaretleyicisi'] = set(loaded_data['tek_seferlik_gelir_isaretleyicisi'])
-
-                return loaded_data
+            if faz: faz.isaretle('sorgu')
+        if result is None:
+            _cache_drop(username)
             return None
+        version, data, snapshot, hit = _merge_cached_row(username, cached, *result)
+        if hit:
+            sayac('db.onbellek_isabet', islem='load_user_data')
+        elif faz and (data is not None or snapshot is not None):
+            payload_size = len(snapshot) if snapshot is not None else len(data)
+            stored_format = 'binary' if snapshot is not None else 'json'
+            faz.olcumler.boyut_ekle('db.yuk_bayt', payload_size, islem='load_user_data', format=stored_format)
+        loaded_data = _session_from_row(username, data, snapshot, version)
+        if faz: faz.isaretle('cozme')
+        return loaded_data
+    except Exception as e:
+        sayac('db.hata', islem='load_user_data')
+        logger.exception("Veri yükleme hatası (%s)", username)
+        return None
+    finally:
+        release_db_connection(conn)
+
+# --- 9. Eski JSONB Kayıtların Taşınması ---
+def migrate_user_data_to_snapshot(batch_size=200):
+    """Yalnızca JSONB verisi olan satırları ikili anlık görüntüye taşır (tekrar çalıştırılabilir)."""
+    conn = get_db_connection()
+    if conn is None: return False, "Veritabanı bağlantısı kurulamadı."
+
+    migrated, failed, last_username = 0, 0, ''
+    try:
+        while True:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT username, data FROM user_data
+                    WHERE snapshot IS NULL AND data IS NOT NULL AND username > %s
+                    ORDER BY username LIMIT %s
+                    FOR UPDATE SKIP LOCKED;
+                    """,
+                    (last_username, batch_size)
+                )
+                rows = cur.fetchall()
+                if not rows: break
+                for username, data in rows:
+                    last_username = username
+                    try:
+                        loaded_data, _ = _decode_json_document(data)
+                    except Exception:
+                        failed += 1 # Çözülemeyen satır JSONB olarak kalır
+                        continue
+                    cur.execute(
+                        # Değerler aynı kaldığından sürüm artmaz (açık oturumlar çakışma görmez); özet formata bağlıdır
+                        "UPDATE user_data SET snapshot = %s, snapshot_patch = NULL, data = NULL, content_hash = NULL WHERE username = %s;",
+                        (psycopg2.Binary(encode_state(loaded_data)), username)
+                    )
+                    migrated += 1
+            conn.commit()
+        return True, f"{migrated} kayıt ikili formata taşındı, {failed} kayıt taşınamadı."
     except Exception as e:
-        st.error(f"Veri yükleme hatası: {e}")
+        return False, f"Taşıma hatası: {e}"
+    finally:
+        release_db_connection(conn)
+
+# --- 10. Toplu İşlemler (Sunucu Tarafı İmleç ve Özet Tablosu) ---
+# Toplu işler (bkz. batch_recompute.py) kendi bağlantılarını yönetir; hatalar çağırana yükseltilir.
+
+SUMMARY_COLUMNS = ['ay_sayisi', 'borcsuz_ay', 'toplam_faiz', 'toplam_birikim', 'baslangic_faizli_borc', 'inputs_hash']
+# Aralık sorguları için indekslenen user_summary sütunları
+SUMMARY_INDEXED_COLUMNS = ['ay_sayisi', 'borcsuz_ay', 'toplam_faiz', 'toplam_birikim', 'baslangic_faizli_borc', 'computed_at']
+# Özetin girdileri: yalnızca bu oturum anahtarları değiştiğinde kayıt sırasında özet yeniden hesaplanır
+SUMMARY_INPUT_KEYS = ('borclar', 'gelirler')
+# Uygulamadaki oturumlar strateji seçimini saklamaz; özetler (kayıtta ve toplu yeniden hesaplamada) bu parametrelerle hesaplanır.
+SUMMARY_SIM_PARAMS = {
+    'baslangic_birikim': 0.0, 'aylik_zorunlu_birikim': 0.0, 'faiz_carpani': 1.0,
+    'agresiflik_carpan': 1.0, 'birikim_artis_aylik': 0.0, 'post_debt_birikim_oran': 1.0,
+    'oncelik_stratejisi': 'Avalanche',
+}
+
+def summary_row(username, borclar, gelirler, sim_params=None):
+    """Kullanıcının user_summary satırı (username, *SUMMARY_COLUMNS); borç ya da gelir girilmemişse None."""
+    from sim_events import simule_olay_tabanli # Simülasyon motoru yalnızca özet gerektiğinde yüklenir
+    from sim_cache import girdi_ozeti
+    sim_params = SUMMARY_SIM_PARAMS if sim_params is None else sim_params
+    sonuc = simule_olay_tabanli(borclar, gelirler, **sim_params)
+    if sonuc is None:
+        return None
+    return (
+        username, int(sonuc['ay_sayisi']), int(sonuc['borcsuz_ay']) or None, float(sonuc['toplam_faiz']),
+        float(sonuc['toplam_birikim']), float(sonuc['baslangic_faizli_borc']),
+        girdi_ozeti(borclar, gelirler, sim_params, simule_olay_tabanli),
+    )
+
+def _summary_refresh(username, session_data, plan):
+    """Kayıtla birlikte yazılacak özet: girdiler değişmediyse None, değiştiyse {'row': satır ya da None (sil)}.
+
+    Simülasyon hata verirse kayıt engellenmez; özet yazılmaz ve sonraki toplu yeniden hesaplamaya kalır.
+    """
+    if not any(k in plan['changed'] or k in plan['removed'] for k in SUMMARY_INPUT_KEYS):
+        return None
+    try:
+        return {'row': summary_row(username, session_data.get('borclar') or [], session_data.get('gelirler') or [])}
+    except Exception:
+        sayac('db.hata', islem='summary_row')
+        logger.exception("Özet hesaplama hatası (%s)", username)
+        return None
+
+def _summary_upsert_sql(values):
+    """user_summary'ye ekleme/güncelleme sorgusu; values yer tutucu metnidir (ör. '%s' ya da '($1, ..., $7)')."""
+    columns = ", ".join(SUMMARY_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in SUMMARY_COLUMNS)
+    return f"""
+        INSERT INTO user_summary (username, {columns}) VALUES {values}
+        ON CONFLICT (username) DO UPDATE SET {updates}, computed_at = now();
+    """
+
+def _write_summary(cur, username, row):
+    """Kaydın işlemi içinde özet satırını yazar; row None ise (borç/gelir kalmadıysa) özet silinir."""
+    if row is None:
+        cur.execute("DELETE FROM user_summary WHERE username = %s;", (username,))
+    else:
+        cur.execute(_summary_upsert_sql("(" + ", ".join(["%s"] * len(row)) + ")"), row)
+
+def iter_user_data_rows(conn, after_username='', itersize=1000):
+    """user_data satırlarını kullanıcı adı sırasıyla sunucu tarafı imleçle okur; (username, data, snapshot) üretir.
+
+    Satırlar itersize'lık parçalar halinde çekilir, bellek kullanımı tablo boyutundan bağımsızdır. snapshot
+    yamalarıyla birlikte, süreçler arasında taşınabilsin diye bayt olarak döner. İmleç conn'un açık işlemi içinde yaşar; okuma
+    bitene kadar bu bağlantıda commit yapılmamalıdır.
+    """
+    with conn.cursor(name='user_data_tarama') as cur:
+        cur.itersize = itersize
+        cur.execute(
+            """
+            SELECT username, data, snapshot || COALESCE(snapshot_patch, ''::bytea) FROM user_data
+            WHERE username > %s ORDER BY username
+            """,
+            (after_username,)
+        )
+        for username, data, snapshot in cur:
+            yield username, data, (bytes(snapshot) if snapshot is not None else None)
+
+def upsert_user_summaries(conn, rows, page_size=500, deleted=()):
+    """(username, *SUMMARY_COLUMNS) satırlarını user_summary'ye toplu olarak yazar ve commit eder.
+
+    deleted kullanıcılarının (borç/gelir kalmamış) özetleri aynı işlemde silinir; kayıttaki _write_summary gibi.
+    """
+    if not rows and not deleted: return 0
+    with conn.cursor() as cur:
+        if rows:
+            extras.execute_values(cur, _summary_upsert_sql("%s"), rows, page_size=page_size)
+        if deleted:
+            cur.execute("DELETE FROM user_summary WHERE username = ANY(%s);", (list(deleted),))
+    conn.commit()
+    return len(rows)
+
+# --- 11. Özet Sorguları (Panolar) ---
+# Kullanıcı genelindeki sorgular user_data belgelerini çözüp simüle etmez; küçük user_summary satırlarını
+# SUMMARY_INDEXED_COLUMNS üzerindeki indekslerle tarar. Hatalar diğer okuma fonksiyonlarındaki gibi None ile bildirilir.
+
+def _summary_filter(column, low, high):
+    """column için [low, high] aralık koşulu ve parametreleri; column indeksli sütunlardan biri olmalıdır."""
+    if column not in SUMMARY_INDEXED_COLUMNS:
+        raise ValueError(f"İndekssiz özet sütunu: {column}")
+    conditions, params = [], []
+    if low is not None:
+        conditions.append(sql.SQL("{} >= %s").format(sql.Identifier(column)))
+        params.append(low)
+    if high is not None:
+        conditions.append(sql.SQL("{} <= %s").format(sql.Identifier(column)))
+        params.append(high)
+    where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+    return where, params
+
+def query_user_summaries(column='ay_sayisi', low=None, high=None, limit=100, descending=False):
+    """column değeri [low, high] aralığındaki kullanıcıların özetlerini column sırasıyla döndürür (sözlük listesi).
+
+    Örn. planı ufku aşan kullanıcılar: query_user_summaries('ay_sayisi', low=361); en yüksek faizliler:
+    query_user_summaries('toplam_faiz', descending=True, limit=20).
+    """
+    where, params = _summary_filter(column, low, high)
+    query = sql.SQL(
+        "SELECT username, {columns}, computed_at FROM user_summary{where} ORDER BY {column} {direction}, username LIMIT %s"
+    ).format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, SUMMARY_COLUMNS)), where=where,
+        column=sql.Identifier(column), direction=sql.SQL("DESC" if descending else "ASC"),
+    )
+    conn = get_db_connection()
+    if conn is None: return None
+    try:
+        with conn.cursor(cursor_factory=extras.RealDictCursor) as cur:
+            cur.execute(query, (*params, limit))
+            return [dict(row) for row in cur.fetchall()]
+    except Exception:
+        sayac('db.hata', islem='query_user_summaries')
+        logger.exception("Özet sorgu hatası (%s)", column)
+        return None
+    finally:
+        release_db_connection(conn)
+
+def summary_statistics(column=None, low=None, high=None):
+    """Özet tablosundan toplu istatistikler; column verilirse yalnızca [low, high] aralığındaki kullanıcılar sayılır.
+
+    Kullanıcı sayısı, ay sayısı / toplam faiz / toplam birikim ortalamaları ve medyanları, en büyük ay sayısı ve
+    faizli borçları ufuk içinde kapanmayan kullanıcı sayısı döner.
+    """
+    where, params = _summary_filter(column, low, high) if column is not None else (sql.SQL(""), [])
+    query = sql.SQL("""
+        SELECT count(*) AS kullanici_sayisi,
+            avg(ay_sayisi) AS ort_ay_sayisi, max(ay_sayisi) AS maks_ay_sayisi,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY ay_sayisi) AS medyan_ay_sayisi,
+            avg(toplam_faiz) AS ort_toplam_faiz,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY toplam_faiz) AS medyan_toplam_faiz,
+            avg(toplam_birikim) AS ort_toplam_birikim,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY toplam_birikim) AS medyan_toplam_birikim,
+            count(*) FILTER (WHERE borcsuz_ay IS NULL) AS borcsuz_olmayan
+        FROM user_summary{where}
+    """).format(where=where)
+    conn = get_db_connection()
+    if conn is None: return None
+    try:
+        with conn.cursor(cursor_factory=extras.RealDictCursor) as cur:
+            cur.execute(query, params)
+            return {k: (float(v) if v is not None and k.startswith(('ort_', 'medyan_')) else v) for k, v in cur.fetchone().items()}
+    except Exception:
+        sayac('db.hata', islem='summary_statistics')
+        logger.exception("Özet istatistik hatası")
         return None
     finally:
-        if conn: conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,194 @@
+# metrics.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+# --- ÖLÇÜM AYARLARI ---
+# Ölçüm isteğe bağlıdır: METRICS_ENABLED=1 değilse uygulama ölçüm nesnesi kurmaz ve kütüphane kodundaki
+# her ölçüm noktası tek bir ContextVar okumasından ibarettir.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0").lower() in ("1", "true", "evet")
+
+_aktif = contextvars.ContextVar('olcumler', default=None)
+
+# --- 1. Ölçüm Deposu ---
+
+def _anahtar(isim, etiketler):
+    return (isim, tuple(sorted(etiketler.items())))
+
+class Olcumler:
+    """Bir oturumun ölçümleri: süreler ve boyutlar (sayı/toplam/en büyük) ile sayaçlar; anahtar isim + etiketler."""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self.sureler = {}  # (isim, etiketler) -> [sayı, toplam saniye, en büyük saniye]
+        self.boyutlar = {} # (isim, etiketler) -> [sayı, toplam bayt, en büyük bayt]
+        self.sayaclar = {} # (isim, etiketler) -> değer
+        self.baslangic = time.time()
+
+    def _dagilim_ekle(self, hedef, anahtar, deger):
+        with self._kilit:
+            kayit = hedef.get(anahtar)
+            if kayit is None:
+                hedef[anahtar] = [1, deger, deger]
+            else:
+                kayit[0] += 1
+                kayit[1] += deger
+                if deger > kayit[2]: kayit[2] = deger
+
+    def sure_ekle(self, isim, saniye, **etiketler):
+        self._dagilim_ekle(self.sureler, _anahtar(isim, etiketler), saniye)
+
+    def boyut_ekle(self, isim, bayt, **etiketler):
+        self._dagilim_ekle(self.boyutlar, _anahtar(isim, etiketler), bayt)
+
+    def sayac_artir(self, isim, artis=1, **etiketler):
+        anahtar = _anahtar(isim, etiketler)
+        with self._kilit:
+            self.sayaclar[anahtar] = self.sayaclar.get(anahtar, 0) + artis
+
+    def sifirla(self):
+        with self._kilit:
+            self.sureler.clear()
+            self.boyutlar.clear()
+            self.sayaclar.clear()
+            self.baslangic = time.time()
+
+    def satirlar(self):
+        """Tüm ölçümleri düz satır listesi olarak döndürür (tablo ve JSON çıktısı için)."""
+        with self._kilit:
+            satirlar = []
+            for tur, kaynak in (('sure', self.sureler), ('boyut', self.boyutlar)):
+                for (isim, etiketler), (sayi, toplam, maks) in sorted(kaynak.items()):
+                    satirlar.append({
+                        'tur': tur, 'isim': isim, 'etiketler': dict(etiketler),
+                        'sayi': sayi, 'toplam': toplam, 'ortalama': toplam / sayi, 'maks': maks,
+                    })
+            for (isim, etiketler), deger in sorted(self.sayaclar.items()):
+                satirlar.append({'tur': 'sayac', 'isim': isim, 'etiketler': dict(etiketler), 'deger': deger})
+            return satirlar
+
+# --- 2. Ölçüm Noktaları ---
+# Kütüphane kodu (motorlar, db_manager) ölçüm nesnesini parametre olarak almaz; etkin nesne olcum_oturumu ile
+# çalıştırma bağlamına yerleştirilir. Etkin nesne yoksa aşağıdaki fonksiyonlar hiçbir şey yapmaz.
+
+class _BosZamanlayici:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *args): return False
+
+_BOS_ZAMANLAYICI = _BosZamanlayici()
+
+class _Zamanlayici:
+    __slots__ = ('olcumler', 'isim', 'etiketler', 't0')
+
+    def __init__(self, olcumler, isim, etiketler):
+        self.olcumler, self.isim, self.etiketler = olcumler, isim, etiketler
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.olcumler.sure_ekle(self.isim, time.perf_counter() - self.t0, **self.etiketler)
+        return False
+
+class FazZamanlayici:
+    """Ardışık fazları ölçer: her isaretle(faz) çağrısı, önceki işaretten bu yana geçen süreyi o faza yazar."""
+    __slots__ = ('olcumler', 'isim', 'etiketler', 'son')
+
+    def __init__(self, olcumler, isim, etiketler):
+        self.olcumler, self.isim, self.etiketler = olcumler, isim, etiketler
+        self.son = time.perf_counter()
+
+    def isaretle(self, faz):
+        simdi = time.perf_counter()
+        self.olcumler.sure_ekle(self.isim, simdi - self.son, faz=faz, **self.etiketler)
+        self.son = simdi
+
+def aktif_olcumler():
+    """Bağlamdaki ölçüm nesnesi; ölçüm kapalıysa None."""
+    return _aktif.get()
+
+def sure(isim, **etiketler):
+    """with bloğunun süresini ölçer."""
+    olcumler = _aktif.get()
+    if olcumler is None:
+        return _BOS_ZAMANLAYICI
+    return _Zamanlayici(olcumler, isim, etiketler)
+
+def fazlar(isim, **etiketler):
+    """Faz zamanlayıcısı; ölçüm kapalıysa None (sıcak döngülerde 'if faz:' ile denetlenir)."""
+    olcumler = _aktif.get()
+    return None if olcumler is None else FazZamanlayici(olcumler, isim, etiketler)
+
+def sayac(isim, artis=1, **etiketler):
+    olcumler = _aktif.get()
+    if olcumler is not None:
+        olcumler.sayac_artir(isim, artis, **etiketler)
+
+def boyut(isim, bayt, **etiketler):
+    olcumler = _aktif.get()
+    if olcumler is not None:
+        olcumler.boyut_ekle(isim, bayt, **etiketler)
+
+class olcum_oturumu:
+    """with bloğu boyunca verilen ölçüm nesnesini etkin yapar (olcumler None ise ölçüm kapalı kalır)."""
+    __slots__ = ('olcumler', '_jeton')
+
+    def __init__(self, olcumler):
+        self.olcumler = olcumler
+
+    def __enter__(self):
+        self._jeton = _aktif.set(self.olcumler)
+        return self.olcumler
+
+    def __exit__(self, *args):
+        _aktif.reset(self._jeton)
+        return False
+
+# --- 3. Dışa Aktarma ---
+
+def json_olarak(olcumler):
+    return json.dumps(
+        {'baslangic': olcumler.baslangic, 'olcumler': olcumler.satirlar()},
+        ensure_ascii=False, indent=2,
+    )
+
+def _etiket_metni(etiketler):
+    if not etiketler:
+        return ""
+    def kacis(deger):
+        return str(deger).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{k}="{kacis(v)}"' for k, v in etiketler.items()) + "}"
+
+def prometheus_olarak(olcumler, onek="finans", **sabit_etiketler):
+    """Ölçümleri Prometheus metin biçiminde döndürür; süreler ve boyutlar summary (+ en büyük değer gauge) olarak."""
+    satirlar = olcumler.satirlar()
+    cikti = []
+    for tur, metrik, birim_aciklama in (
+        ('sure', f"{onek}_sure_saniye", "Ölçülen işlem süreleri (saniye)"),
+        ('boyut', f"{onek}_boyut_bayt", "Kaydedilen/yüklenen veri boyutları (bayt)"),
+    ):
+        secilen = [s for s in satirlar if s['tur'] == tur]
+        if not secilen:
+            continue
+        cikti += [f"# HELP {metrik} {birim_aciklama}", f"# TYPE {metrik} summary"]
+        for s in secilen:
+            etiket = _etiket_metni({**sabit_etiketler, 'isim': s['isim'], **s['etiketler']})
+            cikti.append(f"{metrik}_count{etiket} {s['sayi']}")
+            cikti.append(f"{metrik}_sum{etiket} {s['toplam']!r}")
+        cikti += [f"# HELP {metrik}_maks En büyük değer", f"# TYPE {metrik}_maks gauge"]
+        for s in secilen:
+            etiket = _etiket_metni({**sabit_etiketler, 'isim': s['isim'], **s['etiketler']})
+            cikti.append(f"{metrik}_maks{etiket} {s['maks']!r}")
+
+    sayaclar = [s for s in satirlar if s['tur'] == 'sayac']
+    if sayaclar:
+        cikti += [f"# HELP {onek}_olay_total Olay sayaçları", f"# TYPE {onek}_olay_total counter"]
+        for s in sayaclar:
+            etiket = _etiket_metni({**sabit_etiketler, 'isim': s['isim'], **s['etiketler']})
+            cikti.append(f"{onek}_olay_total{etiket} {s['deger']}")
+    return "\n".join(cikti) + "\n"
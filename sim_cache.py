@@ -0,0 +1,136 @@
+# sim_cache.py
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sim_engine import simule_borc_planı_np
+from metrics import fazlar, sayac
+
+# --- ÖNBELLEK AYARLARI ---
+# Önbellek süreç genelinde tektir; girdileri aynı olan oturumlar (ör. varsayılan senaryo) aynı sonucu paylaşır.
+SIM_CACHE_MAX_GIRDI = int(os.environ.get("SIM_CACHE_MAX_GIRDI", "256"))
+SIM_CACHE_MAX_BAYT = int(os.environ.get("SIM_CACHE_MAX_BAYT", str(64 * 1024 * 1024)))
+
+# --- 1. Girdi Özeti (İçerik Adresi) ---
+
+def _normalize(deger):
+    """Özet için değerleri kararlı biçime getirir: 1 ile 1.0 aynı, set'ler sıralı, NumPy skalerleri Python tipinde."""
+    if isinstance(deger, bool) or deger is None or isinstance(deger, str):
+        return deger
+    if isinstance(deger, (int, float, np.integer, np.floating)):
+        return float(deger)
+    if isinstance(deger, dict):
+        return {str(k): _normalize(v) for k, v in deger.items()}
+    if isinstance(deger, (set, frozenset)):
+        return sorted((_normalize(v) for v in deger), key=repr)
+    if isinstance(deger, (list, tuple)):
+        return [_normalize(v) for v in deger]
+    return repr(deger)
+
+def girdi_ozeti(borclar, gelirler, sim_params, motor=None):
+    """borclar, gelirler ve sim_params için kararlı bir içerik özeti (SHA-256) üretir."""
+    girdi = {
+        'borclar': _normalize(borclar),
+        'gelirler': _normalize(gelirler),
+        'sim_params': _normalize(sim_params),
+        'motor': f"{motor.__module__}.{motor.__qualname__}" if motor else None,
+    }
+    metin = json.dumps(girdi, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(metin.encode('utf-8')).hexdigest()
+
+def _sonuc_boyutu(sonuc):
+    """Sonucun yaklaşık bellek boyutunu (bayt) tahmin eder."""
+    if sonuc is None:
+        return 0
+    boyut = sys.getsizeof(sonuc)
+    df = sonuc.get('df')
+    pd = sys.modules.get('pandas') # Tablo üretildiyse pandas zaten yüklüdür
+    if pd is not None and isinstance(df, pd.DataFrame):
+        boyut += int(df.memory_usage(deep=True).sum())
+    bakiye = sonuc.get('bakiye')
+    if isinstance(bakiye, np.ndarray):
+        boyut += (bakiye if bakiye.base is None else bakiye.base).nbytes # Görünümse tüm tampon bellekte kalır
+    return boyut
+
+# --- 2. LRU Önbelleği ---
+
+class SonucOnbellegi:
+    """Girdi özetine göre simülasyon sonuçlarını tutan, boyutu sınırlı LRU önbellek (thread-safe)."""
+
+    def __init__(self, max_girdi=SIM_CACHE_MAX_GIRDI, max_bayt=SIM_CACHE_MAX_BAYT):
+        self.max_girdi = max_girdi
+        self.max_bayt = max_bayt
+        self._girdiler = OrderedDict() # özet -> (sonuç, boyut)
+        self._bayt = 0
+        self._kilit = threading.Lock()
+        self.isabet = 0
+        self.iska = 0
+        self.tahliye = 0
+
+    def al(self, ozet):
+        """Özet önbellekteyse sonucu döndürür ve en yeni kullanılan yapar; yoksa None."""
+        with self._kilit:
+            girdi = self._girdiler.get(ozet)
+            if girdi is None:
+                self.iska += 1
+                return None
+            self._girdiler.move_to_end(ozet)
+            self.isabet += 1
+            return girdi[0]
+
+    def koy(self, ozet, sonuc):
+        """Sonucu ekler; sınırlar aşılırsa en eski kullanılan girdiler tahliye edilir."""
+        boyut = _sonuc_boyutu(sonuc)
+        if boyut > self.max_bayt:
+            return
+        with self._kilit:
+            eski = self._girdiler.pop(ozet, None)
+            if eski is not None:
+                self._bayt -= eski[1]
+            self._girdiler[ozet] = (sonuc, boyut)
+            self._bayt += boyut
+            while len(self._girdiler) > self.max_girdi or self._bayt > self.max_bayt:
+                _, (_, eski_boyut) = self._girdiler.popitem(last=False)
+                self._bayt -= eski_boyut
+                self.tahliye += 1
+
+    def temizle(self):
+        with self._kilit:
+            self._girdiler.clear()
+            self._bayt = 0
+
+    def istatistikler(self):
+        """İsabet/ıska/tahliye sayaçlarını ve doluluk bilgisini döndürür."""
+        with self._kilit:
+            toplam = self.isabet + self.iska
+            return {
+                'isabet': self.isabet, 'iska': self.iska, 'tahliye': self.tahliye,
+                'isabet_orani': self.isabet / toplam if toplam else 0.0,
+                'girdi_sayisi': len(self._girdiler), 'bayt': self._bayt,
+            }
+
+SIMULASYON_ONBELLEGI = SonucOnbellegi()
+
+# --- 3. Önbellekli Simülasyon ---
+
+def onbellekli_simule(borclar, gelirler, motor=simule_borc_planı_np, onbellek=None, **sim_params):
+    """Girdileri daha önce simüle edilmişse önbellekteki sonucu, değilse motorun yeni sonucunu döndürür.
+
+    Dönen sonuç oturumlar arasında paylaşılır; çağıranlar sözlüğü veya DataFrame'i yerinde değiştirmemelidir.
+    """
+    onbellek = SIMULASYON_ONBELLEGI if onbellek is None else onbellek
+    faz = fazlar('sim.onbellek_sure')
+    ozet = girdi_ozeti(borclar, gelirler, sim_params, motor)
+    sonuc = onbellek.al(ozet)
+    if faz: faz.isaretle('ozet')
+    sayac('sim.onbellek', sonuc='iska' if sonuc is None else 'isabet')
+    if sonuc is None:
+        sonuc = motor(borclar, gelirler, **sim_params)
+        onbellek.koy(ozet, sonuc)
+        if faz: faz.isaretle('simulasyon')
+    return sonuc
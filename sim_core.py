@@ -0,0 +1,368 @@
+# sim_core.py
+"""Arayüzden bağımsız çekirdek: borç/gelir kalemleri, hesapla_min_odeme ve sözlük tabanlı simülasyon motoru.
+
+Streamlit'e ve pandas'a bağlı değildir (aylık tablo istendiğinde pandas _sonuc_tablosu içinde yüklenir);
+işçi süreçler, toplu işler ve kıyaslamalar uygulamayı içe aktarmadan bu modülü kullanır.
+"""
+
+import copy
+import numpy as np
+from sim_engine import (
+    STRATEJILER, ONCELIK_STRATEJILERI, POST_DEBT_STRATEJILERI, MAKS_AY, SONUC_KOLONLARI,
+    borc_dizileri, gelir_dizileri, nakit_akisi, gider_son_ayi, _sonuc_tablosu,
+)
+from metrics import fazlar
+
+# --- 1. Sabitler ve Kurallar ---
+# STRATEJILER, ONCELIK_STRATEJILERI ve POST_DEBT_STRATEJILERI sim_engine.py'de tanımlıdır; buradan da alınabilir.
+
+# Faiz işlemeyen, ek ödeme almayan ve bakiyesi hiç değişmeyen gider kuralları (kalan_ay boyunca ödenir)
+GIDER_KURALLARI = ('SABIT_GIDER', 'SABIT_TAKSIT_GIDER')
+
+# --- 2. Borç ve Gelir Kalemleri ---
+
+def hesapla_min_odeme(borc, faiz_carpani=1.0):
+    kural = borc.get('min_kural')
+    tutar = borc.get('tutar', 0)
+    
+    if kural in ['SABIT_GIDER', 'SABIT_TAKSIT_GIDER', 'SABIT_TAKSIT_ANAPARA']:
+        return borc.get('sabit_taksit', 0)
+    
+    elif kural == 'ASGARI_FAIZ': # Kredi Kartı
+        asgari_anapara_yuzdesi = borc.get('kk_asgari_yuzdesi', 0)
+        return tutar * asgari_anapara_yuzdesi
+    
+    elif kural in ['FAIZ_ART_ANAPARA', 'FAIZ']: # KMH ve Diğer Faizli
+        zorunlu_anapara_yuzdesi = borc.get('zorunlu_anapara_yuzdesi', 0)
+        return tutar * zorunlu_anapara_yuzdesi
+    
+    return 0
+
+def borc_kalemleri_olustur(isim, faizli_anapara, oncelik_str, borc_tipi, sabit_taksit, kalan_ay, faiz_aylik, kk_asgari_yuzdesi, zorunlu_anapara_yuzdesi, kk_limit=0.0, devam_etme_yuzdesi=0.0):
+    """Borç formunun girdilerinden borç/gider sözlüklerini üretir (kredi kartı iki kalem üretebilir)."""
+    borc_listesi = []
+    final_priority = 1 
+
+    if oncelik_str:
+        priority_val = int(oncelik_str.split('.')[0])
+        final_priority = priority_val + 1000 
+
+    if borc_tipi in ["Sabit Gider (Harcama Sepeti)", "Sabit Kira Gideri", "Ev Kredisi Taksiti"]:
+        kural_type = "SABIT_GIDER"
+        borc_listesi.append({
+            "isim": isim, "tutar": 0, "min_kural": kural_type,
+            "oncelik": 1, "sabit_taksit": sabit_taksit,
+            "kalan_ay": kalan_ay if borc_tipi != "Sabit Kira Gideri" else 99999, 
+            "faiz_aylik": 0, "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": devam_etme_yuzdesi
+        })
+    
+    elif borc_tipi == "Kredi Kartı":
+        if sabit_taksit > 0 and kalan_ay > 0:
+            borc_listesi.append({
+                "isim": f"{isim} (Taksitler)", "tutar": sabit_taksit * kalan_ay, "min_kural": "SABIT_TAKSIT_GIDER",
+                "oncelik": 1, "sabit_taksit": sabit_taksit, "kalan_ay": kalan_ay, 
+                "faiz_aylik": 0, "kk_asgari_yuzdesi": 0, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
+            })
+        if faizli_anapara > 0:
+             borc_listesi.append({
+                "isim": f"{isim} (Dönem Borcu)", "tutar": faizli_anapara, "min_kural": "ASGARI_FAIZ", 
+                "oncelik": final_priority, "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": kk_asgari_yuzdesi,
+                "kalan_ay": 99999, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
+            })
+    
+    elif borc_tipi == "Ek Hesap (KMH)":
+        borc_listesi.append({
+            "isim": isim, "tutar": faizli_anapara, "min_kural": "FAIZ_ART_ANAPARA", "oncelik": final_priority,
+            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0.0, "zorunlu_anapara_yuzdesi": zorunlu_anapara_yuzdesi,
+            "kalan_ay": 99999, "limit": kk_limit, "devam_etme_yuzdesi": 0.0
+        })
+
+    elif borc_tipi == "Kredi (Sabit Taksit)":
+        borc_listesi.append({
+            "isim": isim, "tutar": faizli_anapara, "min_kural": "SABIT_TAKSIT_ANAPARA", "oncelik": final_priority,
+            "sabit_taksit": sabit_taksit, "kalan_ay": kalan_ay,
+            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0, "limit": 0, "devam_etme_yuzdesi": 0.0
+        })
+        
+    elif borc_tipi == "Diğer Faizli Borç":
+        borc_listesi.append({
+            "isim": isim, "tutar": faizli_anapara, "min_kural": "FAIZ", "oncelik": final_priority,
+            "faiz_aylik": faiz_aylik, "kk_asgari_yuzdesi": 0, "kalan_ay": 99999, "limit": 0, "devam_etme_yuzdesi": 0.0
+        })
+
+    return borc_listesi
+
+def gelir_kalemi_olustur(isim, tutar, baslangic_ay, artis_yuzdesi, tek_seferlik):
+    """Gelir formunun girdilerinden gelir sözlüğünü üretir (artis_yuzdesi yüzde olarak verilir)."""
+    return {
+        "isim": isim, "tutar": tutar, "baslangic_ay": baslangic_ay,
+        "artis_yuzdesi": artis_yuzdesi / 100.0, "tek_seferlik": tek_seferlik
+    }
+
+# --- 3. Simülasyon Motoru (simule_borc_planı) ---
+
+# Erken durdurma koşulları: her ay sonunda (satir, durum) ile çağrılır. durum anahtarları:
+# 'ay_sayisi', 'birikim' (yuvarlanmamış), 'faizli_borc_kaldi' (ay sonunda 1 TL'den büyük faizli borç var mı),
+# 'bakiye' (borçların ay sonu bakiyeleri, borclar_initial sırasıyla).
+
+def borcsuz_olunca():
+    """Faizli borçların tamamı kapandığı ay durur."""
+    return lambda satir, durum: not durum['faizli_borc_kaldi']
+
+def birikim_hedefine_ulasinca(hedef):
+    """Toplam birikim hedef tutara ulaştığı ay durur."""
+    return lambda satir, durum: durum['birikim'] >= hedef
+
+def _tampon_satiri(tampon, i):
+    """Sütun tamponlarındaki i. ayı simule_borc_planı tablosundaki satır sözlüğüne çevirir."""
+    kolonlar = tampon['kolonlar']
+    return {
+        'Ay': f"Ay {i + 1}", 'Toplam Gelir': round(kolonlar['Toplam Gelir'][i]),
+        'Toplam Zorunlu Giderler': round(kolonlar['Toplam Zorunlu Giderler'][i]),
+        'Min. Borç Ödemeleri': round(kolonlar['Min. Borç Ödemeleri'][i]),
+        'Ek Ödeme Gücü (Borca Giden)': round(kolonlar['Ek Ödeme Gücü (Borca Giden)'][i]),
+        'Aylık Birikim Katkısı': round(kolonlar['Aylık Birikim Katkısı'][i]),
+        'Kapanan Borçlar': tampon['kapananlar'][i],
+        'Kalan Faizli Borç Toplamı': round(tampon['bakiye'][i] @ tampon['faizli']),
+        'Toplam Birikim': round(kolonlar['Toplam Birikim'][i]),
+    }
+
+def simule_borc_planı_akisi(borclar_initial, gelirler_initial, dur=None, parca_boyutu=12, parca_geri_cagirma=None, satir_uret=True, **sim_params):
+    """simule_borc_planı'nın aylık satırlarını hesaplandıkça üreten jeneratör.
+
+    Her ayın değerleri ufuk boyunca önceden ayrılmış sütunlara ve (ay × borç) bakiye matrisine yazılır; satır
+    sözlükleri yalnızca üretilirken bu tamponlardan kurulur. dur tek bir koşul ya da koşul listesidir; herhangi biri
+    True dönerse o ayın satırı üretildikten sonra durulur. parca_geri_cagirma verilirse her parca_boyutu ayda bir
+    (ve sonda kalanlar için) son ayların satır listesiyle çağrılır (ör. grafiği aşamalı güncellemek için).
+    satir_uret=False ise hiç satır üretilmez; yalnızca dönüş değeri kullanılır.
+
+    Jeneratörün dönüş değeri (StopIteration.value) simule_borc_planı'nın özet anahtarları, 'erken_durdu' ve
+    'tampon'dur ('kolonlar', 'kapananlar', 'bakiye', 'faizli'; ilk ay_sayisi satırı geçerlidir).
+    Girdi boşsa hiç satır üretilmez ve None döner.
+    """
+    if not borclar_initial or not gelirler_initial:
+        return None
+
+    kosullar = [] if dur is None else list(dur) if isinstance(dur, (list, tuple)) else [dur]
+    faz = fazlar('sim.sure', motor='dict')
+    mevcut_borclar = copy.deepcopy(borclar_initial)
+    
+    ay_sayisi = 0
+    mevcut_birikim = sim_params.get('baslangic_birikim', 0.0)
+    birikime_ayrilan = sim_params.get('aylik_zorunlu_birikim', 0.0)
+    faiz_carpani = sim_params.get('faiz_carpani', 1.0)
+    agresiflik_carpan = sim_params.get('agresiflik_carpan', 1.0)
+    birikim_artis_aylik = sim_params.get('birikim_artis_aylik', 0.0) / 12 / 100 
+    post_debt_birikim_oran = sim_params.get('post_debt_birikim_oran', 1.0) # YENİ PARAMETRE
+    
+    toplam_faiz_maliyeti = 0.0
+    faizli_borclar = [b for b in mevcut_borclar if b.get('min_kural') not in GIDER_KURALLARI]
+    baslangic_faizli_borc = sum(b['tutar'] for b in faizli_borclar)
+
+    # Gelirler ve sabit giderler borçlardan bağımsızdır: aylık toplamları zaman çizelgesinden okunur (tek seferlik
+    # gelirler yalnızca başladıkları ay, giderler kalan_ay boyunca). Tutarı 1 TL'den büyük giderler bitiş aylarına
+    # kadar döngüyü açık tutar.
+    borc = borc_dizileri(borclar_initial)
+    akis = nakit_akisi(borc, gelir_dizileri(gelirler_initial))
+    gelir_akisi, gider_akisi = akis['gelir'], akis['gider']
+    gider_son = int(gider_son_ayi(borc, borc['tutar']))
+
+    # Aktif borç dizini: bakiyesi 0'dan büyük faizli borçlar, öncelik sırasıyla. Bakiyesi 0 ya da altına inen borç
+    # hiçbir adımda yeniden değişmediği için dizinden çıkarılır; aylık döngülerin maliyeti açık borç sayısıyla ölçeklenir.
+    # Sıralama kararlı olduğundan alt kümeyi sıralamak tüm listeyi sıralamakla aynı göreli sırayı verir. Sıra yalnızca
+    # Snowball'da ve aynı faizli borçları olan Avalanche'ta aydan aya değişebilir; diğer durumlarda bir kez sıralanır.
+    aktif = [b for b in faizli_borclar if b['tutar'] > 0]
+    oncelik_stratejisi = sim_params['oncelik_stratejisi']
+    if oncelik_stratejisi == 'Avalanche':
+        sira_anahtari, ters = (lambda x: (x['faiz_aylik'], x['tutar'])), True
+        sira_degisken = len({b['faiz_aylik'] for b in aktif}) < len(aktif)
+    elif oncelik_stratejisi == 'Snowball':
+        sira_anahtari, ters = (lambda x: x['tutar']), False
+        sira_degisken = True
+    else:
+        sira_anahtari, ters = (lambda x: x['oncelik']), False
+        sira_degisken = False
+    sira_hazir = False
+
+    # Sonuç tamponları: ufuk boyunca önceden ayrılır, yuvarlama ve tablo kurma sonda bir kez yapılır.
+    # Bakiye matrisi borclar_initial sırasını izler; aktif dizin öncelik sırasında tutulur.
+    borc_sirasi = list(mevcut_borclar)
+    sutun = {id(b): j for j, b in enumerate(borc_sirasi)}
+    onceki_bakiye = np.array([b['tutar'] for b in borc_sirasi], dtype=float)
+    tampon = {
+        'kolonlar': {kolon: np.empty(MAKS_AY + 1) for kolon in SONUC_KOLONLARI},
+        'kapananlar': ['-'] * (MAKS_AY + 1),
+        'bakiye': np.empty((MAKS_AY + 1, len(borc_sirasi))),
+        'faizli': np.array([b.get('min_kural') not in GIDER_KURALLARI for b in borc_sirasi], dtype=float),
+    }
+    kolonlar, bakiye = tampon['kolonlar'], tampon['bakiye']
+    
+    parca = []
+    erken_durdu = False
+    if faz: faz.isaretle('hazirlik')
+    
+    while ay_sayisi < gider_son or any(b['tutar'] > 1 for b in aktif) or ay_sayisi < 1:
+        ay_sayisi += 1
+        
+        # 1. Gelir Hesaplama
+        toplam_gelir = float(gelir_akisi[ay_sayisi - 1])
+
+        # 2. Minimum Borç Ödemeleri ve Sabit Giderler
+        zorunlu_gider_toplam = birikime_ayrilan + float(gider_akisi[ay_sayisi - 1])
+        min_borc_odeme_toplam = 0.0
+        
+        acik_borclar = [b for b in aktif if b['tutar'] > 1]
+        for borc in acik_borclar:
+            min_borc_odeme_toplam += hesapla_min_odeme(borc, faiz_carpani)
+
+        # 3. Ek Ödeme Gücü Hesaplama
+        kalan_nakit = toplam_gelir - zorunlu_gider_toplam - min_borc_odeme_toplam
+        saldırı_gucu = max(0, kalan_nakit * agresiflik_carpan)
+        
+        # --- BORÇ BİTİŞİ SONRASI YÖNETİMİ ---
+        faizli_borc_kaldi_mi = bool(acik_borclar)
+        
+        if not faizli_borc_kaldi_mi:
+            # Borçlar bittiğinde, Ek Ödeme Gücü'nü Post-Debt Stratejisine göre yönet
+            saldırı_gucu = max(0, kalan_nakit) # Agresiflik 1.0'a döner
+            
+            birikime_giden_pay = saldırı_gucu * post_debt_birikim_oran
+            harcamaya_giden_pay = saldırı_gucu * (1 - post_debt_birikim_oran)
+            
+            saldırı_gucu = birikime_giden_pay 
+            zorunlu_gider_toplam += harcamaya_giden_pay 
+            
+        # --- BORÇ BİTİŞİ SONRASI YÖNETİMİ BİTİŞİ ---
+
+        # 4. Borçlara Ödeme Uygulama (Faiz ve Min. Ödeme)
+        # 0 < tutar <= 1 olan borçlar da faiz ve min. ödeme görmeye devam eder (ek ödeme almasalar da)
+        kapanan_var = False
+        for borc in aktif:
+            etkilenen_faiz_orani = borc['faiz_aylik'] * faiz_carpani 
+            eklenen_faiz = borc['tutar'] * etkilenen_faiz_orani 
+            toplam_faiz_maliyeti += eklenen_faiz
+            
+            min_odeme = hesapla_min_odeme(borc, faiz_carpani)
+            
+            borc['tutar'] += eklenen_faiz 
+            borc['tutar'] -= min_odeme
+            
+            if borc['min_kural'] == 'SABIT_TAKSIT_ANAPARA' and borc['kalan_ay'] > 0:
+                 borc['kalan_ay'] -= 1
+            if borc['tutar'] <= 0:
+                kapanan_var = True
+        
+        # 5. Ek Ödeme Gücünü Uygulama (Önceliğe Göre Sıralama)
+        saldırı_kalan = saldırı_gucu
+
+        # Sıralama mantığı (Avalanche/Snowball/Kullanıcı Tanımlı): yalnızca sıra değişebiliyorsa yeniden sıralanır
+        if faizli_borc_kaldi_mi and (sira_degisken or not sira_hazir):
+            aktif.sort(key=sira_anahtari, reverse=ters)
+            sira_hazir = True
+
+        # Ek Ödemeyi Uygula
+        kapanan_borclar_listesi = []
+        for borc in aktif:
+            if saldırı_kalan <= 0:
+                break
+            if borc['tutar'] > 1:
+                odecek_tutar = min(saldırı_kalan, borc['tutar'])
+                borc['tutar'] -= odecek_tutar
+                saldırı_kalan -= odecek_tutar
+                
+                if borc['tutar'] <= 1:
+                     kapanan_borclar_listesi.append(borc['isim'])
+                     borc['tutar'] = 0
+        
+        # 6. Kalan Ek Ödeme Gücünü Birikime Aktarma
+        mevcut_birikim += saldırı_kalan
+        mevcut_birikim *= (1 + birikim_artis_aylik)
+
+
+        # 7. Sonuçları Kaydetme (yuvarlama ve 'Kalan Faizli Borç Toplamı' sonda, bakiye matrisinden)
+        i = ay_sayisi - 1
+        kolonlar['Toplam Gelir'][i] = toplam_gelir
+        kolonlar['Toplam Zorunlu Giderler'][i] = zorunlu_gider_toplam
+        kolonlar['Min. Borç Ödemeleri'][i] = min_borc_odeme_toplam
+        kolonlar['Ek Ödeme Gücü (Borca Giden)'][i] = saldırı_gucu
+        kolonlar['Aylık Birikim Katkısı'][i] = birikime_ayrilan + saldırı_kalan
+        kolonlar['Toplam Birikim'][i] = mevcut_birikim
+        if kapanan_borclar_listesi:
+            tampon['kapananlar'][i] = ", ".join(kapanan_borclar_listesi)
+        # Yalnızca açık borçların bakiyesi değişir; kapanmış borçlar ve giderler önceki aydan kopyalanır
+        bakiye[i] = onceki_bakiye
+        bakiye[i, [sutun[id(b)] for b in aktif]] = [b['tutar'] for b in aktif]
+        onceki_bakiye = bakiye[i]
+        if kapanan_var or kapanan_borclar_listesi:
+            aktif = [b for b in aktif if b['tutar'] > 0]
+
+        if satir_uret or kosullar:
+            satir = _tampon_satiri(tampon, i)
+        if satir_uret:
+            yield satir
+            if parca_geri_cagirma is not None:
+                parca.append(satir)
+                if len(parca) >= parca_boyutu:
+                    parca_geri_cagirma(parca)
+                    parca = []
+
+        if kosullar:
+            durum = {
+                'ay_sayisi': ay_sayisi, 'birikim': mevcut_birikim, 'bakiye': bakiye[i],
+                'faizli_borc_kaldi': any(b['tutar'] > 1 for b in aktif),
+            }
+            if any(kosul(satir, durum) for kosul in kosullar):
+                erken_durdu = True
+                break
+
+        if ay_sayisi > MAKS_AY: break
+
+    if parca:
+        parca_geri_cagirma(parca)
+    if faz:
+        faz.isaretle('ay_dongusu')
+        faz.olcumler.sayac_artir('sim.ay', ay_sayisi, motor='dict')
+
+    return {
+        "ay_sayisi": ay_sayisi, "toplam_faiz": round(toplam_faiz_maliyeti),
+        "toplam_birikim": round(mevcut_birikim), "baslangic_faizli_borc": round(baslangic_faizli_borc),
+        "erken_durdu": erken_durdu, "tampon": tampon,
+    }
+
+def akisi_tuket(akis, satirlar=None):
+    """Jeneratörü sonuna kadar çalıştırıp dönüş değerini döndürür; satirlar listesi verilirse satırlar ona eklenir."""
+    while True:
+        try:
+            satir = next(akis)
+        except StopIteration as bitis:
+            return bitis.value
+        if satirlar is not None:
+            satirlar.append(satir)
+
+def simule_borc_planı(borclar_initial, gelirler_initial, **sim_params):
+    """Borç planını simüle eder; 'df' aylık tablo, 'bakiye' (ay × borç) borç bakiyeleri (borclar_initial sırasıyla)."""
+    ozet = akisi_tuket(simule_borc_planı_akisi(borclar_initial, gelirler_initial, satir_uret=False, **sim_params))
+    if ozet is None:
+        return None
+
+    faz = fazlar('sim.sure', motor='dict')
+    ay_sayisi, tampon = ozet['ay_sayisi'], ozet['tampon']
+    bakiye = tampon['bakiye'][:ay_sayisi]
+    tampon['kolonlar']['Kalan Faizli Borç Toplamı'][:ay_sayisi] = bakiye @ tampon['faizli']
+    df = _sonuc_tablosu(ay_sayisi, tampon['kolonlar'], tampon['kapananlar'][:ay_sayisi])
+    if faz: faz.isaretle('sonuc_tablosu')
+
+    return {
+        "df": df, "ay_sayisi": ay_sayisi,
+        "toplam_faiz": ozet['toplam_faiz'], "toplam_birikim": ozet['toplam_birikim'],
+        "baslangic_faizli_borc": ozet['baslangic_faizli_borc'], "bakiye": bakiye,
+    }
+
+def borc_bitis_ayi(borclar_initial, gelirler_initial, **sim_params):
+    """Faizli borçların kapandığı ayı aylık tablo kurmadan bulur; ufuk içinde kapanmıyorsa None."""
+    ozet = akisi_tuket(simule_borc_planı_akisi(
+        borclar_initial, gelirler_initial, dur=borcsuz_olunca(), satir_uret=False, **sim_params
+    ))
+    if ozet is None or not ozet['erken_durdu']:
+        return None
+    return ozet['ay_sayisi']
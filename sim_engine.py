@@ -0,0 +1,508 @@
+# sim_engine.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from metrics import fazlar
+
+# --- 1. Sabitler ve Kurallar ---
+
+STRATEJILER = {
+    "Minimum Çaba (Minimum Ek Ödeme)": 0.0,
+    "Temkinli (Yüzde 50)": 0.5,
+    "Maksimum Çaba (Tüm Ek Ödeme)": 1.0, 
+    "Aşırı Çaba (x1.5 Ek Ödeme)": 1.5,   
+}
+
+ONCELIK_STRATEJILERI = {
+    "Borç Çığı (Avalanche - Önce Faiz)": "Avalanche",
+    "Borç Kartopu (Snowball - Önce Tutar)": "Snowball",
+    "Kullanıcı Tanımlı Sıra": "Kullanici"
+}
+
+POST_DEBT_STRATEJILERI = {
+    "Tamamı Birikime Yönlendir": 1.0,
+    "Yarı Yarıya (50% Birikim / 50% Harcama)": 0.5,
+    "Hepsini Harcama Bütçesine Ekle (0% Birikim)": 0.0,
+}
+
+# min_kural metinleri her ay tekrar tekrar karşılaştırılmasın diye tamsayı koduna çevrilir.
+
+KURAL_KODLARI = {
+    'SABIT_GIDER': 0,
+    'SABIT_TAKSIT_GIDER': 1,
+    'SABIT_TAKSIT_ANAPARA': 2,
+    'ASGARI_FAIZ': 3,
+    'FAIZ_ART_ANAPARA': 4,
+    'FAIZ': 5,
+}
+BILINMEYEN_KURAL = 6 # hesapla_min_odeme bu kurallar için 0 döndürür
+
+GIDER_KODLARI = (KURAL_KODLARI['SABIT_GIDER'], KURAL_KODLARI['SABIT_TAKSIT_GIDER'])
+SABIT_ODEME_KODLARI = GIDER_KODLARI + (KURAL_KODLARI['SABIT_TAKSIT_ANAPARA'],)
+
+MAKS_AY = 360
+# Bitişi olmayan kalemlerin kalan_ay değeri (borc_kalemleri_olustur kira ve faizli borçlara bunu yazar)
+SURESIZ_AY = 99999
+
+# Nakit akışı zaman çizelgesi önbelleğindeki en fazla girdi (girdi başına birkaç KB)
+NAKIT_AKISI_ONBELLEK = int(os.environ.get("NAKIT_AKISI_ONBELLEK", "256"))
+
+# --- 2. Dizi Dönüşümleri ---
+
+def borc_dizileri(borclar):
+    """Borç sözlüklerini paralel NumPy dizilerine dönüştürür."""
+    kural = np.array([KURAL_KODLARI.get(b.get('min_kural'), BILINMEYEN_KURAL) for b in borclar], dtype=np.int8)
+    sabit_taksit = np.array([b.get('sabit_taksit', 0) for b in borclar], dtype=float)
+
+    # hesapla_min_odeme'deki yüzde: ASGARI_FAIZ için kk_asgari_yuzdesi, FAIZ/FAIZ_ART_ANAPARA için zorunlu_anapara_yuzdesi
+    yuzde = np.array([
+        b.get('kk_asgari_yuzdesi', 0) if k == KURAL_KODLARI['ASGARI_FAIZ']
+        else b.get('zorunlu_anapara_yuzdesi', 0) if k in (KURAL_KODLARI['FAIZ_ART_ANAPARA'], KURAL_KODLARI['FAIZ'])
+        else 0
+        for b, k in zip(borclar, kural)
+    ], dtype=float)
+
+    gider = np.isin(kural, GIDER_KODLARI)
+    kalan_ay = np.array([b.get('kalan_ay', 0) for b in borclar], dtype=np.int64)
+    return {
+        'isim': [b.get('isim', '') for b in borclar],
+        'tutar': np.array([b.get('tutar', 0) for b in borclar], dtype=float),
+        'faiz_aylik': np.array([b.get('faiz_aylik', 0) for b in borclar], dtype=float),
+        'kural': kural,
+        'sabit_odeme': np.where(np.isin(kural, SABIT_ODEME_KODLARI), sabit_taksit, 0.0),
+        'yuzde': yuzde,
+        'kalan_ay': kalan_ay,
+        # Giderlerin ödendiği son ay (1'den başlar); kalan_ay girilmemişse gider süresizdir
+        'gider_bitis': np.where(kalan_ay > 0, kalan_ay, SURESIZ_AY),
+        'oncelik': np.array([b.get('oncelik', 1) for b in borclar], dtype=float),
+        'gider': gider,
+        'faizli': ~gider,
+    }
+
+def gelir_dizileri(gelirler):
+    """Gelir sözlüklerini paralel NumPy dizilerine dönüştürür."""
+    return {
+        'tutar': np.array([g['tutar'] for g in gelirler], dtype=float),
+        'baslangic_ay': np.array([g['baslangic_ay'] for g in gelirler], dtype=float),
+        'artis_yuzdesi': np.array([g['artis_yuzdesi'] for g in gelirler], dtype=float),
+        'tek_seferlik': np.array([bool(g.get('tek_seferlik', False)) for g in gelirler], dtype=bool),
+    }
+
+def min_odeme_dizisi(borc):
+    """hesapla_min_odeme'nin dizi karşılığı (faiz_carpani orada da kullanılmaz)."""
+    return borc['sabit_odeme'] + borc['tutar'] * borc['yuzde']
+
+def _sira_degisken_mi(borc, strateji):
+    """Öncelik sırası aydan aya değişebilir mi? Kullanıcı sırası ve faizleri farklı Avalanche sabittir."""
+    if strateji == 'Snowball':
+        return True
+    if strateji == 'Avalanche':
+        faizler = borc['faiz_aylik'][borc['faizli']]
+        return len(np.unique(faizler)) < len(faizler)
+    return False
+
+def _oncelik_sirasi(sira, borc, strateji):
+    """Mevcut sırayı stratejiye göre kararlı (stable) biçimde yeniden sıralar; list.sort ile aynı sonucu verir."""
+    if strateji == 'Avalanche':
+        # sort(key=(faiz, tutar), reverse=True): eşitlerde mevcut sıra korunur
+        yeni = np.lexsort((-borc['tutar'][sira], -borc['faiz_aylik'][sira]))
+    elif strateji == 'Snowball':
+        yeni = np.argsort(borc['tutar'][sira], kind='stable')
+    else:
+        yeni = np.argsort(borc['oncelik'][sira], kind='stable')
+    return sira[yeni]
+
+# --- 3. Vektörel Simülasyon Motoru ---
+
+SONUC_KOLONLARI = [
+    'Toplam Gelir', 'Toplam Zorunlu Giderler', 'Min. Borç Ödemeleri', 'Ek Ödeme Gücü (Borca Giden)',
+    'Aylık Birikim Katkısı', 'Kalan Faizli Borç Toplamı', 'Toplam Birikim',
+]
+
+def gelir_degerleri(gelir, aylar):
+    """Verilen ay numaraları (1'den başlar) için toplam geliri hesaplar; aylar tek bir sayı da olabilir.
+
+    Tek seferlik gelirler yalnızca başladıkları ay ödenir.
+    """
+    aylar = np.asarray(aylar, dtype=float)[..., None]
+    gecen = aylar - gelir['baslangic_ay']
+    odenen = (gecen >= 0) & ~(gelir['tek_seferlik'] & (gecen >= 1))
+    artis_carpan = (1 + gelir['artis_yuzdesi']) ** (np.where(odenen, gecen, 0) / 12)
+    return np.where(odenen, gelir['tutar'] * artis_carpan, 0.0).sum(axis=-1)
+
+def aylik_gelir_dizisi(gelir, ay_sayisi):
+    """1..ay_sayisi ayları için toplam geliri tek seferde hesaplar."""
+    return gelir_degerleri(gelir, np.arange(1, ay_sayisi + 1))
+
+def aylik_gider_dizisi(borc, ay_sayisi):
+    """1..ay_sayisi ayları için sabit gider toplamı; SABIT_GIDER ve SABIT_TAKSIT_GIDER gider_bitis ayına kadar ödenir."""
+    gider = borc['gider']
+    aylar = np.arange(1, ay_sayisi + 1)[:, None]
+    return (aylar <= borc['gider_bitis'][gider]) @ borc['sabit_odeme'][gider]
+
+def gider_son_ayi(borc, tutar):
+    """Giderlerin döngüyü açık tuttuğu son ay: tutarı 1 TL'den büyük giderlerin en geç bitişi (yoksa 0).
+
+    tutar (N,) ya da (S, N) olabilir; giderlerin bakiyesi simülasyon boyunca değişmez.
+    """
+    return np.where(borc['gider'] & (tutar > 1), borc['gider_bitis'], 0).max(axis=-1, initial=0)
+
+# Zaman çizelgesi önbelleği: aynı borç/gelir setiyle yapılan strateji çalıştırmaları aylık akışı yeniden hesaplamaz
+_nakit_akisi_onbellegi = OrderedDict()
+_nakit_akisi_kilidi = threading.Lock()
+
+def nakit_akisi(borc, gelir, ay_sayisi=MAKS_AY + 1):
+    """1..ay_sayisi ayları için aylık 'gelir' ve 'gider' (sabit giderler) dizilerini ve giderin bir önceki aydan
+    farklı olduğu ayları ('gider_degisimi', 1'den başlar) döndürür (salt okunur).
+
+    Sonuç yalnızca gelirlere ve giderlerin taksit/bitiş aylarına bağlıdır; önbellekten paylaşıldığı için
+    diziler yerinde değiştirilemez.
+    """
+    g = borc['gider']
+    anahtar = (
+        ay_sayisi, gelir['tutar'].tobytes(), gelir['baslangic_ay'].tobytes(), gelir['artis_yuzdesi'].tobytes(),
+        gelir['tek_seferlik'].tobytes(), borc['sabit_odeme'][g].tobytes(), borc['gider_bitis'][g].tobytes(),
+    )
+    with _nakit_akisi_kilidi:
+        akis = _nakit_akisi_onbellegi.get(anahtar)
+        if akis is not None:
+            _nakit_akisi_onbellegi.move_to_end(anahtar)
+            return akis
+
+    akis = {'gelir': aylik_gelir_dizisi(gelir, ay_sayisi), 'gider': aylik_gider_dizisi(borc, ay_sayisi)}
+    akis['gider_degisimi'] = np.flatnonzero(np.diff(akis['gider'])) + 2
+    for dizi in akis.values():
+        dizi.flags.writeable = False
+    with _nakit_akisi_kilidi:
+        _nakit_akisi_onbellegi[anahtar] = akis
+        while len(_nakit_akisi_onbellegi) > NAKIT_AKISI_ONBELLEK:
+            _nakit_akisi_onbellegi.popitem(last=False)
+    return akis
+
+def _sonuc_tablosu(ay_sayisi, kolonlar, kapananlar):
+    """Aylık sonuç dizilerini yuvarlayıp simule_borc_planı ile aynı DataFrame'e dönüştürür."""
+    import pandas as pd # Yalnızca tablo istendiğinde; özet yeten işler (toplu hesaplama, tarama) pandas yüklemez
+    # Sayısal sütunlar tek seferde ayrılan bir int64 bloğuna yuvarlanır ve sütunları pandas'a kopyalanmadan verilir.
+    # round() ile np.round aynı (yarımları çifte) yuvarlamayı yapar.
+    tamsayi = np.empty((ay_sayisi, len(SONUC_KOLONLARI)), dtype=np.int64, order='F')
+    for j, kolon in enumerate(SONUC_KOLONLARI):
+        tamsayi[:, j] = np.round(kolonlar[kolon][:ay_sayisi])
+    yuvarlanmis = dict(zip(SONUC_KOLONLARI, tamsayi.T))
+    return pd.DataFrame({
+        'Ay': [f"Ay {ay}" for ay in range(1, ay_sayisi + 1)],
+        'Toplam Gelir': yuvarlanmis['Toplam Gelir'],
+        'Toplam Zorunlu Giderler': yuvarlanmis['Toplam Zorunlu Giderler'],
+        'Min. Borç Ödemeleri': yuvarlanmis['Min. Borç Ödemeleri'],
+        'Ek Ödeme Gücü (Borca Giden)': yuvarlanmis['Ek Ödeme Gücü (Borca Giden)'],
+        'Aylık Birikim Katkısı': yuvarlanmis['Aylık Birikim Katkısı'],
+        'Kapanan Borçlar': kapananlar,
+        'Kalan Faizli Borç Toplamı': yuvarlanmis['Kalan Faizli Borç Toplamı'],
+        'Toplam Birikim': yuvarlanmis['Toplam Birikim'],
+    }, copy=False)
+
+def simule_borc_planı_np(borclar_initial, gelirler_initial, **sim_params):
+    """simule_borc_planı ile aynı sonucu veren, borçları paralel dizilerde tutan motor."""
+    if not borclar_initial or not gelirler_initial:
+        return None
+
+    faz = fazlar('sim.sure', motor='np')
+    borc = borc_dizileri(borclar_initial)
+    tutar = borc['tutar']
+    faizli = borc['faizli']
+    faizli_carpan = faizli.astype(float)
+    isimler = borc['isim']
+    sira = np.arange(len(isimler))
+
+    ay_sayisi = 0
+    mevcut_birikim = float(sim_params.get('baslangic_birikim', 0.0))
+    birikime_ayrilan = sim_params.get('aylik_zorunlu_birikim', 0.0)
+    faiz_carpani = sim_params.get('faiz_carpani', 1.0)
+    agresiflik_carpan = sim_params.get('agresiflik_carpan', 1.0)
+    birikim_artis_aylik = sim_params.get('birikim_artis_aylik', 0.0) / 12 / 100
+    post_debt_birikim_oran = sim_params.get('post_debt_birikim_oran', 1.0)
+    oncelik_stratejisi = sim_params.get('oncelik_stratejisi')
+
+    etkilenen_faiz_orani = borc['faiz_aylik'] * faiz_carpani
+    akis = nakit_akisi(borc, gelir_dizileri(gelirler_initial))
+    gider_son = int(gider_son_ayi(borc, tutar))
+    taksitli_anapara = borc['kural'] == KURAL_KODLARI['SABIT_TAKSIT_ANAPARA']
+    taksitli_anapara_var = np.count_nonzero(taksitli_anapara) > 0
+    sira_degisken = _sira_degisken_mi(borc, oncelik_stratejisi)
+    sira_hazir = False
+
+    toplam_faiz_maliyeti = 0.0
+    baslangic_faizli_borc = float(tutar @ faizli_carpan)
+
+    kolonlar = {kolon: np.empty(MAKS_AY + 1) for kolon in SONUC_KOLONLARI}
+    kapananlar = []
+    bakiye = np.empty((MAKS_AY + 1, len(isimler))) # ay × borç, borclar_initial sırasıyla
+    acik = tutar > 1
+    if faz: faz.isaretle('hazirlik')
+
+    # Giderler bitiş aylarına kadar döngüyü açık tutar (bakiyeleri değişmez)
+    while ay_sayisi < 1 or ay_sayisi < gider_son or np.count_nonzero(acik & faizli):
+        ay_sayisi += 1
+
+        # 1. Gelir Hesaplama (zaman çizelgesinden)
+        toplam_gelir = float(akis['gelir'][ay_sayisi - 1])
+
+        # 2. Minimum Borç Ödemeleri ve Sabit Giderler
+        acik_faizli = acik & faizli
+        min_odeme = min_odeme_dizisi(borc)
+        zorunlu_gider_toplam = birikime_ayrilan + float(akis['gider'][ay_sayisi - 1])
+        min_borc_odeme_toplam = float(min_odeme @ acik_faizli)
+
+        # 3. Ek Ödeme Gücü Hesaplama
+        kalan_nakit = toplam_gelir - zorunlu_gider_toplam - min_borc_odeme_toplam
+        saldırı_gucu = max(0, kalan_nakit * agresiflik_carpan)
+
+        faizli_borc_kaldi_mi = np.count_nonzero(acik_faizli) > 0
+        if not faizli_borc_kaldi_mi:
+            saldırı_gucu = max(0, kalan_nakit)
+            birikime_giden_pay = saldırı_gucu * post_debt_birikim_oran
+            harcamaya_giden_pay = saldırı_gucu * (1 - post_debt_birikim_oran)
+            saldırı_gucu = birikime_giden_pay
+            zorunlu_gider_toplam += harcamaya_giden_pay
+
+        # 4. Faiz ve Min. Ödeme (tüm faizli borçlara aynı anda)
+        islenen = faizli & (tutar > 0)
+        eklenen_faiz = tutar * etkilenen_faiz_orani
+        toplam_faiz_maliyeti += float(eklenen_faiz @ islenen)
+        tutar[:] = np.where(islenen, tutar + eklenen_faiz - min_odeme, tutar)
+        if taksitli_anapara_var:
+            np.subtract(borc['kalan_ay'], 1, out=borc['kalan_ay'], where=islenen & taksitli_anapara & (borc['kalan_ay'] > 0))
+
+        # 5. Ek Ödeme Gücünü Uygulama (Önceliğe Göre Sıralama)
+        # Sıra yalnızca tutara bağlı olduğunda (Snowball ya da eşit faizli Avalanche) her ay yeniden kurulur.
+        if faizli_borc_kaldi_mi and (sira_degisken or not sira_hazir):
+            sira = _oncelik_sirasi(sira, borc, oncelik_stratejisi)
+            sira_hazir = True
+
+        saldırı_kalan = saldırı_gucu
+        kapanan_borclar_listesi = []
+        if saldırı_kalan > 0:
+            hedef = sira[(faizli & (tutar > 1))[sira]]
+            if hedef.size and tutar[hedef[0]] - saldırı_kalan > 1:
+                # Sık görülen durum: ek ödemenin tamamı ilk borca gider ve borç kapanmaz
+                tutar[hedef[0]] -= saldırı_kalan
+                saldırı_kalan = 0.0
+            elif hedef.size:
+                hedef_tutar = tutar[hedef]
+                # Sırayla ödeme: her borca, öncekilerden arta kalan tutar kadar ödenir
+                onceki_odemeler = np.cumsum(hedef_tutar) - hedef_tutar
+                odenen = np.clip(saldırı_kalan - onceki_odemeler, 0, hedef_tutar)
+                yeni_tutar = hedef_tutar - odenen
+                kapanan = yeni_tutar <= 1
+                yeni_tutar[kapanan] = 0
+                tutar[hedef] = yeni_tutar
+                saldırı_kalan -= float(odenen.sum())
+                kapanan_borclar_listesi = [isimler[i] for i in hedef[kapanan]]
+
+        # 6. Kalan Ek Ödeme Gücünü Birikime Aktarma
+        mevcut_birikim += saldırı_kalan
+        mevcut_birikim *= (1 + birikim_artis_aylik)
+
+        # 7. Sonuçları Kaydetme (yuvarlama sonda, tek seferde yapılır)
+        i = ay_sayisi - 1
+        kolonlar['Toplam Gelir'][i] = toplam_gelir
+        kolonlar['Toplam Zorunlu Giderler'][i] = zorunlu_gider_toplam
+        kolonlar['Min. Borç Ödemeleri'][i] = min_borc_odeme_toplam
+        kolonlar['Ek Ödeme Gücü (Borca Giden)'][i] = saldırı_gucu
+        kolonlar['Aylık Birikim Katkısı'][i] = birikime_ayrilan + saldırı_kalan
+        kolonlar['Kalan Faizli Borç Toplamı'][i] = tutar @ faizli_carpan
+        kolonlar['Toplam Birikim'][i] = mevcut_birikim
+        bakiye[i] = tutar
+        kapananlar.append(", ".join(kapanan_borclar_listesi) if kapanan_borclar_listesi else '-')
+
+        if ay_sayisi > MAKS_AY: break
+        acik = tutar > 1
+
+    if faz: faz.isaretle('ay_dongusu')
+    df = _sonuc_tablosu(ay_sayisi, kolonlar, kapananlar)
+    if faz:
+        faz.isaretle('sonuc_tablosu')
+        faz.olcumler.sayac_artir('sim.ay', ay_sayisi, motor='np')
+
+    return {
+        "df": df, "ay_sayisi": ay_sayisi,
+        "toplam_faiz": round(toplam_faiz_maliyeti), "toplam_birikim": round(mevcut_birikim),
+        "baslangic_faizli_borc": round(baslangic_faizli_borc), "bakiye": bakiye[:ay_sayisi],
+    }
+
+# --- 4. Toplu (Senaryo × Borç) Simülasyon Çekirdeği ---
+
+# Öncelik stratejisi kodları; bunların dışındaki her değer kullanıcı tanımlı sıra demektir.
+ONCELIK_KODLARI = {'Avalanche': 0, 'Snowball': 1}
+KULLANICI_SIRASI = 2
+
+def parametre_dizileri(senaryolar):
+    """sim_params sözlüklerinden oluşan listeyi senaryo başına parametre dizilerine dönüştürür."""
+    def dizi(anahtar, varsayilan):
+        return np.array([p.get(anahtar, varsayilan) for p in senaryolar], dtype=float)
+    return {
+        'baslangic_birikim': dizi('baslangic_birikim', 0.0),
+        'aylik_zorunlu_birikim': dizi('aylik_zorunlu_birikim', 0.0),
+        'faiz_carpani': dizi('faiz_carpani', 1.0),
+        'agresiflik_carpan': dizi('agresiflik_carpan', 1.0),
+        'birikim_artis_aylik': dizi('birikim_artis_aylik', 0.0),
+        'post_debt_birikim_oran': dizi('post_debt_birikim_oran', 1.0),
+        'oncelik': np.array([ONCELIK_KODLARI.get(p.get('oncelik_stratejisi'), KULLANICI_SIRASI) for p in senaryolar]),
+    }
+
+def _sira_degisken_mi_toplu(faiz_aylik, faizli, strateji):
+    """Öncelik sırası aydan aya değişebilir mi? Kullanıcı sırası ve faizleri farklı Avalanche sabittir."""
+    faizler = np.sort(faiz_aylik[:, faizli], axis=1)
+    esit_faiz_var = (np.diff(faizler, axis=1) == 0).any(axis=1)
+    return (strateji == ONCELIK_KODLARI['Snowball']) | ((strateji == ONCELIK_KODLARI['Avalanche']) & esit_faiz_var)
+
+def _oncelik_sirasi_toplu(sira, tutar, faiz_aylik, oncelik, gruplar, satirlar):
+    """Seçili satırların sırasını stratejiye göre kararlı (stable) biçimde yeniden kurar; list.sort ile aynı sonucu verir."""
+    for kod, grup in gruplar:
+        r = grup[satirlar[grup]]
+        if not r.size:
+            continue
+        s = sira[r]
+        if kod == ONCELIK_KODLARI['Avalanche']:
+            # sort(key=(faiz, tutar), reverse=True): eşitlerde mevcut sıra korunur
+            yeni = np.lexsort((-np.take_along_axis(tutar[r], s, 1), -np.take_along_axis(faiz_aylik[r], s, 1)), axis=-1)
+        elif kod == ONCELIK_KODLARI['Snowball']:
+            yeni = np.argsort(np.take_along_axis(tutar[r], s, 1), axis=1, kind='stable')
+        else:
+            yeni = np.argsort(np.take_along_axis(oncelik[r], s, 1), axis=1, kind='stable')
+        sira[r] = np.take_along_axis(s, yeni, 1)
+
+def simule_toplu(borc, gelir_akisi, parametreler, kayit=False, gider_akisi=None):
+    """Aynı borç listesini S senaryo için birlikte simüle eder; her satır bir simule_borc_planı çağrısına denktir.
+
+    Tek senaryoda simule_borc_planı_np daha hızlıdır; bu çekirdek strateji taraması gibi çok senaryolu işler içindir.
+
+    borc['tutar'], borc['faiz_aylik'] ve borc['oncelik'] (N,) ya da (S, N), gelir_akisi (T,) ya da (S, T) olabilir.
+    parametreler['faiz_carpani'] (S,) ya da aydan aya değişen faiz için (S, T) olabilir. gider_akisi (T,) aylık
+    sabit gider toplamıdır; verilmezse borçlardan aylik_gider_dizisi ile kurulur (nakit_akisi ikisini birlikte verir).
+    Sonuçlar yuvarlanmamış (S,) dizilerdir; kayit=True ise aylık kolonlar (S, T) ve kapanış olayları da döner.
+    """
+    S = len(parametreler['agresiflik_carpan'])
+    N = len(borc['isim'])
+    tutar = np.array(np.broadcast_to(borc['tutar'], (S, N)), dtype=float)
+    faiz_aylik = np.broadcast_to(borc['faiz_aylik'], (S, N))
+    oncelik = np.broadcast_to(borc['oncelik'], (S, N))
+    gelir_akisi = np.broadcast_to(gelir_akisi, (S, np.shape(gelir_akisi)[-1]))
+    faizli = borc['faizli']
+    faizli_carpan = faizli.astype(float)
+    sabit_odeme, yuzde = borc['sabit_odeme'], borc['yuzde']
+
+    birikime_ayrilan = parametreler['aylik_zorunlu_birikim']
+    agresiflik_carpan = parametreler['agresiflik_carpan']
+    birikim_artis_aylik = parametreler['birikim_artis_aylik'] / 12 / 100
+    post_debt_birikim_oran = parametreler['post_debt_birikim_oran']
+    strateji = parametreler['oncelik']
+
+    faiz_carpani = parametreler['faiz_carpani']
+    aylik_faiz_carpani = faiz_carpani.ndim == 2
+    if not aylik_faiz_carpani:
+        etkilenen_faiz_orani = faiz_aylik * faiz_carpani[:, None]
+    if gider_akisi is None:
+        gider_akisi = aylik_gider_dizisi(borc, np.shape(gelir_akisi)[-1])
+    gider_son = gider_son_ayi(borc, tutar)
+    sira = np.tile(np.arange(N), (S, 1))
+    sira_degisken = _sira_degisken_mi_toplu(faiz_aylik, faizli, strateji)
+    sira_hazir = np.zeros(S, dtype=bool)
+    gruplar = [(kod, np.flatnonzero(strateji == kod)) for kod in np.unique(strateji)]
+
+    mevcut_birikim = parametreler['baslangic_birikim'].astype(float)
+    toplam_faiz_maliyeti = np.zeros(S)
+    baslangic_faizli_borc = tutar @ faizli_carpan
+    ay_sayisi = np.zeros(S, dtype=np.int64)
+    borcsuz_ay = np.zeros(S, dtype=np.int64)
+
+    if kayit:
+        kolonlar = {kolon: np.zeros((S, MAKS_AY + 1)) for kolon in SONUC_KOLONLARI}
+        kapanislar = []
+
+    devam = np.ones(S, dtype=bool)
+    acik = tutar > 1
+    ay = 0
+    while ay <= MAKS_AY:
+        if ay > 0:
+            devam &= (acik & faizli).any(axis=1) | (ay < gider_son)
+            if not devam.any(): break
+        ay += 1
+        d = devam[:, None]
+
+        # 1. Gelir Hesaplama
+        toplam_gelir = gelir_akisi[:, ay - 1]
+        zorunlu_gider = birikime_ayrilan + gider_akisi[ay - 1]
+
+        # 2. Minimum Borç Ödemeleri ve Sabit Giderler
+        acik_faizli = acik & faizli
+        min_odeme = sabit_odeme + tutar * yuzde
+        min_borc_odeme_toplam = np.where(acik_faizli, min_odeme, 0.0).sum(axis=1)
+
+        # 3. Ek Ödeme Gücü Hesaplama (borçlar bittiyse Post-Debt stratejisi)
+        kalan_nakit = toplam_gelir - zorunlu_gider - min_borc_odeme_toplam
+        faizli_borc_kaldi_mi = acik_faizli.any(axis=1)
+        serbest_nakit = np.maximum(0, kalan_nakit)
+        saldırı_gucu = np.where(faizli_borc_kaldi_mi, np.maximum(0, kalan_nakit * agresiflik_carpan),
+                                serbest_nakit * post_debt_birikim_oran)
+        zorunlu_gider_toplam = np.where(faizli_borc_kaldi_mi, zorunlu_gider,
+                                        zorunlu_gider + serbest_nakit * (1 - post_debt_birikim_oran))
+
+        # 4. Faiz ve Min. Ödeme
+        if aylik_faiz_carpani:
+            etkilenen_faiz_orani = faiz_aylik * faiz_carpani[:, ay - 1, None]
+        islenen = faizli & (tutar > 0) & d
+        eklenen_faiz = tutar * etkilenen_faiz_orani
+        toplam_faiz_maliyeti += np.where(islenen, eklenen_faiz, 0.0).sum(axis=1)
+        tutar = np.where(islenen, tutar + eklenen_faiz - min_odeme, tutar)
+
+        # 5. Ek Ödeme Gücünü Uygulama (Önceliğe Göre Sıralama)
+        siralanacak = devam & faizli_borc_kaldi_mi & (sira_degisken | ~sira_hazir)
+        if siralanacak.any():
+            _oncelik_sirasi_toplu(sira, tutar, faiz_aylik, oncelik, gruplar, siralanacak)
+            sira_hazir |= siralanacak
+
+        saldırı_kalan = np.where(devam, saldırı_gucu, 0.0)
+        sirali_tutar = np.take_along_axis(tutar, sira, 1)
+        hedef = faizli[sira] & (sirali_tutar > 1)
+        hedef_tutar = np.where(hedef, sirali_tutar, 0.0)
+        # Sırayla ödeme: her borca, öncekilerden arta kalan tutar kadar ödenir
+        onceki_odemeler = np.cumsum(hedef_tutar, axis=1) - hedef_tutar
+        odenen = np.clip(saldırı_kalan[:, None] - onceki_odemeler, 0, hedef_tutar)
+        yeni_tutar = sirali_tutar - odenen
+        kapanan = hedef & (yeni_tutar <= 1)
+        np.put_along_axis(tutar, sira, np.where(kapanan, 0.0, yeni_tutar), 1)
+        saldırı_kalan -= odenen.sum(axis=1)
+
+        # 6. Kalan Ek Ödeme Gücünü Birikime Aktarma
+        mevcut_birikim = np.where(devam, (mevcut_birikim + saldırı_kalan) * (1 + birikim_artis_aylik), mevcut_birikim)
+
+        ay_sayisi += devam
+        acik = tutar > 1
+        borcsuz_ay = np.where(devam & (borcsuz_ay == 0) & ~(acik & faizli).any(axis=1), ay, borcsuz_ay)
+
+        # 7. Sonuçları Kaydetme
+        if kayit:
+            kolonlar['Toplam Gelir'][:, ay - 1] = toplam_gelir
+            kolonlar['Toplam Zorunlu Giderler'][:, ay - 1] = zorunlu_gider_toplam
+            kolonlar['Min. Borç Ödemeleri'][:, ay - 1] = min_borc_odeme_toplam
+            kolonlar['Ek Ödeme Gücü (Borca Giden)'][:, ay - 1] = saldırı_gucu
+            kolonlar['Aylık Birikim Katkısı'][:, ay - 1] = birikime_ayrilan + saldırı_kalan
+            kolonlar['Kalan Faizli Borç Toplamı'][:, ay - 1] = tutar @ faizli_carpan
+            kolonlar['Toplam Birikim'][:, ay - 1] = mevcut_birikim
+            if kapanan.any():
+                # (senaryo, borç) çiftleri ödeme sırasıyla kaydedilir
+                satir, konum = np.nonzero(kapanan)
+                kapanislar.append((ay, satir, sira[satir, konum]))
+
+    sonuc = {
+        'ay_sayisi': ay_sayisi, 'borcsuz_ay': borcsuz_ay,
+        'toplam_faiz': toplam_faiz_maliyeti, 'toplam_birikim': mevcut_birikim,
+        'baslangic_faizli_borc': baslangic_faizli_borc,
+    }
+    if kayit:
+        sonuc['kolonlar'] = kolonlar
+        sonuc['kapanislar'] = kapanislar
+    return sonuc
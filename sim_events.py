@@ -0,0 +1,510 @@
+# sim_events.py
+
+import math
+import numpy as np
+from sim_engine import (
+    MAKS_AY, SONUC_KOLONLARI, ONCELIK_KODLARI,
+    borc_dizileri, gelir_dizileri, nakit_akisi, gider_son_ayi, _oncelik_sirasi, _sonuc_tablosu,
+)
+from metrics import fazlar
+
+# --- OLAY TABANLI MOTOR ---
+# Ayların çoğu sakindir: bakiyeler bir sonraki olaya (borç kapanışı, gelir başlangıcı, ek ödeme gücünün
+# sıfırlanması, öncelik sırasının değişmesi) kadar sabit bir kuralla ilerler. Aylık gelir ve sabit giderler
+# nakit akışı zaman çizelgesinden okunur. Bu motor olay aylarını
+# simule_borc_planı_np ile aynı adımlarla tek tek işler, aradaki sakin dönemleri ise kapalı formla atlar:
+#   - Hedef dışı her faizli borç t' = (1 + faiz - yüzde)·t - sabit taksit izler; kapanış ayı
+#     bu geometrik dizinin eşiği geçtiği ay olarak doğrudan hesaplanır.
+#   - Ek ödemenin gittiği hedef borç, gelire ve diğer borçlara bağlı tek değişkenli doğrusal bir
+#     özyineleme izler; döngüsüz çözülür ve olaylar parça parça vektörel olarak aranır.
+#   - Faizli borçlar bittikten sonraki dönem (SABIT_TAKSIT_GIDER gibi kalemler bitiş aylarına kadar döngüyü
+#     sürdürür) geometrik toplamlarla sabit giderin değiştiği aya ya da ufka kadar tek adımda atlanır.
+# Aylık satırlar yalnızca sonuc['df'] istendiğinde dönem tanımlarından üretilir.
+
+OLAY_PARCA_MIN = 16  # Olay aranırken ilk bakılan ay sayısı
+OLAY_PARCA_MAKS = 512 # Olay bulunmadıkça parça boyu bu sınıra kadar ikiye katlanır
+
+# --- 1. Kapalı Formlar ---
+
+def _geometrik(oran, n):
+    """Σ_{i<n} oran^i; oran 1'e yakınken de kararlıdır (oran ve n dizi olabilir)."""
+    oran, n = np.broadcast_arrays(np.asarray(oran, dtype=float), np.asarray(n, dtype=float))
+    fark = oran - 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pozitif = np.expm1(n * np.log1p(fark)) / fark
+        genel = (np.power(oran, n) - 1.0) / fark
+    return np.where(fark == 0, n, np.where(oran > 0, pozitif, genel))
+
+def _yol(t0, fark, c, k):
+    """t_{i+1} = (1 + fark)·t_i - c özyinelemesinin kapalı formu (fark = faiz - yüzde; dizi de olabilir).
+
+    Sabit nokta P = c / fark etrafında yazılır: t_k = P + (t0 - P)·(1 + fark)^k. Faizi taksidine eşit bir
+    kredi gibi t0 ≈ P olan yollarda büyük terimler birbirini götürmez; fark sıfıra yakınken geometrik
+    toplam biçimi kullanılır.
+    """
+    fark = np.asarray(fark, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        buyume = np.power(1 + fark, k)
+        sabit_nokta = c / fark
+        return np.where(
+            np.abs(fark) < 1e-6, t0 * buyume - c * _geometrik(1 + fark, k), sabit_nokta + (t0 - sabit_nokta) * buyume
+        )
+
+def _yol_toplami(t0, fark, c, n):
+    """Σ_{k<n} t_k (dönem faizini bulmak için); _yol ile aynı ayrımı yapar."""
+    if abs(fark) < 1e-6:
+        # Σ_{k<n} Σ_{i<k} (1 + fark)^i, küçük fark için seri açılımıyla
+        ic_toplam = n * (n - 1) / 2 + fark * n * (n - 1) * (n - 2) / 6
+        return t0 * float(_geometrik(1 + fark, n)) - c * ic_toplam
+    sabit_nokta = c / fark
+    return sabit_nokta * n + (t0 - sabit_nokta) * float(_geometrik(1 + fark, n))
+
+def _esik_ayi(t0, fark, c, esik, asagi, n_max):
+    """Tekdüze t_k yolunda t_k <= esik (asagi) ya da t_k > esik olduğu ilk k (1..n_max); yoksa n_max + 1."""
+    kosul = (lambda k: _yol(t0, fark, c, k) <= esik) if asagi else (lambda k: _yol(t0, fark, c, k) > esik)
+    if n_max < 1 or not kosul(n_max):
+        return n_max + 1
+
+    # Logaritma ile doğrudan tahmin; yuvarlama hataları için komşu aylar kontrol edilir
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if fark == 0:
+            tahmin = (t0 - esik) / c if c else np.nan
+        else:
+            sabit_nokta = c / fark
+            tahmin = np.log((esik - sabit_nokta) / (t0 - sabit_nokta)) / np.log1p(fark)
+    if np.isfinite(tahmin):
+        k = int(min(max(math.ceil(tahmin), 1), n_max))
+        for aday in (k, k + 1, k - 1):
+            if 1 <= aday <= n_max and kosul(aday) and (aday == 1 or not kosul(aday - 1)):
+                return aday
+
+    alt, ust = 1, n_max # Tahmin tutmazsa ikili arama (yol tekdüze olduğundan koşul bir kez değişir)
+    while alt < ust:
+        orta = (alt + ust) // 2
+        if kosul(orta):
+            ust = orta
+        else:
+            alt = orta + 1
+    return alt
+
+def _dogrusal_yineleme(x0, carpan, girdi, blok=256):
+    """x_{k+1} = carpan·x_k + girdi_k özyinelemesini döngüsüz çözer (carpan > 0); x_0..x_n döner."""
+    n = len(girdi)
+    sonuc = np.empty(n + 1)
+    sonuc[0] = x0
+    if carpan != 1:
+        blok = max(1, min(blok, int(300 / abs(math.log(carpan))))) # carpan^±blok taşmasın
+    for bas in range(0, n, blok):
+        g = girdi[bas:bas + blok]
+        us = carpan ** np.arange(1, len(g) + 1, dtype=float)
+        sonuc[bas + 1:bas + 1 + len(g)] = us * (sonuc[bas] + np.cumsum(g / us))
+    return sonuc
+
+# --- 2. Bağlam ve Tek Ay Adımı ---
+
+def _baglam(borclar_initial, gelirler_initial, sim_params, ay_sayisi):
+    """Simülasyon boyunca değişmeyen dizileri ve parametreleri toplar."""
+    borc = borc_dizileri(borclar_initial)
+    gelir = gelir_dizileri(gelirler_initial)
+    faiz_orani = borc['faiz_aylik'] * sim_params.get('faiz_carpani', 1.0)
+    birikime_ayrilan = sim_params.get('aylik_zorunlu_birikim', 0.0)
+    akis = nakit_akisi(borc, gelir, ay_sayisi)
+    return {
+        'borc': borc, 'gelir': gelir, 'faiz_orani': faiz_orani,
+        'fark': faiz_orani - borc['yuzde'], # Hedef dışı faizli borç: t' = (1 + fark)·t - sabit taksit
+        'birikime_ayrilan': birikime_ayrilan,
+        # Aylık gelir ve sabit gider (i. eleman i + 1. ay); zorunlu gider = birikime_ayrilan + sabit gider
+        'gelir_akisi': akis['gelir'], 'gider_akisi': akis['gider'], 'gider_degisimi': akis['gider_degisimi'],
+        'gider_son': int(gider_son_ayi(borc, borc['tutar'])),
+        'agresiflik': sim_params.get('agresiflik_carpan', 1.0),
+        'post_oran': sim_params.get('post_debt_birikim_oran', 1.0),
+        'birikim_carpani': np.float64(1 + sim_params.get('birikim_artis_aylik', 0.0) / 12 / 100),
+        'strateji': sim_params.get('oncelik_stratejisi'),
+        # Gelir hiç azalmıyorsa (tek seferlik gelir yoksa) borçsuz dönemde serbest nakit en fazla bir kez işaret değiştirir
+        'gelir_artan': bool(
+            (gelir['tutar'] >= 0).all() and (gelir['artis_yuzdesi'] >= 0).all() and not gelir['tek_seferlik'].any()
+        ),
+    }
+
+def _adim(bag, durum):
+    """Bir ayı simule_borc_planı_np ile aynı adımlarla işler ve o ayın satırını döndürür."""
+    borc = bag['borc']
+    faizli = borc['faizli']
+    tutar = durum['tutar']
+    ay = durum['ay'] + 1
+
+    # 1-3. Gelir, minimum ödemeler ve ek ödeme gücü
+    toplam_gelir = float(bag['gelir_akisi'][ay - 1])
+    acik_faizli = (tutar > 1) & faizli
+    min_odeme = borc['sabit_odeme'] + tutar * borc['yuzde']
+    zorunlu_gider_toplam = bag['birikime_ayrilan'] + float(bag['gider_akisi'][ay - 1])
+    min_borc_odeme_toplam = float(min_odeme @ acik_faizli)
+    kalan_nakit = toplam_gelir - zorunlu_gider_toplam - min_borc_odeme_toplam
+    saldırı_gucu = max(0, kalan_nakit * bag['agresiflik'])
+
+    faizli_borc_kaldi_mi = np.count_nonzero(acik_faizli) > 0
+    if not faizli_borc_kaldi_mi:
+        saldırı_gucu = max(0, kalan_nakit)
+        birikime_giden_pay = saldırı_gucu * bag['post_oran']
+        zorunlu_gider_toplam += saldırı_gucu * (1 - bag['post_oran'])
+        saldırı_gucu = birikime_giden_pay
+
+    # 4. Faiz ve Min. Ödeme
+    islenen = faizli & (tutar > 0)
+    eklenen_faiz = tutar * bag['faiz_orani']
+    durum['faiz'] += float(eklenen_faiz @ islenen)
+    tutar[:] = np.where(islenen, tutar + eklenen_faiz - min_odeme, tutar)
+
+    # 5. Ek Ödeme Gücünü Uygulama (Önceliğe Göre Sıralama)
+    if faizli_borc_kaldi_mi:
+        durum['sira'] = _oncelik_sirasi(durum['sira'], dict(borc, tutar=tutar), bag['strateji'])
+    sira = durum['sira']
+
+    saldırı_kalan = saldırı_gucu
+    kapanan_borclar_listesi = []
+    if saldırı_kalan > 0:
+        hedef = sira[(faizli & (tutar > 1))[sira]]
+        if hedef.size:
+            hedef_tutar = tutar[hedef]
+            onceki_odemeler = np.cumsum(hedef_tutar) - hedef_tutar
+            odenen = np.clip(saldırı_kalan - onceki_odemeler, 0, hedef_tutar)
+            yeni_tutar = hedef_tutar - odenen
+            kapanan = yeni_tutar <= 1
+            yeni_tutar[kapanan] = 0
+            tutar[hedef] = yeni_tutar
+            saldırı_kalan -= float(odenen.sum())
+            kapanan_borclar_listesi = [borc['isim'][i] for i in hedef[kapanan]]
+
+    # 6. Kalan Ek Ödeme Gücünü Birikime Aktarma
+    durum['birikim'] = (durum['birikim'] + saldırı_kalan) * bag['birikim_carpani']
+    durum['ay'] = ay
+
+    return {
+        'Toplam Gelir': toplam_gelir,
+        'Toplam Zorunlu Giderler': zorunlu_gider_toplam,
+        'Min. Borç Ödemeleri': min_borc_odeme_toplam,
+        'Ek Ödeme Gücü (Borca Giden)': saldırı_gucu,
+        'Aylık Birikim Katkısı': bag['birikime_ayrilan'] + saldırı_kalan,
+        'Kalan Faizli Borç Toplamı': float(tutar @ faizli),
+        'Toplam Birikim': durum['birikim'],
+        'Kapanan Borçlar': ", ".join(kapanan_borclar_listesi) if kapanan_borclar_listesi else '-',
+    }
+
+# --- 3. Sakin Dönemler ---
+
+def _dort_sonrasi(bag, tutar, islenen):
+    """4. adımdan (faiz ve min. ödeme) sonraki bakiyeler; tutar (N,) ya da (ay, N) olabilir."""
+    borc = bag['borc']
+    min_odeme = borc['sabit_odeme'] + tutar * borc['yuzde']
+    return np.where(islenen, tutar + tutar * bag['faiz_orani'] - min_odeme, tutar)
+
+def _donem_kur(bag, durum):
+    """Mevcut durumdan başlayan sakin dönemin yapısını kurar; ilk ay tam adım gerektiriyorsa None döner."""
+    borc = bag['borc']
+    faizli = borc['faizli']
+    tutar = durum['tutar']
+    acik = tutar > 1
+    if not acik.any():
+        return None # Döngü bu aydan sonra biter
+    islenen = faizli & (tutar > 0)
+    acik_faizli = acik & faizli
+
+    donem = {
+        'ay': durum['ay'], 'tutar': tutar.copy(), 'birikim': durum['birikim'],
+        'acik': acik, 'islenen': islenen, 'borclu': bool(acik_faizli.any()), 'pozitif': False, 'hedef': None,
+    }
+    if not donem['borclu']:
+        return donem
+
+    kalan_nakit = (
+        float(bag['gelir_akisi'][durum['ay']]) - bag['birikime_ayrilan'] - float(bag['gider_akisi'][durum['ay']])
+        - float((borc['sabit_odeme'] + tutar * borc['yuzde']) @ acik_faizli)
+    )
+    ek_odeme = kalan_nakit * bag['agresiflik']
+    donem['pozitif'] = ek_odeme > 0
+
+    sonraki = _dort_sonrasi(bag, tutar, islenen)
+    durum['sira'] = _oncelik_sirasi(durum['sira'], dict(borc, tutar=sonraki), bag['strateji'])
+    sira = durum['sira']
+    donem['sira_no'] = np.argsort(sira)
+    if not donem['pozitif']:
+        return donem
+
+    aday = sira[(faizli & (sonraki > 1))[sira]]
+    if not aday.size or sonraki[aday[0]] - ek_odeme <= 1:
+        return None # Bu ay borç kapanıyor ya da ek ödeme başka borca taşıyor
+    donem['hedef'] = int(aday[0])
+    return donem
+
+def _donem_dizileri(bag, donem, n):
+    """Dönemin ilk n ayı için bakiyeleri, satır değerlerini ve her ayın dönem varsayımlarına uyup uymadığını hesaplar."""
+    borc = bag['borc']
+    faizli, yuzde, sabit = borc['faizli'], borc['yuzde'], borc['sabit_odeme']
+    fark = bag['fark']
+    acik, islenen, hedef = donem['acik'], donem['islenen'], donem['hedef']
+    agr = bag['agresiflik']
+    Z = bag['birikime_ayrilan'] + bag['gider_akisi'][donem['ay']:donem['ay'] + n]
+    acik_faizli = acik & faizli
+
+    # Hedef dışı işlenen borçlar kapalı formla, diğerleri sabit
+    k = np.arange(n + 1, dtype=float)[:, None]
+    yol = np.repeat(donem['tutar'][None, :], n + 1, axis=0)
+    serbest = islenen.copy()
+    if hedef is not None:
+        serbest[hedef] = False
+    yol[:, serbest] = _yol(donem['tutar'][serbest], fark[serbest], sabit[serbest], k)
+
+    gelir = bag['gelir_akisi'][donem['ay']:donem['ay'] + n]
+    sabit_min = float(sabit[acik_faizli].sum())
+
+    # Hedef borç: t' = (1 + fark + agr·yüzde)·t - [c + agr·(gelir - zorunlu - sabit minimumlar - diğer yüzde minimumları)]
+    if hedef is not None:
+        diger = acik_faizli.copy()
+        diger[hedef] = False
+        diger_yuzde = yol[:n][:, diger] @ yuzde[diger]
+        carpan = 1 + fark[hedef] + agr * yuzde[hedef]
+        girdi = -(sabit[hedef] + agr * (gelir - Z - sabit_min - diger_yuzde))
+        yol[:, hedef] = _dogrusal_yineleme(donem['tutar'][hedef], carpan, girdi)
+
+    bas = yol[:n]
+    min_borc = sabit_min + bas[:, acik_faizli] @ yuzde[acik_faizli]
+    kalan_nakit = gelir - Z - min_borc
+    if donem['borclu']:
+        ek_odeme = np.maximum(0, kalan_nakit * agr)
+        zorunlu = Z
+        birikime_kalan = np.zeros(n)
+    else:
+        serbest_nakit = np.maximum(0, kalan_nakit)
+        ek_odeme = serbest_nakit * bag['post_oran']
+        zorunlu = Z + serbest_nakit * (1 - bag['post_oran'])
+        birikime_kalan = ek_odeme
+    gamma = bag['birikim_carpani']
+    birikim = _dogrusal_yineleme(donem['birikim'], gamma, gamma * birikime_kalan)
+
+    # Dönem varsayımları: açık/işlenen borç kümeleri ve ek ödeme rejimi değişmemeli
+    gecerli = ((bas > 1) == acik).all(axis=1) & (((bas > 0) & faizli) == islenen).all(axis=1)
+    sonraki = _dort_sonrasi(bag, bas, islenen)
+    uygun = faizli & (sonraki > 1)
+    if donem['borclu']:
+        gecerli &= (kalan_nakit * agr > 0) == donem['pozitif']
+        if hedef is not None:
+            # Ek ödemenin tamamı hedefe gider, hedef kapanmaz ve sıralamada hedefin önüne geçen borç olmaz
+            gecerli &= yol[1:, hedef] > 1
+            uygun[:, hedef] = False
+            strateji = ONCELIK_KODLARI.get(bag['strateji'])
+            if strateji == ONCELIK_KODLARI['Snowball']:
+                onde = sonraki <= sonraki[:, [hedef]]
+            elif strateji == ONCELIK_KODLARI['Avalanche']:
+                faiz = borc['faiz_aylik']
+                onde = (faiz > faiz[hedef]) | ((faiz == faiz[hedef]) & (sonraki >= sonraki[:, [hedef]]))
+            else:
+                oncelik, sira_no = borc['oncelik'], donem['sira_no']
+                onde = (oncelik < oncelik[hedef]) | ((oncelik == oncelik[hedef]) & (sira_no < sira_no[hedef]))
+            gecerli &= ~(uygun & onde).any(axis=1)
+    else:
+        # Borçsuz dönemde birikime giden pay hiçbir borca harcanmamalı
+        gecerli &= ~((ek_odeme > 0)[:, None] & uygun).any(axis=1)
+
+    return {
+        'yol': yol, 'birikim': birikim, 'gecerli': gecerli,
+        'faiz': bas[:, islenen] @ bag['faiz_orani'][islenen],
+        'kolonlar': {
+            'Toplam Gelir': gelir,
+            'Toplam Zorunlu Giderler': zorunlu,
+            'Min. Borç Ödemeleri': min_borc,
+            'Ek Ödeme Gücü (Borca Giden)': ek_odeme,
+            'Aylık Birikim Katkısı': bag['birikime_ayrilan'] + birikime_kalan,
+            'Kalan Faizli Borç Toplamı': yol[1:] @ faizli,
+            'Toplam Birikim': birikim[1:],
+        },
+    }
+
+def _tarayarak_atla(bag, donem, durum, n_max, bloklar):
+    """Dönemi, parça boyunu büyüterek ilk olaya kadar vektörel olarak ilerletir; atlanan ay sayısını döndürür."""
+    atlanan = 0
+    parca = OLAY_PARCA_MIN
+    while atlanan < n_max:
+        n = min(parca, n_max - atlanan)
+        d = _donem_dizileri(bag, donem, n)
+        gecersiz = np.flatnonzero(~d['gecerli'])
+        k = int(gecersiz[0]) if gecersiz.size else n
+        if k:
+            durum['tutar'][:] = d['yol'][k]
+            durum['birikim'] = float(d['birikim'][k])
+            durum['faiz'] += float(d['faiz'][:k].sum())
+            durum['ay'] += k
+            bloklar.append((donem, k))
+            atlanan += k
+        if k < n:
+            break
+        donem = dict(donem, ay=durum['ay'], tutar=durum['tutar'].copy(), birikim=durum['birikim'])
+        parca = min(2 * parca, OLAY_PARCA_MAKS)
+    return atlanan
+
+def _analitik_mi(bag, donem):
+    """Dönem olaylar dahil tamamen kapalı formla atlanabilir mi? (hedef borç yok, ek ödeme rejimi değişemez)"""
+    if donem['hedef'] is not None or bag['birikim_carpani'] <= 0:
+        return False
+    if not (bag['fark'][donem['islenen']] > -1).all():
+        return False
+    return bag['agresiflik'] == 0 if donem['borclu'] else bag['gelir_artan']
+
+def _sabit_gider_suresi(bag, ilk_ay):
+    """ilk_ay'dan başlayarak sabit giderin değişmediği ay sayısı (değişim yoksa sınırsız)."""
+    sonraki = bag['gider_degisimi'][bag['gider_degisimi'] > ilk_ay]
+    return int(sonraki[0]) - ilk_ay if sonraki.size else math.inf
+
+def _ilk_pozitif_ay(bag, ilk_ay, n):
+    """Artan gelirde gelir - zorunlu giderin pozitif olduğu ilk dönem içi ay (0..n; n = hiç); gider dönemde sabittir."""
+    pozitif = lambda k: float(bag['gelir_akisi'][ilk_ay + k - 1] - bag['gider_akisi'][ilk_ay + k - 1]) - bag['birikime_ayrilan'] > 0
+    alt, ust = 0, n
+    while alt < ust:
+        orta = (alt + ust) // 2
+        if pozitif(orta):
+            ust = orta
+        else:
+            alt = orta + 1
+    return alt
+
+def _analitik_atla(bag, donem, durum, n_max, bloklar):
+    """Hedefsiz dönemi bir sonraki borç olayına (ya da ufka) kadar tek adımda atlar; atlanan ay sayısını döndürür."""
+    fark, c, r = bag['fark'], bag['borc']['sabit_odeme'], bag['faiz_orani']
+    t0 = donem['tutar']
+    islenen = np.flatnonzero(donem['islenen'])
+
+    # Her borcun bir sonraki olay ayı kendi amortisman yolundan kapalı formla bulunur; borçsuz dönemdeki
+    # geometrik toplamlar sabit gider varsaydığından dönem giderin değiştiği aya kadar sürer
+    n = n_max if donem['borclu'] else min(n_max, _sabit_gider_suresi(bag, durum['ay'] + 1))
+    for j in islenen:
+        if t0[j] > 1:
+            n = min(n, _esik_ayi(t0[j], fark[j], c[j], 1.0, True, n))
+        else:
+            n = min(n, _esik_ayi(t0[j], fark[j], c[j], 0.0, True, n))
+            yukari = _esik_ayi(t0[j], fark[j], c[j], 1.0, False, n)
+            # Borçsuz dönemde 1'i aşan kalıntı borç, aştığı ay ek ödeme alabilir; o ay adım adım işlenir
+            n = min(n, yukari if donem['borclu'] else yukari - 1)
+    if n <= 0:
+        return 0
+
+    for j in islenen:
+        durum['faiz'] += r[j] * _yol_toplami(t0[j], fark[j], c[j], n)
+        durum['tutar'][j] = _yol(t0[j], fark[j], c[j], n)
+
+    gamma = bag['birikim_carpani']
+    birikim = donem['birikim'] * gamma ** n
+    if not donem['borclu'] and bag['post_oran']:
+        # Serbest nakit, pozitif olduğu ilk aydan itibaren post_oran ile birikime eklenir ve birikim getirisiyle büyür
+        ilk_ay = durum['ay'] + 1
+        k1 = _ilk_pozitif_ay(bag, ilk_ay, n)
+        son_ay = ilk_ay + n - 1
+        gelir = bag['gelir']
+        zorunlu_gider = bag['birikime_ayrilan'] + float(bag['gider_akisi'][ilk_ay - 1])
+        katki = -zorunlu_gider * gamma * float(_geometrik(gamma, n - k1))
+        for tutar, baslangic, artis in zip(gelir['tutar'], gelir['baslangic_ay'], gelir['artis_yuzdesi']):
+            J = n - max(k1, math.ceil(baslangic - ilk_ay))
+            if J > 0:
+                son_gelir = tutar * (1 + artis) ** ((son_ay - baslangic) / 12)
+                katki += son_gelir * gamma * float(_geometrik(gamma / (1 + artis) ** (1 / 12), J))
+        birikim += bag['post_oran'] * katki
+
+    durum['birikim'] = float(birikim)
+    durum['ay'] += n
+    bloklar.append((donem, n))
+    return n
+
+# --- 4. Olay Tabanlı Simülasyon ---
+
+class TembelSonuc(dict):
+    """Özet anahtarları hazır, 'df' tablosu ilk sonuc['df'] erişiminde üretilen sonuç sözlüğü.
+
+    dict.get('df') tabloyu üretmez; tablo gerekiyorsa sonuc['df'] kullanılmalıdır.
+    """
+
+    def __init__(self, ozet, tablo_uretici):
+        super().__init__(ozet)
+        self._tablo_uretici = tablo_uretici
+
+    def __missing__(self, anahtar):
+        if anahtar != 'df':
+            raise KeyError(anahtar)
+        df = self._tablo_uretici()
+        self['df'] = df
+        return df
+
+def _aylik_tablo(bag, bloklar, ay_sayisi):
+    """Adım satırlarını ve dönem tanımlarını simule_borc_planı ile aynı aylık tabloya açar."""
+    kolonlar = {kolon: np.empty(ay_sayisi) for kolon in SONUC_KOLONLARI}
+    kapananlar = []
+    i = 0
+    for blok in bloklar:
+        if isinstance(blok, dict): # Tam adım satırı
+            for kolon in SONUC_KOLONLARI:
+                kolonlar[kolon][i] = blok[kolon]
+            kapananlar.append(blok['Kapanan Borçlar'])
+            i += 1
+        else:
+            donem, n = blok
+            d = _donem_dizileri(bag, donem, n)
+            for kolon in SONUC_KOLONLARI:
+                kolonlar[kolon][i:i + n] = d['kolonlar'][kolon]
+            kapananlar.extend(['-'] * n)
+            i += n
+    return _sonuc_tablosu(ay_sayisi, kolonlar, kapananlar)
+
+def simule_olay_tabanli(borclar_initial, gelirler_initial, **sim_params):
+    """simule_borc_planı ile aynı sonucu veren, sakin ayları kapalı formla atlayan motor.
+
+    sim_params['ufuk_ay'] (varsayılan MAKS_AY) döngü sınırıdır; diğer motorlardaki gibi ay_sayisi > ufuk_ay
+    olduğunda durulur. Özet anahtarlarının maliyeti ay sayısından çok olay sayısına bağlıdır; aylık tablo
+    yalnızca sonuc['df'] istendiğinde üretilir. Ek olarak 'borcsuz_ay' (faizli borçların bittiği ilk ay,
+    0 = hiç) ve 'olay_sayisi' (tam adımla işlenen ay sayısı) döner.
+    """
+    if not borclar_initial or not gelirler_initial:
+        return None
+
+    faz = fazlar('sim.sure', motor='olay')
+    ufuk = int(sim_params.get('ufuk_ay', MAKS_AY))
+    bag = _baglam(borclar_initial, gelirler_initial, sim_params, ufuk + 1)
+    faizli = bag['borc']['faizli']
+    durum = {
+        'ay': 0, 'tutar': bag['borc']['tutar'].copy(), 'birikim': float(sim_params.get('baslangic_birikim', 0.0)),
+        'faiz': 0.0, 'sira': np.arange(len(faizli)),
+    }
+    baslangic_faizli_borc = float(durum['tutar'] @ faizli)
+    borcsuz_ay = 0
+    olay_sayisi = 0
+    bloklar = []
+    if faz: faz.isaretle('hazirlik')
+
+    while durum['ay'] < 1 or durum['ay'] < bag['gider_son'] or np.count_nonzero((durum['tutar'] > 1) & faizli):
+        ilk_ay = durum['ay'] + 1
+        kalan_ay = ufuk + 1 - durum['ay']
+        donem = _donem_kur(bag, durum)
+        atlanan = 0
+        if donem is not None:
+            if not donem['borclu']:
+                kalan_ay = min(kalan_ay, bag['gider_son'] - durum['ay']) # Giderler bitince döngü de biter
+            if _analitik_mi(bag, donem):
+                atlanan = _analitik_atla(bag, donem, durum, kalan_ay, bloklar)
+            else:
+                atlanan = _tarayarak_atla(bag, donem, durum, kalan_ay, bloklar)
+        if not atlanan:
+            bloklar.append(_adim(bag, durum))
+            olay_sayisi += 1
+
+        if not borcsuz_ay and not np.count_nonzero((durum['tutar'] > 1) & faizli):
+            # Borçlu dönem boyunca açık faizli borç kalır; borçsuz dönem başladıysa ilk ayı sayılır
+            borcsuz_ay = ilk_ay if atlanan and not donem['borclu'] else durum['ay']
+        if durum['ay'] > ufuk: break
+
+    ay_sayisi = durum['ay']
+    if faz:
+        faz.isaretle('ay_dongusu')
+        faz.olcumler.sayac_artir('sim.ay', ay_sayisi, motor='olay')
+        faz.olcumler.sayac_artir('sim.olay', olay_sayisi, motor='olay')
+    ozet = {
+        "ay_sayisi": ay_sayisi, "borcsuz_ay": borcsuz_ay, "olay_sayisi": olay_sayisi,
+        "toplam_faiz": round(durum['faiz']), "toplam_birikim": round(durum['birikim']),
+        "baslangic_faizli_borc": round(baslangic_faizli_borc),
+    }
+    return TembelSonuc(ozet, lambda: _aylik_tablo(bag, bloklar, ay_sayisi))
@@ -0,0 +1,96 @@
+# sim_montecarlo.py
+
+import numpy as np
+from sim_engine import MAKS_AY, borc_dizileri, gelir_dizileri, parametre_dizileri, simule_toplu
+
+# --- 1. Dağılımlar ---
+# Her dağılım {'tip': ..., parametreler} biçiminde bir sözlüktür:
+#   normal: ortalama, std | t: ortalama, olcek, serbestlik | uniform: alt, ust | sabit: deger
+
+VARSAYILAN_DAGILIMLAR = {
+    # Aylık göreli faiz değişimi; yol boyunca birikir (faiz_carpani * Π(1 + şok))
+    'faiz_soku': {'tip': 'normal', 'ortalama': 0.0, 'std': 0.02},
+    # Gelirlerin yıllık artis_yuzdesi'ne eklenen yol başına sapma (0.10 = 10 puan)
+    'gelir_artisi': {'tip': 'normal', 'ortalama': 0.0, 'std': 0.10},
+    # birikim_artis_aylik'e (yıllık %) eklenen yol başına sapma
+    'birikim_getirisi': {'tip': 'normal', 'ortalama': 0.0, 'std': 5.0},
+}
+
+YUZDELIKLER = (5, 25, 50, 75, 95)
+
+def ornekle(rng, dagilim, boyut):
+    """Dağılım sözlüğünden verilen boyutta örnek çeker."""
+    tip = dagilim.get('tip', 'normal')
+    if tip == 'normal':
+        return rng.normal(dagilim.get('ortalama', 0.0), dagilim.get('std', 0.0), boyut)
+    elif tip == 't': # Kalın kuyruklu şoklar için
+        return dagilim.get('ortalama', 0.0) + dagilim.get('olcek', 1.0) * rng.standard_t(dagilim.get('serbestlik', 4), boyut)
+    elif tip == 'uniform':
+        return rng.uniform(dagilim.get('alt', 0.0), dagilim.get('ust', 0.0), boyut)
+    elif tip == 'sabit':
+        return np.full(boyut, float(dagilim.get('deger', 0.0)))
+    raise ValueError(f"Bilinmeyen dağılım tipi: {tip}")
+
+# --- 2. Yol Üretimi ---
+
+def _gelir_yollari(gelir, artis_sapmasi, ay_sayisi):
+    """Her yol için (yol, ay) gelir akışını üretir; artış sapması yoldaki tüm gelirlere ortaktır.
+
+    Tek seferlik gelirler gelir_degerleri'ndeki gibi yalnızca başladıkları ay ödenir.
+    """
+    aylar = np.arange(1, ay_sayisi + 1, dtype=float)
+    akis = np.zeros((len(artis_sapmasi), ay_sayisi))
+    for tutar, baslangic, artis, tek in zip(gelir['tutar'], gelir['baslangic_ay'], gelir['artis_yuzdesi'], gelir['tek_seferlik']):
+        gecen = aylar - baslangic
+        basladi = (gecen >= 0) & ~(tek & (gecen >= 1))
+        # Negatif büyüme tabanını önlemek için (1 + artış) sıfırda kırpılır
+        taban = np.maximum(1 + artis + artis_sapmasi, 0.0)[:, None]
+        akis += np.where(basladi, tutar * taban ** (np.where(basladi, gecen, 0) / 12), 0.0)
+    return akis
+
+def _faiz_yollari(faiz_carpani, soklar):
+    """Aylık göreli şokları yol boyunca biriktirerek (yol, ay) faiz çarpanı üretir."""
+    return faiz_carpani * np.cumprod(np.maximum(1 + soklar, 0.0), axis=1)
+
+# --- 3. Monte Carlo Simülasyonu ---
+
+def monte_carlo_simulasyonu(borclar, gelirler, yol_sayisi=5000, dagilimlar=None, yuzdelikler=YUZDELIKLER, tohum=None, **sim_params):
+    """Faiz şokları, gelir artışı ve birikim getirisi rastgele olan yolları tek toplu hesaplamada simüle eder.
+
+    dagilimlar, VARSAYILAN_DAGILIMLAR içindeki anahtarları geçersiz kılar. Faizli borçları ufuk içinde
+    kapanmayan yolların borçsuz ayı MAKS_AY + 1 sayılır.
+    """
+    if not borclar or not gelirler:
+        return None
+
+    dagilimlar = {**VARSAYILAN_DAGILIMLAR, **(dagilimlar or {})}
+    rng = np.random.default_rng(tohum)
+    ay_sayisi = MAKS_AY + 1
+
+    parametreler = parametre_dizileri([sim_params] * yol_sayisi)
+    parametreler['faiz_carpani'] = _faiz_yollari(
+        parametreler['faiz_carpani'][:, None], ornekle(rng, dagilimlar['faiz_soku'], (yol_sayisi, ay_sayisi))
+    )
+    parametreler['birikim_artis_aylik'] = parametreler['birikim_artis_aylik'] + ornekle(rng, dagilimlar['birikim_getirisi'], yol_sayisi)
+    gelir_akisi = _gelir_yollari(gelir_dizileri(gelirler), ornekle(rng, dagilimlar['gelir_artisi'], yol_sayisi), ay_sayisi)
+
+    sonuc = simule_toplu(borc_dizileri(borclar), gelir_akisi, parametreler)
+
+    borcsuz_ay = np.where(sonuc['borcsuz_ay'] > 0, sonuc['borcsuz_ay'], MAKS_AY + 1)
+    yollar = {
+        'Borçsuz Ay': borcsuz_ay,
+        'Toplam Faiz': sonuc['toplam_faiz'],
+        'Toplam Birikim': sonuc['toplam_birikim'],
+    }
+    import pandas as pd # Yalnızca sonuç tablosu için; modül pandas'sız içe aktarılır
+    ozet = pd.DataFrame(
+        {isim: np.percentile(degerler, yuzdelikler) for isim, degerler in yollar.items()},
+        index=[f"P{y}" for y in yuzdelikler],
+    )
+
+    return {
+        "ozet": ozet.round(0),
+        "borcsuz_olasiligi": float((sonuc['borcsuz_ay'] > 0).mean()),
+        "yol_sayisi": yol_sayisi,
+        "yollar": yollar,
+    }
@@ -0,0 +1,248 @@
+# sim_optimizer.py
+
+import itertools
+import numpy as np
+from sim_engine import (
+    ONCELIK_STRATEJILERI, MAKS_AY,
+    borc_dizileri, gelir_dizileri, nakit_akisi, parametre_dizileri, simule_toplu,
+)
+
+# --- 1. Sabitler ---
+
+# Aranabilen sürekli parametreler ve varsayılan arama aralıkları. aylik_zorunlu_birikim'in üst sınırı
+# verilmezse ilk yılın en yüksek aylık geliridir (artışlı gelirde ufkun sonundaki gelir aralığı gereksiz büyütür).
+ARAMA_ARALIKLARI = {
+    'agresiflik_carpan': (0.0, 2.0),
+    'aylik_zorunlu_birikim': (0.0, None),
+    'post_debt_birikim_oran': (0.0, 1.0),
+}
+
+# Amaç metrikleri ve yönleri (toplam birikim en büyüklenir, diğerleri en küçüklenir)
+AMACLAR = {'toplam_faiz': 'en_kucuk', 'borcsuz_ay': 'en_kucuk', 'toplam_birikim': 'en_buyuk'}
+
+# add_debt'teki kullanıcı önceliği tabanı (1. sıra = 1001)
+KULLANICI_ONCELIK_TABANI = 1000
+
+# --- 2. Değerlendirici ---
+
+class Degerlendirici:
+    """Borç ve gelir dizilerini bir kez hazırlayıp parametre kümelerini tek toplu simülasyonda değerlendirir.
+
+    Arama boyunca borç/gelir dönüşümü ve aylık gelir akışı yeniden hesaplanmaz; 'cagri' motor çağrısı,
+    'senaryo' toplam değerlendirilen senaryo sayısıdır.
+    """
+
+    def __init__(self, borclar, gelirler, **sim_params):
+        self.borc = borc_dizileri(borclar)
+        akis = nakit_akisi(self.borc, gelir_dizileri(gelirler))
+        self.gelir_akisi, self.gider_akisi = akis['gelir'], akis['gider']
+        self.sim_params = sim_params
+        self.cagri = 0
+        self.senaryo = 0
+
+    def __call__(self, degisiklikler, oncelik=None):
+        """degisiklikler, sim_params üzerine yazılacak sözlüklerin listesidir; oncelik verilirse (N,) ya da (S, N)
+        kullanıcı öncelikleri borçlardakinin yerine geçer. Senaryo başına metrik dizileri döner."""
+        senaryolar = [dict(self.sim_params, **d) for d in degisiklikler]
+        borc = self.borc if oncelik is None else dict(self.borc, oncelik=np.asarray(oncelik, dtype=float))
+        sonuc = simule_toplu(borc, self.gelir_akisi, parametre_dizileri(senaryolar), gider_akisi=self.gider_akisi)
+        self.cagri += 1
+        self.senaryo += len(senaryolar)
+        return {
+            # Faizli borçların ufuk içinde kapanmadığı senaryolar MAKS_AY + 1 sayılır
+            'borcsuz_ay': np.where(sonuc['borcsuz_ay'] > 0, sonuc['borcsuz_ay'], MAKS_AY + 1),
+            'toplam_faiz': sonuc['toplam_faiz'],
+            'toplam_birikim': sonuc['toplam_birikim'],
+            'ay_sayisi': sonuc['ay_sayisi'],
+        }
+
+def _aralik(degerlendirici, parametre, aralik=None):
+    alt, ust = aralik if aralik is not None else ARAMA_ARALIKLARI[parametre]
+    if ust is None:
+        ust = float(degerlendirici.gelir_akisi[:12].max())
+    return float(alt), float(ust)
+
+def _secim(metrikler, i):
+    return {k: v[i].item() for k, v in metrikler.items()}
+
+# --- 3. Kısıtlar ---
+# Kısıtlar senaryo başına metrik dizilerini alıp uygunluk (bool) dizisi döndüren fonksiyonlardır.
+
+def borcsuz_ay_en_gec(ay):
+    """Faizli borçlar en geç verilen ayın sonunda kapanmış olmalı."""
+    return lambda metrikler: metrikler['borcsuz_ay'] <= ay
+
+def birikim_en_az(tutar):
+    """Ufuk sonundaki toplam birikim en az verilen tutar olmalı."""
+    return lambda metrikler: metrikler['toplam_birikim'] >= tutar
+
+def faiz_en_cok(tutar):
+    """Toplam faiz maliyeti en çok verilen tutar olmalı."""
+    return lambda metrikler: metrikler['toplam_faiz'] <= tutar
+
+def _uygunluk(kisitlar, metrikler):
+    uygun = np.ones(len(metrikler['borcsuz_ay']), dtype=bool)
+    for kisit in kisitlar:
+        uygun &= kisit(metrikler)
+    return uygun
+
+# --- 4. Hedef Arama (Tek Parametre) ---
+
+def hedef_ara(borclar, gelirler, parametre, kisit, yon='en_kucuk', aralik=None, tolerans=None, nokta_sayisi=8, **sim_params):
+    """kisit'ı sağlayan en küçük (yon='en_kucuk') ya da en büyük (yon='en_buyuk') parametre değerini arar.
+
+    Örn. borçsuz kalmayı 24. aya çeken en küçük agresiflik_carpan ya da 36. ayda bitirmeye izin veren en büyük
+    aylik_zorunlu_birikim. kisit'ın parametreye göre tekdüze olduğu varsayılır. Her turda aralıktan nokta_sayisi
+    değer tek toplu simülasyonda denenir ve sınırı içeren alt aralığa geçilir; aralık her turda
+    (nokta_sayisi + 1) kat daralır. tolerans verilmezse aralık genişliğinin binde biridir.
+    """
+    if not borclar or not gelirler:
+        return None
+    if yon not in ('en_kucuk', 'en_buyuk'):
+        raise ValueError(f"Bilinmeyen arama yönü: {yon}")
+
+    degerlendirici = Degerlendirici(borclar, gelirler, **sim_params)
+    alt, ust = _aralik(degerlendirici, parametre, aralik)
+    tolerans = (ust - alt) / 1000 if tolerans is None else tolerans
+
+    # a kısıtın sağlanmadığı, b sağlandığı uç; arama boyunca sınır (a, b] içinde kalır
+    a, b = (alt, ust) if yon == 'en_kucuk' else (ust, alt)
+    metrikler = degerlendirici([{parametre: a}, {parametre: b}])
+    uygun = kisit(metrikler)
+    sonuc = {'parametre': parametre, 'bulundu': bool(uygun[0] or uygun[1])}
+    if uygun[0]:
+        sonuc.update(deger=a, metrikler=_secim(metrikler, 0))
+    elif not uygun[1]:
+        sonuc.update(deger=None, metrikler=None)
+    else:
+        en_iyi = _secim(metrikler, 1)
+        while abs(b - a) > tolerans:
+            noktalar = np.linspace(a, b, nokta_sayisi + 2)[1:-1]
+            metrikler = degerlendirici([{parametre: float(x)} for x in noktalar])
+            uygun = np.flatnonzero(kisit(metrikler))
+            if not uygun.size:
+                a = float(noktalar[-1])
+                continue
+            j = uygun[0]
+            if j > 0:
+                a = float(noktalar[j - 1])
+            b = float(noktalar[j])
+            en_iyi = _secim(metrikler, j)
+        sonuc.update(deger=b, metrikler=en_iyi)
+
+    sonuc.update(cagri=degerlendirici.cagri, senaryo=degerlendirici.senaryo)
+    return sonuc
+
+# --- 5. Çok Parametreli Optimizasyon ---
+
+def _izgara_ara(degerlendirici, amac, kisitlar, araliklar, nokta_sayisi, tur_sayisi, sabit):
+    """Parametre ızgarasını her turda en iyi uygun noktanın çevresine daraltarak arar; en iyi nokta ya da None."""
+    isimler = list(araliklar)
+    sinirlar = {p: araliklar[p] for p in isimler}
+    yon = 1.0 if AMACLAR[amac] == 'en_kucuk' else -1.0
+    en_iyi, en_iyi_puan = None, np.inf
+
+    for _ in range(tur_sayisi):
+        eksenler = [np.unique(np.linspace(*sinirlar[p], nokta_sayisi)) for p in isimler]
+        noktalar = [dict(sabit, **{p: float(x) for p, x in zip(isimler, nokta)}) for nokta in itertools.product(*eksenler)]
+        metrikler = degerlendirici(noktalar)
+        puan = np.where(_uygunluk(kisitlar, metrikler), yon * metrikler[amac], np.inf)
+        i = int(np.argmin(puan))
+        if puan[i] < en_iyi_puan:
+            en_iyi_puan = puan[i]
+            en_iyi = {**{p: noktalar[i][p] for p in isimler}, **_secim(metrikler, i)}
+        if en_iyi is None:
+            break # İlk ızgarada uygun nokta yoksa daraltılacak bölge de yok
+        for p, eksen in zip(isimler, eksenler):
+            adim = (eksen[-1] - eksen[0]) / max(len(eksen) - 1, 1)
+            alt, ust = araliklar[p]
+            sinirlar[p] = (max(alt, en_iyi[p] - adim), min(ust, en_iyi[p] + adim))
+    return en_iyi
+
+def optimize_et(borclar, gelirler, amac='toplam_faiz', kisitlar=(), araliklar=None, stratejiler=None, nokta_sayisi=5, tur_sayisi=4, **sim_params):
+    """Sürekli parametreleri ve öncelik stratejisini amaç metriğine göre, kısıtlar altında arar.
+
+    araliklar {parametre: (alt, üst) ya da None} sözlüğüdür (None: ARAMA_ARALIKLARI); verilmezse yalnızca
+    agresiflik_carpan aranır. Her strateji için ızgara (eksen başına nokta_sayisi değer) tek toplu simülasyonda
+    denenir ve tur_sayisi tur boyunca en iyi uygun noktanın çevresine daraltılır. 'Kullanici' stratejisi
+    borçlardaki öncelikleri kullanır (bkz. oncelik_sirasi_ara).
+    """
+    if not borclar or not gelirler:
+        return None
+    if amac not in AMACLAR:
+        raise ValueError(f"Bilinmeyen amaç: {amac}")
+
+    degerlendirici = Degerlendirici(borclar, gelirler, **sim_params)
+    araliklar = {'agresiflik_carpan': None} if araliklar is None else araliklar
+    araliklar = {p: _aralik(degerlendirici, p, aralik) for p, aralik in araliklar.items()}
+    stratejiler = list(ONCELIK_STRATEJILERI.values()) if stratejiler is None else list(stratejiler)
+
+    satirlar = []
+    for strateji in stratejiler:
+        en_iyi = _izgara_ara(degerlendirici, amac, kisitlar, araliklar, nokta_sayisi, tur_sayisi,
+                             {'oncelik_stratejisi': strateji})
+        satirlar.append({'oncelik_stratejisi': strateji, 'uygun': en_iyi is not None, **(en_iyi or {})})
+
+    import pandas as pd # Yalnızca karşılaştırma tablosu için; modül pandas'sız içe aktarılır
+    tablo = pd.DataFrame(satirlar)
+    uygunlar = tablo[tablo['uygun']]
+    en_iyi = None
+    if not uygunlar.empty:
+        sirali = uygunlar.sort_values(amac, ascending=AMACLAR[amac] == 'en_kucuk', kind='stable')
+        en_iyi = sirali.iloc[0].drop('uygun').to_dict()
+
+    return {'en_iyi': en_iyi, 'tablo': tablo, 'cagri': degerlendirici.cagri, 'senaryo': degerlendirici.senaryo}
+
+# --- 6. Kullanıcı Öncelik Sırası Araması ---
+
+def oncelik_sirasi_ara(borclar, gelirler, amac='toplam_faiz', kisitlar=(), tur_sayisi=20, **sim_params):
+    """'Kullanici' stratejisi için faizli borçların öncelik sırasını komşu yer değiştirmeli yerel aramayla iyileştirir.
+
+    Başlangıç sırası borçlardaki önceliklerdir. Her turda mevcut sıra ve tüm komşu çift değişimleri tek toplu
+    simülasyonda (senaryo başına ayrı öncelik dizisiyle) denenir, en iyi iyileştirme uygulanır; iyileşme
+    kalmayınca ya da tur_sayisi dolunca durulur. Dönen 'oncelik' {isim: öncelik} sözlüğü add_debt'in
+    1000 + sıra düzenini izler; 'borclar' önceliği güncellenmiş kopyadır.
+    """
+    if not borclar or not gelirler:
+        return None
+    if amac not in AMACLAR:
+        raise ValueError(f"Bilinmeyen amaç: {amac}")
+
+    degerlendirici = Degerlendirici(borclar, gelirler, **dict(sim_params, oncelik_stratejisi='Kullanici'))
+    borc = degerlendirici.borc
+    # Motorun kararlı sıralamasıyla aynı başlangıç: eşit öncelikte listedeki sıra korunur
+    sira = [j for j in np.argsort(borc['oncelik'], kind='stable') if borc['faizli'][j]]
+    yon = 1.0 if AMACLAR[amac] == 'en_kucuk' else -1.0
+
+    def oncelik_dizisi(aday):
+        oncelik = borc['oncelik'].copy()
+        oncelik[aday] = KULLANICI_ONCELIK_TABANI + 1 + np.arange(len(aday))
+        return oncelik
+
+    en_iyi = None
+    for _ in range(tur_sayisi):
+        adaylar = [sira]
+        for k in range(len(sira) - 1):
+            aday = list(sira)
+            aday[k], aday[k + 1] = aday[k + 1], aday[k]
+            adaylar.append(aday)
+        metrikler = degerlendirici([{}] * len(adaylar), oncelik=np.array([oncelik_dizisi(a) for a in adaylar]))
+        puan = np.where(_uygunluk(kisitlar, metrikler), yon * metrikler[amac], np.inf)
+        i = int(np.argmin(puan)) # Eşitlikte mevcut sıra (0) korunur
+        en_iyi = _secim(metrikler, i) if np.isfinite(puan[i]) else None
+        if i == 0:
+            break
+        sira = adaylar[i]
+
+    oncelik = oncelik_dizisi(sira)
+    isimler = borc['isim']
+    yeni_borclar = [
+        dict(b, oncelik=int(oncelik[j])) if borc['faizli'][j] else dict(b)
+        for j, b in enumerate(borclar)
+    ]
+    return {
+        'oncelik': {isimler[j]: int(oncelik[j]) for j in sira},
+        'borclar': yeni_borclar,
+        'metrikler': en_iyi,
+        'cagri': degerlendirici.cagri, 'senaryo': degerlendirici.senaryo,
+    }
@@ -0,0 +1,112 @@
+# sim_sensitivity.py
+
+import numpy as np
+from sim_engine import (
+    ONCELIK_STRATEJILERI, MAKS_AY,
+    borc_dizileri, gelir_dizileri, nakit_akisi, parametre_dizileri, simule_toplu,
+)
+
+# --- 1. Sabitler ---
+
+# Varsayılan değişimler: borç bakiyesi TL (negatif = o borca bugünden ek ödeme), borç faizi aylık oran
+# (0.005 = 0,5 puan), gelir oransal
+BORC_TUTAR_DEGISIMI = -1000.0
+BORC_FAIZ_DEGISIMI = 0.005
+GELIR_DEGISIMI = 0.10
+
+# Sayısal sim_params alanları için (değişim, alt sınır, üst sınır); değişim sınırı aşarsa ters yönde uygulanır
+PARAMETRE_DEGISIMLERI = {
+    'baslangic_birikim': (10000.0, 0.0, None),
+    'aylik_zorunlu_birikim': (1000.0, 0.0, None),
+    'faiz_carpani': (0.1, 0.0, None),
+    'agresiflik_carpan': (0.1, 0.0, None),
+    'birikim_artis_aylik': (1.0, None, None),
+    'post_debt_birikim_oran': (0.1, 0.0, 1.0),
+}
+VARSAYILAN_PARAMETRELER = {
+    'baslangic_birikim': 0.0, 'aylik_zorunlu_birikim': 0.0, 'faiz_carpani': 1.0,
+    'agresiflik_carpan': 1.0, 'birikim_artis_aylik': 0.0, 'post_debt_birikim_oran': 1.0,
+}
+
+# --- 2. Senaryo Kurulumu ---
+
+def _parametre_degeri(deger, degisim, alt, ust):
+    yeni = deger + degisim
+    if (ust is not None and yeni > ust) or (alt is not None and yeni < alt):
+        yeni = deger - degisim
+    return yeni
+
+def _senaryolar(borclar, gelirler, sim_params, borc_tutar, borc_faiz, gelir_orani):
+    """Temel senaryo ve tek değişkenli sapmalar: (tür, kalem, değişim metni, borç tutarı, borç faizi, gelirler, sim_params)."""
+    borc = borc_dizileri(borclar)
+    tutar, faiz = borc['tutar'], borc['faiz_aylik']
+    senaryolar = [('Mevcut Plan', '-', '-', tutar, faiz, gelirler, sim_params)]
+
+    # Giderler faiz işletmez ve ek ödeme almaz; yalnızca faizli borçlar değiştirilir
+    for j in np.flatnonzero(borc['faizli'] & (tutar > 0)):
+        yeni = tutar.copy()
+        yeni[j] = max(0.0, tutar[j] + borc_tutar)
+        senaryolar.append(('Borç Bakiyesi', borc['isim'][j], f"{yeni[j] - tutar[j]:+,.0f} TL", yeni, faiz, gelirler, sim_params))
+        yeni = faiz.copy()
+        yeni[j] = max(0.0, faiz[j] + borc_faiz)
+        senaryolar.append(('Borç Faizi', borc['isim'][j], f"{(yeni[j] - faiz[j]) * 100:+.2f} puan", tutar, yeni, gelirler, sim_params))
+
+    for i, gelir in enumerate(gelirler):
+        yeni = list(gelirler)
+        yeni[i] = dict(gelir, tutar=gelir['tutar'] * (1 + gelir_orani))
+        senaryolar.append(('Gelir', gelir.get('isim', f"Gelir {i + 1}"), f"{gelir_orani:+.0%}", tutar, faiz, yeni, sim_params))
+
+    for parametre, (degisim, alt, ust) in PARAMETRE_DEGISIMLERI.items():
+        deger = sim_params.get(parametre, VARSAYILAN_PARAMETRELER[parametre])
+        yeni = _parametre_degeri(deger, degisim, alt, ust)
+        senaryolar.append(('Parametre', parametre, f"{deger:g} → {yeni:g}", tutar, faiz, gelirler, dict(sim_params, **{parametre: yeni})))
+
+    for etiket, strateji in ONCELIK_STRATEJILERI.items():
+        if strateji != sim_params.get('oncelik_stratejisi'):
+            senaryolar.append(('Parametre', 'oncelik_stratejisi', etiket, tutar, faiz, gelirler, dict(sim_params, oncelik_stratejisi=strateji)))
+    return borc, senaryolar
+
+# --- 3. Duyarlılık Analizi ---
+
+def duyarlilik_analizi(borclar, gelirler, borc_tutar=BORC_TUTAR_DEGISIMI, borc_faiz=BORC_FAIZ_DEGISIMI,
+                       gelir_orani=GELIR_DEGISIMI, **sim_params):
+    """Her borcun bakiyesini ve faizini, her geliri ve her sim_params alanını tek tek değiştirip etkilerini sıralar.
+
+    Tüm sapmalar temel senaryoyla birlikte tek toplu simülasyonda hesaplanır (30 borçlu bir portföyde ~70 senaryo).
+    {'baz': temel metrikler, 'tablo': etkiye göre sıralı DataFrame, 'senaryo': senaryo sayısı} döner; tablodaki
+    Δ kolonları temel plana göre farktır (negatif = daha az faiz / daha erken borçsuz). Faizli borçların ufuk
+    içinde kapanmadığı senaryolarda borçsuz ay, Degerlendirici'deki gibi MAKS_AY + 1 sayılır.
+    """
+    if not borclar or not gelirler:
+        return None
+
+    borc, senaryolar = _senaryolar(borclar, gelirler, sim_params, borc_tutar, borc_faiz, gelir_orani)
+    # Gelir akışı yalnızca gelir değişen senaryolarda yeniden hesaplanır (giderler tüm senaryolarda aynıdır)
+    akislar = {}
+    for s in senaryolar:
+        if id(s[5]) not in akislar:
+            akislar[id(s[5])] = nakit_akisi(borc, gelir_dizileri(s[5]))
+    toplu_borc = dict(borc, tutar=np.stack([s[3] for s in senaryolar]), faiz_aylik=np.stack([s[4] for s in senaryolar]))
+    gelir_akisi = np.stack([akislar[id(s[5])]['gelir'] for s in senaryolar])
+    sonuc = simule_toplu(
+        toplu_borc, gelir_akisi, parametre_dizileri([s[6] for s in senaryolar]), gider_akisi=akislar[id(gelirler)]['gider']
+    )
+
+    borcsuz_ay = np.where(sonuc['borcsuz_ay'] > 0, sonuc['borcsuz_ay'], MAKS_AY + 1)
+    toplam_faiz = sonuc['toplam_faiz']
+    baz = {'borcsuz_ay': int(borcsuz_ay[0]), 'toplam_faiz': float(toplam_faiz[0]), 'toplam_birikim': float(sonuc['toplam_birikim'][0])}
+
+    import pandas as pd # Yalnızca sonuç tablosu için; modül pandas'sız içe aktarılır
+    tablo = pd.DataFrame({
+        'Tür': [s[0] for s in senaryolar[1:]],
+        'Kalem': [s[1] for s in senaryolar[1:]],
+        'Değişim': [s[2] for s in senaryolar[1:]],
+        'Borçsuz Ay': borcsuz_ay[1:],
+        'Toplam Faiz': np.round(toplam_faiz[1:]).astype(np.int64),
+        'Δ Borçsuz Ay': borcsuz_ay[1:] - borcsuz_ay[0],
+        'Δ Toplam Faiz': np.round(toplam_faiz[1:] - toplam_faiz[0]).astype(np.int64),
+        'Δ Toplam Birikim': np.round(sonuc['toplam_birikim'][1:] - sonuc['toplam_birikim'][0]).astype(np.int64),
+    })
+    # Önce faiz etkisinin, eşitlikte borçsuz ay etkisinin büyüklüğüne göre
+    sira = np.lexsort((-np.abs(tablo['Δ Borçsuz Ay'].to_numpy()), -np.abs(tablo['Δ Toplam Faiz'].to_numpy())))
+    return {'baz': baz, 'tablo': tablo.iloc[sira].reset_index(drop=True), 'senaryo': len(senaryolar)}
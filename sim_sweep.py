@@ -0,0 +1,53 @@
+# sim_sweep.py
+
+import itertools
+import numpy as np
+from sim_engine import (
+    STRATEJILER, ONCELIK_STRATEJILERI, POST_DEBT_STRATEJILERI,
+    borc_dizileri, gelir_dizileri, nakit_akisi, parametre_dizileri, simule_toplu,
+)
+
+# --- 1. Strateji Izgarası Taraması ---
+
+def strateji_taramasi(borclar, gelirler, agresiflik=None, oncelik=None, post_debt=None, **sim_params):
+    """Aynı borç/gelir seti için strateji ızgarasındaki tüm senaryoları tek toplu hesaplamada karşılaştırır.
+
+    agresiflik, oncelik ve post_debt {etiket: değer} sözlükleridir; verilmezse STRATEJILER,
+    ONCELIK_STRATEJILERI ve POST_DEBT_STRATEJILERI kullanılır. Diğer sim_params tüm senaryolarda ortaktır.
+    """
+    if not borclar or not gelirler:
+        return None
+
+    agresiflik = STRATEJILER if agresiflik is None else agresiflik
+    oncelik = ONCELIK_STRATEJILERI if oncelik is None else oncelik
+    post_debt = POST_DEBT_STRATEJILERI if post_debt is None else post_debt
+
+    izgara = list(itertools.product(agresiflik.items(), oncelik.items(), post_debt.items()))
+    senaryolar = [
+        dict(sim_params, agresiflik_carpan=a, oncelik_stratejisi=o, post_debt_birikim_oran=p)
+        for (_, a), (_, o), (_, p) in izgara
+    ]
+
+    borc = borc_dizileri(borclar)
+    akis = nakit_akisi(borc, gelir_dizileri(gelirler))
+    sonuc = simule_toplu(borc, akis['gelir'], parametre_dizileri(senaryolar), gider_akisi=akis['gider'])
+
+    import pandas as pd # Yalnızca sonuç tablosu için; modül pandas'sız içe aktarılır
+    return pd.DataFrame({
+        'Strateji': [a for (a, _), _, _ in izgara],
+        'Öncelik': [o for _, (o, _), _ in izgara],
+        'Borç Sonrası': [p for _, _, (p, _) in izgara],
+        'Ay Sayısı': sonuc['ay_sayisi'],
+        # Faizli borçların hiç kapanmadığı senaryolarda boş bırakılır
+        'Borçsuz Ay': np.where(sonuc['borcsuz_ay'] > 0, sonuc['borcsuz_ay'], np.nan),
+        'Toplam Faiz': np.round(sonuc['toplam_faiz']).astype(np.int64),
+        'Toplam Birikim': np.round(sonuc['toplam_birikim']).astype(np.int64),
+    })
+
+def en_iyi_strateji(tablo, kriter='Toplam Faiz'):
+    """Tarama tablosundan kritere göre en iyi satırı döndürür (birikimde en büyük, diğerlerinde en küçük)."""
+    if tablo is None or tablo.empty:
+        return None
+    if kriter == 'Toplam Birikim':
+        return tablo.loc[tablo[kriter].idxmax()]
+    return tablo.loc[tablo[kriter].idxmin()]
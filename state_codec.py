@@ -0,0 +1,390 @@
+# state_codec.py
+
+import datetime
+import json
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+# --- SÜRÜMLÜ İKİLİ OTURUM FORMATI ---
+# Anlık görüntü = BAŞLIK + zlib(gövde)
+#   BAŞLIK: b'FPSS' + sürüm (uint16) + bayraklar (uint8)
+#   Gövde : anahtar sayısı (uint32) + [anahtar (str değer) + değer uzunluğu (uint32) + değer baytları] ...
+# Her değer tek baytlık bir etiketle başlar. DataFrame'ler sütun sütun ve konumsal saklanır (aynı adlı sütunlar
+# korunur); her sütunun önünde türünü belirten bir baytlık etiket bulunur: sayısal sütunlar ham NumPy baytları,
+# kategorik sütunlar kategoriler + kodlar, pandas uzantı tipleri (Int64, boolean, string, saat dilimli tarih vb.)
+# tip adı + değer listesi olarak yazılır. Temsil edilemeyen çerçevelerde (MultiIndex, kayıpsız geri kurulamayan
+# uzantı tipleri) SnapshotError yükseltilir. Yalnızca düz JSON tiplerinden oluşan yapılar (borç/gelir listeleri) tek bir
+# JSON bloğu olarak gömülür; set, tuple, tarih ve DataFrame içerenler etiketli yazılır ve aynen geri döner.
+# pickle kullanılmaz, çözme işlemi kod çalıştırmaz.
+# Saklanan blob, bir anlık görüntünün ardından sıfır ya da daha fazla yamadan oluşabilir: yama da aynı biçimde bir
+# anlık görüntüdür ve yalnızca değişen anahtarları taşır, silinen anahtarlar _DELETED değeriyle işaretlenir.
+# Sonraki çerçeve öncekinin anahtarlarını ezer; böylece kayıt yalnızca değişen anahtarları ekleyebilir.
+# pandas yalnızca bir DataFrame kodlanırken ya da çözülürken içe aktarılır; borç/gelir listelerini çözen
+# süreçler (ör. toplu işçiler) pandas'ın içe aktarma maliyetini ödemez.
+
+MAGIC = b'FPSS'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<4sHB')
+_FLAG_ZLIB = 1
+_INFLATE_FIRST = 16384 # İlk çıktı bloğu: küçük anlık görüntüler zlib.decompress kadar bellek kullansın
+
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+
+# Değer etiketleri
+_NONE, _TRUE, _FALSE = b'N', b'T', b'F'
+_INT, _BIGINT, _FLOAT, _STR = b'i', b'I', b'f', b's'
+_LIST, _TUPLE, _SET, _DICT = b'l', b't', b'S', b'd'
+_ARRAY, _FRAME, _RANGE_INDEX, _INDEX = b'a', b'D', b'r', b'x'
+_DATE, _DATETIME = b'z', b'Z'
+_STRS = b'L' # Yalnızca metin içeren sütunlar: '\x00' ile birleştirilmiş tek blok
+_JSON = b'j' # Yalnızca dict/list/str/sayı/bool/None içeren yapılar (borç ve gelir listeleri); C ile hızlı çözülür
+_DELETED = b'-' # Yamalarda silinen anahtarın değeri; çözülmez, split_snapshot anahtarı çıkarır
+
+_ARRAY_KINDS = 'biufcmM' # Ham bayt olarak yazılabilen NumPy dtype türleri
+
+# Sütun etiketleri (_FRAME / _INDEX)
+_COL_ARRAY, _COL_OBJECT, _COL_CATEGORY, _COL_EXTENSION = b'n', b'o', b'c', b'e'
+
+class SnapshotError(ValueError):
+    """Anlık görüntü çözülemediğinde ya da bir değer kodlanamadığında."""
+
+# --- 1. Kodlama ---
+
+def _json_safe(value):
+    """Değer JSON üzerinden kayıpsız gidip gelebilir mi? (tuple, set, int anahtar vb. gidip gelemez)"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return type(value) in (str, bool, int, float, type(None))
+    if type(value) is list:
+        return all(_json_safe(v) for v in value)
+    if type(value) is dict:
+        return all(type(k) is str and _json_safe(v) for k, v in value.items())
+    return False
+
+def _write_str(out, text):
+    raw = text.encode('utf-8')
+    out += _STR
+    out += _U32.pack(len(raw))
+    out += raw
+
+def _pandas():
+    import pandas as pd
+    return pd
+
+def _is_frame(value):
+    pd = sys.modules.get('pandas') # pandas hiç yüklenmediyse değer DataFrame olamaz
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+def _is_na(value):
+    """Tek bir hücre eksik mi? (pd.isna liste/dizi hücrelerinde eleman eleman çalıştığı için kullanılmaz)"""
+    if value is None or isinstance(value, float) and value != value:
+        return True
+    pd = _pandas()
+    return value is pd.NA or value is pd.NaT
+
+def _write_array(out, arr):
+    arr = np.ascontiguousarray(arr)
+    out += _ARRAY
+    _write_str(out, arr.dtype.str)
+    out += _U32.pack(arr.ndim)
+    for dim in arr.shape:
+        out += _U32.pack(dim)
+    out += arr.tobytes()
+
+def _write_series_values(out, series):
+    """Sütun değerlerini yazar: sayısal sütunlar ham dizi, diğerleri değer listesi olarak."""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in _ARRAY_KINDS:
+        _write_array(out, series.to_numpy())
+        return
+    values = [None if _is_na(v) else v for v in series.astype(object)]
+    if all(isinstance(v, str) and '\x00' not in v for v in values):
+        raw = '\x00'.join(values).encode('utf-8')
+        out += _STRS + _U32.pack(len(values)) + _U32.pack(len(raw))
+        out += raw
+    else:
+        _write(out, values)
+
+def _write_column(out, values):
+    """Sütun ya da indeks değerlerini tip etiketiyle yazar; geri kurulamayacak tiplerde SnapshotError yükseltir."""
+    pd = _pandas()
+    values = pd.Series(values, copy=False)
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in _ARRAY_KINDS:
+        out += _COL_ARRAY
+        _write_array(out, values.to_numpy())
+    elif isinstance(dtype, np.dtype) and dtype.kind == 'O':
+        out += _COL_OBJECT
+        _write_series_values(out, values)
+    elif isinstance(dtype, pd.CategoricalDtype):
+        out += _COL_CATEGORY
+        _write(out, bool(dtype.ordered))
+        _write_column(out, dtype.categories)
+        _write_array(out, values.cat.codes.to_numpy())
+    else:
+        name = str(dtype)
+        try:
+            restored = pd.api.types.pandas_dtype(name)
+        except TypeError:
+            restored = None
+        if restored != dtype:
+            raise SnapshotError(f"Kodlanamayan sütun tipi: {name}")
+        out += _COL_EXTENSION
+        _write_str(out, name)
+        _write(out, [None if _is_na(v) else v for v in values.astype(object)])
+
+def _write_index(out, index):
+    pd = _pandas()
+    if isinstance(index, pd.MultiIndex):
+        raise SnapshotError("MultiIndex içeren DataFrame kodlanamaz.")
+    if isinstance(index, pd.RangeIndex):
+        out += _RANGE_INDEX
+        out += _I64.pack(index.start) + _I64.pack(index.stop) + _I64.pack(index.step)
+    else:
+        out += _INDEX
+        _write(out, index.name)
+        _write_column(out, index)
+
+def _write_frame(out, df):
+    out += _FRAME
+    _write_index(out, df.index)
+    _write_index(out, df.columns)
+    for position in range(df.shape[1]):
+        _write_column(out, df.iloc[:, position])
+
+def _write(out, value):
+    if value is None:
+        out += _NONE
+    elif value is True or value is False or isinstance(value, np.bool_):
+        out += _TRUE if value else _FALSE
+    elif isinstance(value, (int, np.integer)):
+        value = int(value)
+        if -2**63 <= value < 2**63:
+            out += _INT + _I64.pack(value)
+        else:
+            raw = str(value).encode('ascii')
+            out += _BIGINT + _U32.pack(len(raw)) + raw
+    elif isinstance(value, (float, np.floating)):
+        out += _FLOAT + _F64.pack(float(value))
+    elif isinstance(value, str):
+        _write_str(out, value)
+    elif type(value) in (dict, list) and _json_safe(value):
+        raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        out += _JSON + _U32.pack(len(raw))
+        out += raw
+    elif isinstance(value, dict):
+        out += _DICT + _U32.pack(len(value))
+        for k, v in value.items():
+            _write(out, k)
+            _write(out, v)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        if isinstance(value, list):
+            out += _LIST
+        elif isinstance(value, tuple):
+            out += _TUPLE
+        else:
+            out += _SET
+            value = sorted(value, key=str) # Aynı küme hep aynı baytları versin
+        out += _U32.pack(len(value))
+        for v in value:
+            _write(out, v)
+    elif _is_frame(value):
+        _write_frame(out, value)
+    elif isinstance(value, np.ndarray) and value.dtype.kind in _ARRAY_KINDS:
+        _write_array(out, value)
+    elif isinstance(value, datetime.datetime):
+        out += _DATETIME
+        _write_str(out, value.isoformat())
+    elif isinstance(value, datetime.date):
+        out += _DATE
+        _write_str(out, value.isoformat())
+    else:
+        raise SnapshotError(f"Kodlanamayan değer tipi: {type(value).__name__}")
+
+def encode_value(value):
+    """Tek bir oturum değerini (sıkıştırmadan) ikili biçime kodlar."""
+    out = bytearray()
+    _write(out, value)
+    return bytes(out)
+
+def encode_snapshot(encoded_items, compress=True):
+    """encode_value ile kodlanmış {anahtar: bayt} sözlüğünden sürümlü anlık görüntü üretir."""
+    body = bytearray(_U32.pack(len(encoded_items)))
+    for key, raw in encoded_items.items():
+        _write_str(body, key)
+        body += _U32.pack(len(raw))
+        body += raw
+    flags = _FLAG_ZLIB if compress else 0
+    payload = zlib.compress(bytes(body), 6) if compress else bytes(body)
+    return _HEADER.pack(MAGIC, SNAPSHOT_VERSION, flags) + payload
+
+def encode_patch(encoded_items, removed=()):
+    """Değişen {anahtar: bayt} ve silinen anahtarlar için, saklanan blobun sonuna eklenecek yama çerçevesi."""
+    items = dict(encoded_items)
+    items.update(dict.fromkeys(removed, _DELETED))
+    return encode_snapshot(items)
+
+def encode_state(state):
+    """Oturum sözlüğünü doğrudan anlık görüntüye kodlar."""
+    return encode_snapshot({k: encode_value(v) for k, v in state.items()})
+
+# --- 2. Çözme ---
+
+class _Reader:
+    __slots__ = ('buf', 'pos')
+
+    def __init__(self, buf):
+        self.buf = memoryview(buf)
+        self.pos = 0
+
+    def take(self, n):
+        if self.pos + n > len(self.buf):
+            raise SnapshotError("Anlık görüntü beklenenden kısa.")
+        chunk = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def u32(self):
+        return _U32.unpack(self.take(4))[0]
+
+def _read_str_body(reader):
+    return str(reader.take(reader.u32()), 'utf-8')
+
+def _read_column(reader):
+    """_write_column çıktısını pandas dizisine (ExtensionArray ya da NumPy dizisi) çevirir."""
+    pd = _pandas()
+    tag = bytes(reader.take(1))
+    if tag == _COL_ARRAY:
+        return _read(reader)
+    if tag == _COL_OBJECT:
+        values = _read(reader)
+        result = np.empty(len(values), dtype=object) # np.array, iç içe listeleri çok boyutlu diziye çevirirdi
+        result[:] = values
+        return result
+    if tag == _COL_CATEGORY:
+        ordered = _read(reader)
+        categories = _read_column(reader)
+        codes = _read(reader)
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories, ordered=ordered))
+    if tag == _COL_EXTENSION:
+        dtype = pd.api.types.pandas_dtype(_read(reader))
+        return pd.array(_read(reader), dtype=dtype)
+    raise SnapshotError(f"Bilinmeyen sütun etiketi: {tag!r}")
+
+def _read_index(reader):
+    tag = bytes(reader.take(1))
+    if tag == _RANGE_INDEX:
+        start, stop, step = (_I64.unpack(reader.take(8))[0] for _ in range(3))
+        return _pandas().RangeIndex(start, stop, step)
+    if tag == _INDEX:
+        name = _read(reader)
+        return _pandas().Index(_read_column(reader), name=name)
+    raise SnapshotError(f"Bilinmeyen indeks etiketi: {tag!r}")
+
+def _read(reader):
+    tag = bytes(reader.take(1))
+    if tag == _NONE:
+        return None
+    if tag == _TRUE:
+        return True
+    if tag == _FALSE:
+        return False
+    if tag == _INT:
+        return _I64.unpack(reader.take(8))[0]
+    if tag == _BIGINT:
+        return int(str(reader.take(reader.u32()), 'ascii'))
+    if tag == _FLOAT:
+        return _F64.unpack(reader.take(8))[0]
+    if tag == _STR:
+        return _read_str_body(reader)
+    if tag == _DICT:
+        count = reader.u32()
+        result = {}
+        for _ in range(count):
+            key = _read(reader)
+            result[key] = _read(reader)
+        return result
+    if tag in (_LIST, _TUPLE, _SET):
+        items = [_read(reader) for _ in range(reader.u32())]
+        return items if tag == _LIST else tuple(items) if tag == _TUPLE else set(items)
+    if tag == _JSON:
+        return json.loads(str(reader.take(reader.u32()), 'utf-8'))
+    if tag == _STRS:
+        count = reader.u32()
+        text = str(reader.take(reader.u32()), 'utf-8')
+        return text.split('\x00') if count else []
+    if tag == _ARRAY:
+        dtype = np.dtype(_read(reader))
+        shape = tuple(reader.u32() for _ in range(reader.u32()))
+        count = int(np.prod(shape, dtype=np.int64))
+        return np.frombuffer(reader.take(count * dtype.itemsize), dtype=dtype).reshape(shape).copy()
+    if tag == _FRAME:
+        pd = _pandas()
+        index = _read_index(reader)
+        columns = _read_index(reader)
+        data = {position: _read_column(reader) for position in range(len(columns))}
+        df = pd.DataFrame(data, index=index, copy=False)
+        df.columns = columns
+        return df
+    if tag == _DATETIME:
+        return datetime.datetime.fromisoformat(_read(reader))
+    if tag == _DATE:
+        return datetime.date.fromisoformat(_read(reader))
+    raise SnapshotError(f"Bilinmeyen değer etiketi: {tag!r}")
+
+def decode_value(raw):
+    """encode_value çıktısını tekrar Python değerine çevirir."""
+    return _read(_Reader(raw))
+
+def is_snapshot(blob):
+    return blob is not None and bytes(blob[:4]) == MAGIC
+
+def _split_frame(blob, start, items):
+    """start'taki çerçevenin anahtarlarını items'a işler; sonraki çerçevenin konumunu döndürür."""
+    if len(blob) - start < _HEADER.size:
+        raise SnapshotError("Anlık görüntü başlığı eksik.")
+    magic, version, flags = _HEADER.unpack_from(blob, start)
+    if magic != MAGIC:
+        raise SnapshotError("Anlık görüntü imzası geçersiz.")
+    if version > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Desteklenmeyen anlık görüntü sürümü: {version}")
+    start += _HEADER.size
+    body = blob[start:]
+    if flags & _FLAG_ZLIB:
+        # Çerçevenin nerede bittiği (yamanın başladığı yer) ancak açarken öğrenilir; zlib.decompress bunu vermez
+        decompressor = zlib.decompressobj()
+        body = decompressor.decompress(body, _INFLATE_FIRST)
+        if not decompressor.eof:
+            body += decompressor.decompress(decompressor.unconsumed_tail)
+        if not decompressor.eof:
+            raise SnapshotError("Anlık görüntü beklenenden kısa.")
+        end = len(blob) - len(decompressor.unused_data)
+
+    reader = _Reader(body)
+    for _ in range(reader.u32()):
+        if bytes(reader.take(1)) != _STR:
+            raise SnapshotError("Anahtar metin olmalı.")
+        key = _read_str_body(reader)
+        raw = bytes(reader.take(reader.u32()))
+        if raw == _DELETED:
+            items.pop(key, None)
+        else:
+            items[key] = raw
+    return end if flags & _FLAG_ZLIB else start + reader.pos
+
+def split_snapshot(blob):
+    """Anlık görüntüyü (ve ardındaki yamaları) çözmeden {anahtar: kodlanmış değer baytları} sözlüğüne ayırır."""
+    blob = memoryview(bytes(blob))
+    items, position = {}, 0
+    while True:
+        position = _split_frame(blob, position, items)
+        if position == len(blob):
+            return items
+
+def decode_snapshot(blob):
+    """Anlık görüntüyü oturum sözlüğüne çözer."""
+    return {k: decode_value(raw) for k, raw in split_snapshot(blob).items()}
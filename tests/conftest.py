@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Testler depo kökündeki modülleri (sim_core, db_manager, benchmarks...) doğrudan içe aktarır
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,112 @@
+# tests/test_db_async.py
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+import db_async
+import db_manager
+
+class SahteHavuz:
+    """asyncpg havuzu yerine geçen nesne: user_data okuma sorgularını sözlükten karşılar.
+
+    gecikme ve hatali, parçanın ilk kullanıcı adına göre sorguyu geciktirir ya da hata verdirir.
+    """
+
+    def __init__(self, kullanicilar):
+        self.veriler = {k: json.dumps({'gelirler': [{'isim': k, 'tutar': 1000}]}) for k in kullanicilar}
+        self.gecikme = {}
+        self.hatali = set()
+        self.sorgular = []
+        self.acik = self.en_fazla_acik = 0
+        self.kapandi = False
+
+    @asynccontextmanager
+    async def _baglanti(self):
+        self.acik += 1
+        self.en_fazla_acik = max(self.en_fazla_acik, self.acik)
+        try:
+            yield self
+        finally:
+            self.acik -= 1
+
+    def acquire(self, timeout=None):
+        return self._baglanti()
+
+    async def fetch(self, sorgu, kullanicilar, surumler):
+        self.sorgular.append(list(kullanicilar))
+        await asyncio.sleep(self.gecikme.get(kullanicilar[0], 0.01))
+        if kullanicilar[0] in self.hatali:
+            raise ConnectionError("bağlantı koptu")
+        return [(k, 1, self.veriler[k], None) for k in kullanicilar if k in self.veriler]
+
+    async def fetchrow(self, sorgu, onbellekteki, kullanici):
+        self.sorgular.append([kullanici])
+        return (1, self.veriler[kullanici], None) if kullanici in self.veriler else None
+
+    async def close(self):
+        self.kapandi = True
+
+    def terminate(self):
+        self.kapandi = True
+
+@pytest.fixture
+def havuz(monkeypatch):
+    havuz = SahteHavuz([f'u{i:02d}' for i in range(7)])
+    kurulan = []
+    async def create_pool(**ayarlar):
+        kurulan.append(asyncio.get_running_loop())
+        return havuz
+    monkeypatch.setattr(db_async.asyncpg, 'create_pool', create_pool)
+    havuz.kurulan = kurulan
+    db_manager.clear_read_cache()
+    yield havuz
+    db_async.close_async_pool_sync() # Arka plan döngüsünün havuzu sonraki teste kalmasın
+    db_manager.clear_read_cache()
+
+def _gelir(veri):
+    return veri['gelirler'][0]['isim'] if veri is not None else None
+
+# --- Toplu okuma parçalara bölünür ve parçalar aynı anda çalışır ---
+
+def test_toplu_okuma_parcalara_bolunur(havuz):
+    kullanicilar = [f'u{i:02d}' for i in range(7)] + ['yok', 'u00']
+    sonuc = asyncio.run(db_async.load_users_data(kullanicilar, chunk_size=3))
+
+    assert list(sonuc) == kullanicilar[:-1] # Tekrar eden kullanıcı bir kez okunur
+    assert {k: _gelir(v) for k, v in sonuc.items()} == {**{k: k for k in kullanicilar[:7]}, 'yok': None}
+    assert sorted(map(len, havuz.sorgular)) == [2, 3, 3]
+    assert havuz.en_fazla_acik == 3
+
+def test_zaman_asimi_ve_hata_yalnizca_kendi_parcasini_bosaltir(havuz):
+    havuz.gecikme['u03'] = 5.0
+    havuz.hatali.add('u06')
+    kullanicilar = [f'u{i:02d}' for i in range(7)]
+    sonuc = asyncio.run(db_async.load_users_data(kullanicilar, timeout=0.5, chunk_size=3))
+
+    assert {k: _gelir(v) for k, v in sonuc.items()} == {
+        'u00': 'u00', 'u01': 'u01', 'u02': 'u02', 'u03': None, 'u04': None, 'u05': None, 'u06': None,
+    }
+    assert havuz.acik == 0 # İptal edilen sorgunun bağlantısı havuza döndü
+
+# --- Senkron sarmalayıcılar tek arka plan döngüsünü ve havuzunu paylaşır ---
+
+def test_senkron_sarmalayicilar_ayni_havuzu_kullanir(havuz):
+    assert _gelir(db_async.load_user_data_sync('u01')) == 'u01'
+    assert db_async.load_user_data_sync('yok') is None
+    assert _gelir(db_async.load_users_data_sync(['u02', 'u03'])['u03']) == 'u03'
+    assert havuz.kurulan == [db_async._loop]
+
+    db_async.close_async_pool_sync()
+    assert havuz.kapandi and not db_async._pools
+
+# --- Döngü kapanınca havuzu kapatılır ve kaydı silinir ---
+
+def test_dongu_kapaninca_havuz_birakilir(havuz):
+    for _ in range(2):
+        assert _gelir(asyncio.run(db_async.load_user_data('u00'))) == 'u00'
+        assert havuz.kapandi and not db_async._pools
+        havuz.kapandi = False
+    assert len(havuz.kurulan) == 2
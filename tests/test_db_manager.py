@@ -0,0 +1,153 @@
+# tests/test_db_manager.py
+
+import copy
+
+import pytest
+
+import db_manager
+from benchmarks.fake_db import SahteBaglanti, SahteImlec, sahte_veritabani
+from benchmarks.portfolios import oturum_durumu
+
+KULLANICI = 'ali@example.com'
+
+@pytest.fixture
+def baglanti(monkeypatch):
+    monkeypatch.setattr(db_manager, 'DB_STATE_FORMAT', 'binary')
+    db_manager._cache_drop(KULLANICI) # Okuma önbelleği süreç geneli: önceki testin satırı kullanılmasın
+    with sahte_veritabani() as baglanti:
+        baglanti.users[KULLANICI] = 'hash'
+        yield baglanti
+    db_manager._cache_drop(KULLANICI)
+
+def _gelir_degistir(durum, carpan):
+    durum['gelirler'][0]['tutar'] *= carpan
+
+# --- Oturum anahtarları ---
+
+def test_oturum_anahtari_dogrulanir(baglanti):
+    token = db_manager.issue_session_token(KULLANICI)
+    assert db_manager.verify_session_token(token) == KULLANICI
+
+def test_bilinmeyen_kullaniciya_anahtar_verilmez(baglanti):
+    assert db_manager.issue_session_token('yok@example.com') is None
+
+@pytest.mark.parametrize('bozma', [lambda t: t[:-2] + 'xx', lambda t: 'x' + t, lambda t: t.replace('.', ''), lambda t: ''])
+def test_bozulmus_anahtar_reddedilir(baglanti, bozma):
+    assert db_manager.verify_session_token(bozma(db_manager.issue_session_token(KULLANICI))) is None
+
+def test_suresi_dolmus_anahtar_reddedilir(baglanti):
+    assert db_manager.verify_session_token(db_manager.issue_session_token(KULLANICI, ttl=-1)) is None
+
+def test_sifir_sureli_anahtar_hemen_gecersizdir(monkeypatch, baglanti):
+    monkeypatch.setattr(db_manager.time, 'time', lambda: 1000.5)
+    assert db_manager.verify_session_token(db_manager.issue_session_token(KULLANICI, ttl=0)) is None
+
+def test_cikis_verilmis_anahtarlari_gecersiz_kilar(baglanti):
+    eski = db_manager.issue_session_token(KULLANICI)
+    assert db_manager.revoke_session_tokens(KULLANICI)
+    assert db_manager.verify_session_token(eski) is None
+    assert db_manager.verify_session_token(db_manager.issue_session_token(KULLANICI)) == KULLANICI
+
+# --- İkili formatta yalnızca değişen anahtarlar yazılır ---
+
+def _tr_params_degistir(durum):
+    durum['tr_params'] = dict(durum['tr_params'], kmh_aylik_faiz=4.5)
+
+def test_degisen_anahtarlar_yama_olarak_eklenir(baglanti):
+    durum = oturum_durumu('orta')
+    assert db_manager.save_user_data(KULLANICI, durum)
+    taban = baglanti.user_data[KULLANICI]['snapshot']
+
+    _tr_params_degistir(durum)
+    del durum['manuel_oncelik_listesi']
+    assert db_manager.save_user_data(KULLANICI, durum)
+    satir = baglanti.user_data[KULLANICI]
+    assert satir['snapshot'] == taban and len(satir['snapshot_patch']) < len(taban)
+
+    for onbellekten in (True, False):
+        if not onbellekten: db_manager._cache_drop(KULLANICI)
+        yuklenen = db_manager.load_user_data(KULLANICI)
+        assert yuklenen['tr_params']['kmh_aylik_faiz'] == 4.5
+        assert 'manuel_oncelik_listesi' not in yuklenen
+        assert yuklenen['gelirler'] == durum['gelirler']
+
+def test_yamalar_sinirdaysa_anlik_goruntu_bastan_yazilir(monkeypatch, baglanti):
+    monkeypatch.setattr(db_manager, 'DB_SNAPSHOT_PATCH_RATIO', 0.0)
+    durum = oturum_durumu('orta')
+    assert db_manager.save_user_data(KULLANICI, durum)
+    _tr_params_degistir(durum)
+    assert db_manager.save_user_data(KULLANICI, durum)
+    satir = baglanti.user_data[KULLANICI]
+    assert satir['snapshot_patch'] is None and satir['version'] == 2
+
+    db_manager._cache_drop(KULLANICI)
+    assert db_manager.load_user_data(KULLANICI)['tr_params']['kmh_aylik_faiz'] == 4.5
+
+# --- İyimser eşzamanlılık: iki oturum aynı kaydı değiştirir ---
+
+@pytest.fixture
+def iki_oturum(baglanti):
+    assert db_manager.save_user_data(KULLANICI, oturum_durumu('kucuk'))
+    return db_manager.load_user_data(KULLANICI), db_manager.load_user_data(KULLANICI)
+
+def test_eski_surumden_kayit_cakisma_verir(baglanti, iki_oturum):
+    a, b = iki_oturum
+    _gelir_degistir(b, 2)
+    assert db_manager.save_user_data(KULLANICI, b)
+    kayitli = copy.deepcopy(baglanti.user_data[KULLANICI])
+
+    _gelir_degistir(a, 3)
+    assert not db_manager.save_user_data(KULLANICI, a)
+    assert a[db_manager.KAYIT_CAKISMASI_ANAHTARI] == kayitli['version']
+    assert baglanti.user_data[KULLANICI] == kayitli # Kaybeden oturum kayıtlı veriye dokunmaz
+
+    assert db_manager.save_user_data(KULLANICI, a, force=True) # "Üzerine yaz"
+    assert db_manager.KAYIT_CAKISMASI_ANAHTARI not in a
+    assert db_manager.load_user_data(KULLANICI)['gelirler'] == a['gelirler']
+
+def test_ozet_islemden_once_hesaplanir_kaybeden_kayitta_yazilmaz(monkeypatch, baglanti, iki_oturum):
+    a, b = iki_oturum
+    _gelir_degistir(b, 2)
+    assert db_manager.save_user_data(KULLANICI, b)
+    kayitli_ozet = baglanti.user_summary[KULLANICI]
+
+    sorgu_sayilari = []
+    ozgun = db_manager._summary_refresh
+    monkeypatch.setattr(db_manager, '_summary_refresh', lambda *args: sorgu_sayilari.append(baglanti.sorgu_sayisi) or ozgun(*args))
+    once = baglanti.sorgu_sayisi
+    _gelir_degistir(a, 3)
+    assert not db_manager.save_user_data(KULLANICI, a)
+    assert sorgu_sayilari == [once] # Simülasyon işlemin ilk sorgusundan önce çalıştı
+    assert baglanti.user_summary[KULLANICI] == kayitli_ozet
+    assert db_manager.save_user_data(KULLANICI, a, force=True)
+    assert baglanti.user_summary[KULLANICI] != kayitli_ozet
+
+def test_ayni_icerik_cakisma_sayilmaz(baglanti, iki_oturum):
+    a, b = iki_oturum
+    _gelir_degistir(a, 2)
+    _gelir_degistir(b, 2)
+    assert db_manager.save_user_data(KULLANICI, b)
+    assert db_manager.save_user_data(KULLANICI, a)
+    assert db_manager.KAYIT_CAKISMASI_ANAHTARI not in a
+
+class _SatiriSilenImlec(SahteImlec):
+    """Korumalı yazım tutmadığında satırı siler: çakışma denetiminden önce başka bir oturumun silmesi gibi."""
+
+    def execute(self, sorgu, parametreler=()):
+        super().execute(sorgu, parametreler)
+        if " ".join(sorgu.split()).startswith("INSERT INTO user_data") and not self._sonuc:
+            self.baglanti.user_data.clear()
+
+def test_silinen_satir_cakisma_olarak_bildirilir(monkeypatch, baglanti, iki_oturum):
+    a, b = iki_oturum
+    _gelir_degistir(b, 2)
+    assert db_manager.save_user_data(KULLANICI, b)
+
+    monkeypatch.setattr(baglanti, 'cursor', lambda: _SatiriSilenImlec(baglanti))
+    _gelir_degistir(a, 3)
+    assert not db_manager.save_user_data(KULLANICI, a)
+    assert a[db_manager.KAYIT_CAKISMASI_ANAHTARI] is None
+    assert KULLANICI not in baglanti.user_data
+
+    assert db_manager.save_user_data(KULLANICI, a, force=True) # "Üzerine yaz" satırı yeniden ekler
+    assert baglanti.user_data[KULLANICI]['version'] == 1
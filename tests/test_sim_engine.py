@@ -0,0 +1,141 @@
+# tests/test_sim_engine.py
+
+import numpy as np
+import pytest
+
+from sim_core import ONCELIK_STRATEJILERI, simule_borc_planı
+from sim_engine import (
+    MAKS_AY, borc_dizileri, gelir_dizileri, nakit_akisi, parametre_dizileri, simule_borc_planı_np, simule_toplu,
+)
+from sim_events import simule_olay_tabanli
+from benchmarks.portfolios import PORTFOY_BOYUTLARI, VARSAYILAN_PARAMETRELER, portfoy
+
+OZET_ANAHTARLARI = ('ay_sayisi', 'toplam_faiz', 'toplam_birikim', 'baslangic_faizli_borc')
+MOTORLAR = {'np': simule_borc_planı_np, 'olay': simule_olay_tabanli}
+
+def _ayni_sonuc(sonuc, beklenen):
+    for anahtar in OZET_ANAHTARLARI:
+        assert sonuc[anahtar] == beklenen[anahtar], anahtar
+    assert sonuc['df'].equals(beklenen['df'])
+    # Olay motoru ara bakiyeleri tutmaz. Diğerlerinde toplama sırasından kaynaklı kayan nokta artıkları
+    # olabilir; kuruş düzeyinde aynıdır
+    if 'bakiye' in sonuc:
+        np.testing.assert_allclose(sonuc['bakiye'], beklenen['bakiye'], rtol=0, atol=0.005)
+
+# --- np ve olay motorları, sözlük motoruyla kuruşu kuruşuna aynı sonucu vermeli ---
+
+@pytest.mark.parametrize('strateji', ONCELIK_STRATEJILERI.values())
+@pytest.mark.parametrize('tohum', [0, 1, 2])
+@pytest.mark.parametrize('borc_sayisi, gelir_sayisi', PORTFOY_BOYUTLARI)
+@pytest.mark.parametrize('motor', MOTORLAR.values(), ids=MOTORLAR.keys())
+def test_motor_sozluk_motoruyla_ayni(motor, borc_sayisi, gelir_sayisi, tohum, strateji):
+    borclar, gelirler = portfoy(borc_sayisi, gelir_sayisi, tohum)
+    sim_params = dict(VARSAYILAN_PARAMETRELER, oncelik_stratejisi=strateji)
+
+    beklenen = simule_borc_planı(borclar, gelirler, **sim_params)
+    _ayni_sonuc(motor(borclar, gelirler, **sim_params), beklenen)
+
+# --- Olay motoru sakin ayları kapalı formla atlar ve ufku uzatmak sonucu değiştirmez ---
+# Portföylerin çoğu birkaç ayda kapanır; bu senaryolar uzun, olaysız dönemleri zorlar.
+
+def _borc(isim, kural, tutar, faiz=0.0, taksit=0, kalan_ay=99999):
+    return {
+        "isim": isim, "tutar": tutar, "min_kural": kural, "oncelik": 1, "sabit_taksit": taksit,
+        "kalan_ay": kalan_ay, "faiz_aylik": faiz, "kk_asgari_yuzdesi": 0, "limit": 0,
+        "devam_etme_yuzdesi": 0.0,
+    }
+
+def _gelir(isim, tutar, baslangic_ay=1, artis=0.0, tek_seferlik=False):
+    return {"isim": isim, "tutar": tutar, "baslangic_ay": baslangic_ay, "artis_yuzdesi": artis, "tek_seferlik": tek_seferlik}
+
+SAKIN_SENARYOLAR = {
+    # 296 ay süren, hiç olay içermeyen bir konut kredisi
+    'yavas-kapanis': (
+        [_borc('Konut', 'SABIT_TAKSIT_ANAPARA', 900000, 0.01, 9500, 360), _borc('Kira', 'SABIT_GIDER', 0, taksit=30000)],
+        [_gelir('Maaş', 40000)],
+    ),
+    # Borç erken kapanır; taksitli gider döngüyü 300. aya kadar açık tutar, arada yeni bir gelir başlar
+    'borc-sonrasi-gider': (
+        [_borc('Kart', 'FAIZ', 50000, 0.03), _borc('Araç', 'SABIT_TAKSIT_GIDER', 4000 * 300, taksit=4000, kalan_ay=300)],
+        [_gelir('Maaş', 45000), _gelir('Kira Geliri', 10000, 60, 0.3)],
+    ),
+    # Süresiz gider plan ufkuna kadar sürer
+    'ufka-kadar': (
+        [_borc('Kart', 'FAIZ', 80000, 0.04), _borc('Aidat', 'SABIT_GIDER', 2000, taksit=2000)],
+        [_gelir('Maaş', 50000)],
+    ),
+}
+
+@pytest.mark.parametrize('strateji', ONCELIK_STRATEJILERI.values())
+@pytest.mark.parametrize('senaryo', SAKIN_SENARYOLAR)
+def test_olay_motoru_sakin_aylari_atlar(senaryo, strateji):
+    borclar, gelirler = SAKIN_SENARYOLAR[senaryo]
+    sim_params = dict(VARSAYILAN_PARAMETRELER, oncelik_stratejisi=strateji)
+
+    sonuc = simule_olay_tabanli(borclar, gelirler, **sim_params)
+    _ayni_sonuc(sonuc, simule_borc_planı(borclar, gelirler, **sim_params))
+    assert sonuc['olay_sayisi'] * 10 < sonuc['ay_sayisi']
+
+@pytest.mark.parametrize('ufuk_ay', [600, 1200, 2400])
+@pytest.mark.parametrize('senaryo', SAKIN_SENARYOLAR)
+def test_olay_motoru_uzun_ufukta_ayni(senaryo, ufuk_ay):
+    borclar, gelirler = SAKIN_SENARYOLAR[senaryo]
+    # Birikim artışı binlerce ayda tamsayı sınırını aşmasın
+    sim_params = dict(VARSAYILAN_PARAMETRELER, birikim_artis_aylik=0.0)
+
+    beklenen = simule_borc_planı(borclar, gelirler, **sim_params)
+    sonuc = simule_olay_tabanli(borclar, gelirler, ufuk_ay=ufuk_ay, **sim_params)
+    if beklenen['ay_sayisi'] > MAKS_AY:
+        # Sözlük motoru MAKS_AY'da durur; uzun ufuk aynı ayları üretip ufka kadar devam etmeli
+        assert sonuc['ay_sayisi'] == ufuk_ay + 1
+        assert sonuc['df'].iloc[:beklenen['ay_sayisi']].equals(beklenen['df'])
+    else:
+        _ayni_sonuc(sonuc, beklenen)
+
+# --- Nakit akışı: tek seferlik gelirler ve biten giderler tüm motorlarda aynı işlenir ---
+# Portföy üreticisi tek seferlik gelir üretmez; bu senaryolar zaman çizelgesinin kenar durumlarını sabitler.
+
+def _aylik_sonuclar(borclar, gelirler, sim_params):
+    """Motor adı -> (ay sayısı, aylık toplam gelir, aylık zorunlu gider)."""
+    sonuclar = {}
+    for ad, motor in (('sozluk', simule_borc_planı), *MOTORLAR.items()):
+        sonuc = motor(borclar, gelirler, **sim_params)
+        df = sonuc['df']
+        sonuclar[ad] = (sonuc['ay_sayisi'], df['Toplam Gelir'].tolist(), df['Toplam Zorunlu Giderler'].tolist())
+    borc = borc_dizileri(borclar)
+    akis = nakit_akisi(borc, gelir_dizileri(gelirler))
+    toplu = simule_toplu(borc, akis['gelir'], parametre_dizileri([sim_params]), kayit=True, gider_akisi=akis['gider'])
+    ay_sayisi = int(toplu['ay_sayisi'][0])
+    kolonlar = toplu['kolonlar']
+    sonuclar['toplu'] = (
+        ay_sayisi, np.round(kolonlar['Toplam Gelir'][0, :ay_sayisi]).tolist(),
+        np.round(kolonlar['Toplam Zorunlu Giderler'][0, :ay_sayisi]).tolist(),
+    )
+    return sonuclar
+
+def test_tek_seferlik_gelir_yalnizca_baslangic_ayinda_odenir():
+    borclar = [_borc('Kart', 'FAIZ', 20000, 0.02), _borc('Telefon', 'SABIT_TAKSIT_GIDER', 1000 * 12, taksit=1000, kalan_ay=12)]
+    gelirler = [_gelir('Maaş', 30000), _gelir('Prim', 50000, baslangic_ay=3, artis=0.2, tek_seferlik=True)]
+    beklenen_gelir = [30000] * 12
+    beklenen_gelir[2] += 50000
+
+    for ad, (ay_sayisi, gelir, _) in _aylik_sonuclar(borclar, gelirler, VARSAYILAN_PARAMETRELER).items():
+        assert ay_sayisi == 12, ad
+        assert gelir == beklenen_gelir, ad
+
+def test_kalan_ayi_dolan_gider_simulasyonu_bitirir():
+    borclar = [
+        _borc('Araç', 'SABIT_TAKSIT_GIDER', 3000 * 24, taksit=3000, kalan_ay=24),
+        _borc('Kira', 'SABIT_GIDER', 5000, taksit=5000, kalan_ay=18),
+    ]
+    gelirler = [_gelir('Maaş', 20000)]
+    sim_params = dict(VARSAYILAN_PARAMETRELER, aylik_zorunlu_birikim=0.0) # Zorunlu giderlere eklenmesin
+
+    for ad, (ay_sayisi, _, gider) in _aylik_sonuclar(borclar, gelirler, sim_params).items():
+        assert ay_sayisi == 24, ad
+        assert gider == [8000] * 18 + [3000] * 6, ad
+
+def test_bos_girdi_none_doner():
+    borclar, gelirler = portfoy(1, 1)
+    assert simule_borc_planı_np([], gelirler) is None
+    assert simule_borc_planı_np(borclar, []) is None
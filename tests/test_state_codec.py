@@ -0,0 +1,89 @@
+# tests/test_state_codec.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import db_manager
+from state_codec import SnapshotError, decode_snapshot, decode_value, encode_patch, encode_snapshot, encode_state, encode_value
+from benchmarks.fake_db import sahte_veritabani
+from benchmarks.portfolios import OTURUM_BOYUTLARI, oturum_durumu
+
+def _ayni_cerceve(sonuc, beklenen):
+    pd.testing.assert_frame_equal(sonuc, beklenen, check_exact=True)
+    assert type(sonuc.columns) is type(beklenen.columns)
+
+# --- Oturum anlık görüntüsü kayıpsız gidip gelmeli ---
+
+@pytest.mark.parametrize('boyut', OTURUM_BOYUTLARI)
+def test_oturum_gidip_gelir(boyut):
+    durum = oturum_durumu(boyut)
+    sonuc = decode_snapshot(encode_state(durum))
+
+    assert sonuc.keys() == durum.keys()
+    for anahtar, deger in durum.items():
+        if isinstance(deger, pd.DataFrame):
+            _ayni_cerceve(sonuc[anahtar], deger)
+        else:
+            assert sonuc[anahtar] == deger, anahtar
+            assert type(sonuc[anahtar]) is type(deger), anahtar
+
+@pytest.mark.parametrize('deger', [
+    None, True, 0, -2**63, 2**80, 1.5, 'çğış', [1, 'a', None], (1, 2), {3, 1}, {1: 'int anahtar'},
+    {'iç': [{'a': (1, 2)}]}, np.arange(6, dtype=np.int32).reshape(2, 3),
+])
+def test_deger_gidip_gelir(deger):
+    sonuc = decode_value(encode_value(deger))
+    if isinstance(deger, np.ndarray):
+        np.testing.assert_array_equal(sonuc, deger)
+        assert sonuc.dtype == deger.dtype
+    else:
+        assert sonuc == deger
+        assert type(sonuc) is type(deger)
+
+# --- Yamalar anlık görüntünün anahtarlarını sırayla ezmeli ---
+
+def test_yamalar_sirayla_uygulanir():
+    taban = encode_snapshot({'a': encode_value(1), 'b': encode_value([1, 2])})
+    ilk = encode_patch({'a': encode_value(2), 'c': encode_value('yeni')}, removed=['b'])
+    ikinci = encode_patch({'b': encode_value({3})}, removed=['c'])
+    assert decode_snapshot(taban + ilk) == {'a': 2, 'c': 'yeni'}
+    assert decode_snapshot(taban + ilk + ikinci) == {'a': 2, 'b': {3}}
+
+def test_yarim_kalan_yama_hata_verir():
+    blob = encode_state({'a': 1}) + encode_patch({'a': encode_value(2)})
+    with pytest.raises(SnapshotError):
+        decode_snapshot(blob[:-1])
+
+# --- DataFrame sütunları konumsal ve tipleriyle saklanmalı ---
+
+@pytest.mark.parametrize('df', [
+    pd.DataFrame([[1, 2]], columns=['a', 'a']),
+    pd.DataFrame([[1, 2]]),
+    pd.DataFrame({'x': pd.array([1, None, 3], dtype='Int64')}),
+    pd.DataFrame({'x': pd.array([1.5, None], dtype='Float64'), 'y': pd.array([True, None], dtype='boolean')}),
+    pd.DataFrame({'c': pd.Categorical(['a', 'b', 'a'], categories=['b', 'a'], ordered=True)}),
+    pd.DataFrame({'c': pd.Categorical([1, 2, None])}),
+    pd.DataFrame({'s': pd.array(['a', None, 'c'], dtype='string'), 'o': pd.Series([1, 'a', None], dtype=object)}),
+    pd.DataFrame({'t': pd.date_range('2024-01-01', periods=2, tz='UTC'), 'd': pd.date_range('2024-01-01', periods=2)}),
+    pd.DataFrame({'v': [1.5, 2.5]}, index=pd.Index(['p', 'q'], name='n')),
+    pd.DataFrame({'a': pd.Series([], dtype=float), 'b': pd.Series([], dtype=object)}),
+], ids=['ayni-ad', 'range-sutunlar', 'Int64', 'Float64-boolean', 'kategorik', 'kategorik-sayi', 'string-object',
+        'tarih', 'adli-indeks', 'bos'])
+def test_cerceve_gidip_gelir(df):
+    _ayni_cerceve(decode_value(encode_value(df)), df)
+
+def test_temsil_edilemeyen_cerceve_hata_verir():
+    with pytest.raises(SnapshotError):
+        encode_value(pd.DataFrame([[1]], columns=pd.MultiIndex.from_tuples([('a', 'b')])))
+    with pytest.raises(SnapshotError):
+        encode_value(pd.DataFrame({'p': pd.period_range('2024-01', periods=2, freq='M')}))
+
+def test_temsil_edilemeyen_cerceve_jsonb_ile_kaydedilir(monkeypatch):
+    monkeypatch.setattr(db_manager, 'DB_STATE_FORMAT', 'binary')
+    durum = {'borclar': [], 'tablo': pd.DataFrame([[1, 2]], columns=pd.MultiIndex.from_tuples([('a', 'b'), ('a', 'c')]))}
+    with sahte_veritabani() as baglanti:
+        assert db_manager.save_user_data('codec@example.com', durum)
+    satir = baglanti.user_data['codec@example.com']
+    assert satir['snapshot'] is None and satir['data'] is not None
+    assert durum[db_manager.KAYIT_OZETI_ANAHTARI]['format'] == 'json'